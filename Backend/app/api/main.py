@@ -7,7 +7,11 @@ from app.api.routes import(
     test,
     itineraries,
     user,
-    poll
+    poll,
+    storage,
+    metrics,
+    admin,
+    sync
 )
 
 api_router = APIRouter()
@@ -18,4 +22,8 @@ api_router.include_router(expenses.router, tags=['Expenses'])
 api_router.include_router(itineraries.router, tags=['Itineraries'])
 api_router.include_router(test.router, tags=['aws-s3'])
 api_router.include_router(user.router, tags=['user'])
-api_router.include_router(poll.router, tags=['poll'])
\ No newline at end of file
+api_router.include_router(poll.router, tags=['poll'])
+api_router.include_router(storage.router, tags=['storage'])
+api_router.include_router(metrics.router, tags=['metrics'])
+api_router.include_router(admin.router, tags=['admin'])
+api_router.include_router(sync.router, tags=['sync'])
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
+from app.api.schemas.auth import UserData
+from app.core.auth import get_admin_user
+from app.core.profiling import profile_store, create_profile_token
+
+router = APIRouter(prefix="/admin")
+
+@router.post("/profiles/token")
+def create_profiling_token(
+    ttl_seconds: int = Query(900, ge=1, le=86400),
+    current_user: UserData = Depends(get_admin_user)
+):
+    """Signed value for the X-Profile header; requests sending it are profiled"""
+    return {"header": "X-Profile", "value": create_profile_token(ttl_seconds), "expires_in": ttl_seconds}
+
+@router.get("/profiles")
+def list_profiles(current_user: UserData = Depends(get_admin_user)):
+    """Stored request profiles, newest first"""
+    return profile_store.list()
+
+@router.get("/profiles/{profile_id}")
+def get_profile(profile_id: str, current_user: UserData = Depends(get_admin_user)):
+    """Download a profile as speedscope JSON (open it at https://www.speedscope.app)"""
+    path = profile_store.path(profile_id)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json", filename=f"{profile_id}.speedscope.json")
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from uuid import UUID
 import uuid
+import asyncio
 from datetime import datetime
 
 from app.models.expense_models import Expense, ExpenseSplit, UserBalance, SplitType, Attachment
@@ -14,9 +15,15 @@ from app.api.schemas.auth import UserData
 # You'll need this model to fetch group members:
 from app.models.group_models import GroupMember  # Assuming this exists
 from app.repository.expense import expenserepo
-from app.core.aws import upload_file_to_s3, delete_file_from_s3, generate_presigned_url
+from app.core.storage import storage
+from app.repository.storage import storagerepo
+from app.repository.sync import syncrepo
+from app.helper.storage_helper import hash_fileobj
+from app.helper.http_helper import group_etag
+from app.core.config import settings
+from app.api.schemas.attachments import AttachmentUploadInit, AttachmentUploadInitResponse, AttachmentUploadComplete
 from app.api.schemas.expenses import ExpenseResponse, ExpenseUpdateRequest, SettlementCreate
-from typing import Optional, List, Text
+from typing import Dict, Optional, List
 
 router = APIRouter(prefix="/expenses", tags=["Expenses"])
 
@@ -27,88 +34,10 @@ def create_expense(
     current_user: UserData = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    # Validation (unchanged)
-    if payload.split_type == SplitType.CUSTOM:
-        if not payload.splits or len(payload.splits) == 0:
-            raise HTTPException(status_code=400, detail="Custom split requires non-empty splits list.")
-        total_split = round(sum(split.amount for split in payload.splits), 2)
-        if total_split != round(payload.total_amount, 2):
-            raise HTTPException(
-                status_code=400,
-                detail=f"Custom split total ({total_split}) does not match total amount ({payload.total_amount})"
-            )
-
-    # Create Expense (unchanged)
-    expense = Expense(
-        group_id=group_id,
-        created_by=current_user.id,
-        title=payload.title,
-        description=payload.description,
-        total_amount=payload.total_amount,
-        split_type=payload.split_type,
-        created_at=datetime.utcnow()
-    )
-    db.add(expense)
-    db.flush()
-
-    # Prepare splits - KEY CHANGE: Include payer but with their actual calculated share
-    splits = []
-    if payload.split_type == SplitType.EQUAL:
-        # Get ALL group members including payer
-        group_users = db.query(GroupMember.user_id).filter_by(group_id=group_id).all()
-        user_ids = [user_id for (user_id,) in group_users]
-        
-        if len(user_ids) < 2:
-            raise HTTPException(status_code=400, detail="Not enough users in the group to split with.")
-
-        share = round(payload.total_amount / len(user_ids), 2)
-        splits = [
-            ExpenseSplit(
-                expense_id=expense.id,
-                user_id=user_id,
-                amount=share  # Payer gets their calculated share too
-            )
-            for user_id in user_ids
-        ]
-    else:  # Custom split
-        splits = [
-            ExpenseSplit(
-                expense_id=expense.id,
-                user_id=split.user_id,
-                amount=split.amount
-            )
-            for split in payload.splits
-            # Don't filter out payer - include all specified splits
-        ]
-
-    db.add_all(splits)
-    db.flush()
-
-    # Update balances - KEY CHANGE: Skip payer's entry
-    for split in splits:
-        if split.user_id == current_user.id:
-            continue  # Skip balance update for payer
-
-        balance = db.query(UserBalance).filter_by(
-            debtor_id=split.user_id,
-            creditor_id=current_user.id,
-            group_id=group_id
-        ).first()
-
-        if balance:
-            balance.amount += split.amount
-        else:
-            balance = UserBalance(
-                debtor_id=split.user_id,
-                creditor_id=current_user.id,
-                group_id=group_id,
-                amount=split.amount
-            )
-            db.add(balance)
-
+    expense = expenserepo.add_expense(db, group_id, current_user.id, payload)
     db.commit()
 
-    return {"message": "Expense created successfully", "expense_id": str(expense.id)}
+    return {"message": "Expense created successfully", "expense_id": expense.id}
 
 
 # File upload to aws s3
@@ -124,37 +53,153 @@ async def upload_attachments(
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
 
-    saved_files = []
+    # Hash and upload files in parallel, each streamed in parts; the
+    # semaphore caps how many run at once.
+    semaphore = asyncio.Semaphore(settings.S3_UPLOAD_CONCURRENCY)
 
-    for file in files:
-        # Get original filename and file content
-        original_filename = file.filename
-        file_content = await file.read()
-        
-        # Upload to S3 and get file URL
-        try:
-            file_name, file_url = upload_file_to_s3(file_content, original_filename, file.content_type)
-            
+    async def bounded(func, *args):
+        async with semaphore:
+            return await storage.run(func, *args)
+
+    try:
+        # Content-addressed storage: content we already have is not uploaded again
+        hashes = await asyncio.gather(*(bounded(hash_fileobj, file.file) for file in files))
+        stored_objects = [
+            storagerepo.acquire(db, sha256, size, file.filename, file.content_type)
+            for file, (sha256, size) in zip(files, hashes)
+        ]
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error uploading file: {str(e)}")
+
+    to_upload = {
+        stored_object.key: file
+        for file, (stored_object, is_new) in zip(files, stored_objects) if is_new
+    }
+    results = await asyncio.gather(
+        *(bounded(storage.save, file.file, file.filename, file.content_type, key)
+          for key, file in to_upload.items()),
+        return_exceptions=True
+    )
+    uploaded_keys = [key for key, result in zip(to_upload, results) if not isinstance(result, BaseException)]
+    errors = [result for result in results if isinstance(result, BaseException)]
+
+    def cleanup():
+        # Don't leave orphaned objects behind when the request fails
+        db.rollback()
+        for key in uploaded_keys:
+            try:
+                storagerepo.purge_if_unreferenced(db, key)
+            except Exception:
+                pass
+
+    if errors:
+        cleanup()
+        raise HTTPException(status_code=500, detail=f"Error uploading file: {str(errors[0])}")
+
+    saved_files = []
+    try:
+        for file, (stored_object, _) in zip(files, stored_objects):
+            file_url = storage.get_url(stored_object.key)
             # Save file info in the database with a generated UUID
             attachment = Attachment(
                 id=uuid.uuid4(),  # Generate a UUID for the attachment
                 expense_id=expense.id,
-                original_filename=original_filename,
+                original_filename=file.filename,
                 file_url=file_url,
+                uploaded_by=current_user.id,
                 uploaded_at=datetime.utcnow()
             )
             db.add(attachment)
             saved_files.append({
                 "attachment_id": attachment.id,
-                "original_filename": original_filename,
+                "original_filename": file.filename,
                 "file_url": file_url
             })
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error uploading file: {str(e)}")
+        syncrepo.touch(db, expense.group_id)
+        db.commit()
+    except Exception as e:
+        cleanup()
+        raise HTTPException(status_code=500, detail=f"Error saving attachments: {str(e)}")
 
-    db.commit()
     return {"message": "Files uploaded successfully", "files": saved_files}
 
+# Direct upload: the client posts the file to storage (S3) itself using the
+# presigned form returned by :init, then registers it with :complete.
+
+@router.post("/{expense_id}/attachments:init", response_model=AttachmentUploadInitResponse)
+def init_attachment_upload(
+    expense_id: UUID,
+    payload: AttachmentUploadInit,
+    current_user: UserData = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    expense = db.query(Expense).filter_by(id=expense_id).first()
+    if not expense:
+        raise HTTPException(status_code=404, detail="Expense not found")
+    if not db.query(GroupMember).filter_by(group_id=expense.group_id, user_id=current_user.id).first():
+        raise HTTPException(status_code=403, detail="You're not a member of this group")
+
+    try:
+        file_name, presigned_post = storage.presigned_upload(
+            payload.filename,
+            payload.content_type,
+            owner_id=expense.id,
+            max_size=settings.PRESIGNED_UPLOAD_MAX_BYTES,
+            expiration=settings.PRESIGNED_UPLOAD_EXPIRATION_SECONDS
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error preparing upload: {str(e)}")
+
+    return AttachmentUploadInitResponse(
+        key=file_name,
+        url=presigned_post["url"],
+        fields=presigned_post["fields"],
+        expires_in=settings.PRESIGNED_UPLOAD_EXPIRATION_SECONDS
+    )
+
+@router.post("/{expense_id}/attachments:complete", status_code=status.HTTP_201_CREATED)
+def complete_attachment_upload(
+    expense_id: UUID,
+    payload: AttachmentUploadComplete,
+    current_user: UserData = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    expense = db.query(Expense).filter_by(id=expense_id).first()
+    if not expense:
+        raise HTTPException(status_code=404, detail="Expense not found")
+    if not db.query(GroupMember).filter_by(group_id=expense.group_id, user_id=current_user.id).first():
+        raise HTTPException(status_code=403, detail="You're not a member of this group")
+
+    file_url = storage.get_url(payload.key)
+    if db.query(Attachment).filter_by(file_url=file_url).first():
+        raise HTTPException(status_code=409, detail="Attachment already registered")
+
+    try:
+        metadata = storage.verify_upload(payload.key, expense.id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error verifying upload: {str(e)}")
+    if not metadata:
+        raise HTTPException(status_code=400, detail="Uploaded file not found for this expense")
+
+    attachment = Attachment(
+        id=uuid.uuid4(),
+        expense_id=expense.id,
+        original_filename=payload.filename,
+        file_url=file_url,
+        uploaded_by=current_user.id,
+        uploaded_at=datetime.utcnow()
+    )
+    db.add(attachment)
+    syncrepo.touch(db, expense.group_id)
+    db.commit()
+    return {
+        "message": "File uploaded successfully",
+        "attachment_id": attachment.id,
+        "original_filename": attachment.original_filename,
+        "file_url": file_url
+    }
+
 # Get all attachments for a expense
 
 @router.get("/{expense_id}/attachments", response_model=list[dict])
@@ -172,12 +217,14 @@ def get_attachments(
     if not attachments:
         raise HTTPException(status_code=404, detail="No attachments found for this expense")
 
-    # Return attachment details (without needing to call S3)
+    # Return attachment details; variant URLs are signed locally and cached
     files_info = [
         {
             "attachment_id": attachment.id,
             "original_filename": attachment.original_filename,
             "file_url": attachment.file_url,
+            "thumbnail_url": storage.presigned_url(attachment.thumbnail_key) if attachment.thumbnail_key else None,
+            "preview_url": storage.presigned_url(attachment.preview_key) if attachment.preview_key else None,
             "can_delete": attachment.uploaded_by == current_user.id
         }
         for attachment in attachments
@@ -202,8 +249,8 @@ def get_attachment(
     if not attachment:
         raise HTTPException(status_code=404, detail="Attachment not found")
 
-    # Generate pre-signed URL from S3
-    presigned_url = generate_presigned_url(attachment.file_url.split("/")[-1])
+    # Generate pre-signed URL from storage
+    presigned_url = storage.presigned_url(storage.key_from_url(attachment.file_url))
 
     return {
         "attachment_id": attachment.id,
@@ -235,13 +282,16 @@ def delete_attachment(
         )
 
     try:
-        # Delete file from S3
-        delete_file_from_s3(attachment.file_url.split("/")[-1])
+        # Drop this attachment's reference to the stored file; once nothing
+        # else points at it the file is queued for the storage deleter
+        storagerepo.release(db, storage.key_from_url(attachment.file_url))
         
         # Delete from database
         db.delete(attachment)
+        syncrepo.touch(db, expense.group_id)
         db.commit()
     except Exception as e:
+        db.rollback()
         raise HTTPException(status_code=500, detail=f"Error deleting file: {str(e)}")
 
     return {"message": "Attachment deleted successfully"}
@@ -255,7 +305,7 @@ async def delete_expense(
 ):
     try:
         deleted = expenserepo.delete_expense(db, group_id, expense_id, current_user.id) 
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=200,
             content={"message": "Expense deleted"}
         )
@@ -273,7 +323,8 @@ async def list_group_expenses(
     created_by: Optional[UUID] = Query(None),
     min_amount: Optional[float] = Query(None, ge=0),
     max_amount: Optional[float] = Query(None, ge=0),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    cache_headers: Dict[str, str] = Depends(group_etag)
 ):
     """
     List all expenses in a group with optional filtering
@@ -292,7 +343,12 @@ async def list_group_expenses(
             max_amount=max_amount
         )
         
-        return expenses
+        # Already validated ExpenseResponse rows; skip the second
+        # validate/encode pass FastAPI would run for response_model
+        return ORJSONResponse(
+            content=[expense.model_dump() for expense in expenses],
+            headers=cache_headers
+        )
         
     except Exception as e:
         raise HTTPException(
@@ -315,11 +371,11 @@ def get_expense(
         expense = result["expense"]
         
         return {
-            "id": str(expense.id),
+            "id": expense.id,
             "title": expense.title,
             "description": expense.description,
             "total_amount": expense.total_amount,
-            "created_by": str(expense.created_by),
+            "created_by": expense.created_by,
             "created_at": expense.created_at,
             "split_type": expense.split_type.value,
             "can_edit": str(expense.created_by) == str(current_user.id),
@@ -368,13 +424,13 @@ def update_expense(
             update_data.dict(exclude_unset=True)
         )
         
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_200_OK,
             content={
                 "status": "success",
                 "message": "Expense updated",
                 "data": {
-                    "expense_id": str(updated_expense.id)
+                    "expense_id": updated_expense.id
                 }
             }
         )
@@ -387,7 +443,7 @@ def update_expense(
             detail=f"Error updating expense: {str(e)}"
         )
 
-@router.get("/group/{group_id}/settlements", response_model=SettlementsListResponse)
+@router.get("/group/{group_id}/settlements", response_model=SettlementsListResponse, dependencies=[Depends(group_etag)])
 def list_all_settlements(
     group_id: UUID,
     paid_by: Optional[UUID] = None,
@@ -432,7 +488,7 @@ def list_all_settlements(
             detail= f"Failed to retrieve settlements: {str(e)}"
         )
 
-@router.get("/group/{group_id}/settlement/{settlement_id}")
+@router.get("/group/{group_id}/settlement/{settlement_id}", dependencies=[Depends(group_etag)])
 def get_settlement(
     settlement_id: UUID,
     db: Session = Depends(get_db),
@@ -445,15 +501,15 @@ def get_settlement(
             db = db,
         )
         settlement_data = {
-            "id": str(settlement.id),
-            "paid_by": str(settlement.paid_by),
-            "paid_to": str(settlement.paid_to),
-            "amount": settlement.amount,
-            "settled_date": settlement.settled_at.isoformat(),
+            "id": settlement.id,
+            "paid_by": settlement.paid_by,
+            "paid_to": settlement.paid_to,
+            "amount": float(settlement.amount),
+            "settled_date": settlement.settled_at,
             "note": settlement.note,
             "can_edit" : str(settlement.paid_by) == str(current_user.id)
         }
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_200_OK,
             content={
                 "status": "Success",
@@ -480,7 +536,7 @@ def get_expense_splits(
     )
     return expense_splits
 
-@router.get("/group/{group_id}/user/{user_id}/splits")
+@router.get("/group/{group_id}/user/{user_id}/splits", dependencies=[Depends(group_etag)])
 async def get_user_splits_in_group(
     group_id: UUID,
     user_id: UserData = Depends(get_current_user),
@@ -1,18 +1,25 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, status, Depends, Response
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, status, Depends, Response, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.api.schemas.auth import UserData 
 from app.core.auth import get_current_user
 from app.core.database import get_db
 from app.helper.group_helper import grouphelper
+from app.helper.http_helper import group_etag
 from uuid import UUID
 from app.repository.group import grouprepo
 from app.models.group_models import GroupMember, GroupAttachment, AttachmentType, MembershipRole
-from app.api.schemas.group import AddMembersRequest, CreateGroupRequest, GroupResponse, JoinGroupRequestIn, ApproveJoinRequest
+from app.api.schemas.group import AddMembersRequest, CreateGroupRequest, GroupResponse, JoinGroupRequestIn, ApproveJoinRequest, GroupAttachmentUploadComplete, AttachmentUrlsRequest
+from app.api.schemas.attachments import AttachmentUploadInit, AttachmentUploadInitResponse
 from app.models.itineraries_model import ItineraryEntry
 from app.models.user_models import User
-from app.core.aws import upload_file_to_s3, delete_file_from_s3, generate_presigned_url
+from app.core.storage import storage
+from app.repository.storage import storagerepo
+from app.repository.search import searchrepo
+from app.repository.dashboard import dashboardrepo, DashboardLimits
+from app.api.schemas.search import SearchResponse
+from app.core.config import settings
 
 
 
@@ -40,13 +47,13 @@ async def create_group(
         )
         await grouprepo.add_group_members(db, db_group.id, request)
         
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_201_CREATED,
             content={
                 "status": "success",
                 "message": "Group created successfully",
                 "data": {
-                    "group_id": str(db_group.id),
+                    "group_id": db_group.id,
                     "name": db_group.name
                 }
             }
@@ -56,7 +63,7 @@ async def create_group(
         raise he
         
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={
                 "status": "error",
@@ -64,6 +71,8 @@ async def create_group(
             }
         )
 
+# No group_etag here: the admin's invite code expires (and is refreshed on
+# read) without any write to the group, so the version can't vouch for it
 @router.get("/{group_id}", status_code=status.HTTP_200_OK)
 async def get_group(
     group_id: UUID,
@@ -100,8 +109,8 @@ async def get_group(
             name=db_group.name,
             description=db_group.description,
             created_by=db_group.created_by,
-            created_at=db_group.created_at.isoformat() if db_group.created_at else None,
-            updated_at=db_group.updated_at.isoformat() if db_group.updated_at else None,
+            created_at=db_group.created_at,
+            updated_at=db_group.updated_at,
             secret_code=secret_code,
             is_current_user_admin=is_current_user_admin
         )
@@ -112,7 +121,7 @@ async def get_group(
         raise he
         
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={
                 "status": "error",
@@ -121,6 +130,40 @@ async def get_group(
         )
 
 
+@router.get("/{group_id}/dashboard")
+async def get_group_dashboard(
+    group_id: UUID,
+    members_limit: int = Query(100, ge=1, le=500),
+    expenses_limit: int = Query(20, ge=1, le=200),
+    polls_limit: int = Query(20, ge=1, le=200),
+    itinerary_limit: int = Query(50, ge=1, le=500),
+    attachments_limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: UserData = Depends(get_current_user)
+):
+    """
+    Everything needed to open a group in one round trip: group details,
+    members, expenses, the current user's balances, polls, itinerary and
+    attachments. Sections are loaded concurrently after a single membership
+    check. `timings_ms` reports how long each section took, and `errors`
+    lists sections that failed (their value is null).
+    """
+    if not grouprepo.is_user_group_member(db, group_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to access this group"
+        )
+
+    limits = DashboardLimits(
+        members=members_limit,
+        expenses=expenses_limit,
+        polls=polls_limit,
+        itinerary=itinerary_limit,
+        attachments=attachments_limit
+    )
+    return await dashboardrepo.get_dashboard(group_id, current_user.id, limits)
+
+
 @router.post("/{group_id}/members")
 async def add_members(
     group_id: UUID,
@@ -129,7 +172,7 @@ async def add_members(
 ):
     return await grouprepo.add_group_members(db, group_id, request)
 
-@router.get("/{group_id}/members")
+@router.get("/{group_id}/members", dependencies=[Depends(group_etag)])
 async def get_members(
     group_id: UUID,
     db: Session = Depends(get_db)
@@ -187,15 +230,15 @@ async def remove_group_member(
                     MembershipRole.ADMIN
                 )
 
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_200_OK,
             content={
                 "status": "success",
                 "message": "Member removed successfully",
                 "data": {
-                    "group_id": str(group_id),
-                    "removed_user_id": str(user_id),
-                    "new_admin_id": str(oldest_member.user_id) if removing_last_admin and oldest_member else None
+                    "group_id": group_id,
+                    "removed_user_id": user_id,
+                    "new_admin_id": oldest_member.user_id if removing_last_admin and oldest_member else None
                 }
             }
         )
@@ -211,7 +254,7 @@ async def remove_group_member(
 
 # List all the itenary that are created inside a group.
 
-@router.get("/{group_id}/itinerary-entries/")
+@router.get("/{group_id}/itinerary-entries/", dependencies=[Depends(group_etag)])
 def get_itinerary_entries_by_group(
     group_id: UUID,
     skip: int = 0,
@@ -241,6 +284,22 @@ def get_itinerary_entries_by_group(
         "creator_name": entry.creator_name
     } for entry in entries]
 
+@router.get("/{group_id}/search", response_model=SearchResponse, dependencies=[Depends(group_etag)])
+def search_group(
+    group_id: UUID,
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: UserData = Depends(get_current_user)
+):
+    """Ranked full-text search across the group's expenses, itinerary and polls"""
+    if not db.query(GroupMember).filter_by(group_id=group_id, user_id=current_user.id).first():
+        raise HTTPException(status_code=403, detail="You're not a member of this group")
+
+    results = searchrepo.search_group(db, group_id, q, skip=skip, limit=limit)
+    return {"query": q, "results": results, "skip": skip, "limit": limit}
+
 # attachments
 
 @router.post("/attachments", status_code=status.HTTP_201_CREATED)
@@ -251,9 +310,13 @@ async def upload_group_attachment(
     db: Session = Depends(get_db),
     current_user: UserData = Depends(get_current_user)
 ):
+    file_name, is_new = None, False
     try:
-        content = await file.read()
-        file_name, file_url = upload_file_to_s3(content, file.filename, file.content_type)
+        # Stream the upload in parts (media files can be hundreds of MB);
+        # content that is already stored is not uploaded again
+        file_name, file_url, is_new = await storagerepo.astore_file(
+            db, file.file, file.filename, file.content_type
+        )
 
         attachment = GroupAttachment(
             group_id=group_id,
@@ -267,9 +330,82 @@ async def upload_group_attachment(
         db.refresh(attachment)
         return {"message": "File uploaded successfully", "attachment_id": attachment.id}
     except Exception as e:
+        db.rollback()
+        if is_new:
+            storagerepo.purge_if_unreferenced(db, file_name)
         raise HTTPException(status_code=500, detail=f"Error while uploading attachments: {str(e)}")
 
 
+# Direct upload: the client posts the file to storage (S3) itself using the
+# presigned form returned by :init, then registers it with :complete.
+
+@router.post("/{group_id}/attachments:init", response_model=AttachmentUploadInitResponse)
+def init_group_attachment_upload(
+    group_id: UUID,
+    payload: AttachmentUploadInit,
+    db: Session = Depends(get_db),
+    current_user: UserData = Depends(get_current_user)
+):
+    if not grouprepo.is_user_group_member(db, group_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to access this group"
+        )
+    try:
+        file_name, presigned_post = storage.presigned_upload(
+            payload.filename,
+            payload.content_type,
+            owner_id=group_id,
+            max_size=settings.PRESIGNED_UPLOAD_MAX_BYTES,
+            expiration=settings.PRESIGNED_UPLOAD_EXPIRATION_SECONDS
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error preparing upload: {str(e)}")
+
+    return AttachmentUploadInitResponse(
+        key=file_name,
+        url=presigned_post["url"],
+        fields=presigned_post["fields"],
+        expires_in=settings.PRESIGNED_UPLOAD_EXPIRATION_SECONDS
+    )
+
+
+@router.post("/{group_id}/attachments:complete", status_code=status.HTTP_201_CREATED)
+def complete_group_attachment_upload(
+    group_id: UUID,
+    payload: GroupAttachmentUploadComplete,
+    db: Session = Depends(get_db),
+    current_user: UserData = Depends(get_current_user)
+):
+    if not grouprepo.is_user_group_member(db, group_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to access this group"
+        )
+    if db.query(GroupAttachment).filter(GroupAttachment.s3_key == payload.key).first():
+        raise HTTPException(status_code=409, detail="Attachment already registered")
+
+    try:
+        metadata = storage.verify_upload(payload.key, group_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error verifying upload: {str(e)}")
+    if not metadata:
+        raise HTTPException(status_code=400, detail="Uploaded file not found for this group")
+
+    attachment = GroupAttachment(
+        group_id=group_id,
+        uploaded_by=current_user.id,
+        original_filename=payload.filename,
+        file_url=storage.get_url(payload.key),
+        s3_key=payload.key,
+        attachment_type=payload.attachment_type
+    )
+    db.add(attachment)
+    db.commit()
+    db.refresh(attachment)
+    return {"message": "File uploaded successfully", "attachment_id": attachment.id}
+
+
 @router.get("/{group_id}/attachments")
 def list_attachments(
     group_id: UUID,
@@ -287,7 +423,9 @@ def list_attachments(
             "id": attachment.id,
             "filename": attachment.original_filename,
             "type": attachment.attachment_type,
-            "uploaded_at": attachment.uploaded_at
+            "uploaded_at": attachment.uploaded_at,
+            "thumbnail_url": storage.presigned_url(attachment.thumbnail_key) if attachment.thumbnail_key else None,
+            "preview_url": storage.presigned_url(attachment.preview_key) if attachment.preview_key else None
         } for attachment in attachments
     ]
 
@@ -303,8 +441,7 @@ def get_presigned_url_for_attachment(
         raise HTTPException(status_code=404, detail="Attachment not found")
 
     try:
-        s3_key = attachment.file_url.split("/")[-1]
-        presigned_url = generate_presigned_url(s3_key)
+        presigned_url = storage.presigned_url(attachment.s3_key)
         return {
             "filename": attachment.original_filename,
             "url": presigned_url
@@ -313,6 +450,41 @@ def get_presigned_url_for_attachment(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/{group_id}/attachments:urls")
+def get_presigned_urls_for_attachments(
+    group_id: UUID,
+    request: AttachmentUrlsRequest,
+    db: Session = Depends(get_db),
+    current_user: UserData = Depends(get_current_user)
+):
+    """Sign URLs for many group attachments in one call (e.g. a media gallery)"""
+    if not grouprepo.is_user_group_member(db, group_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to access this group"
+        )
+    if not request.attachment_ids:
+        return []
+
+    attachments = db.query(GroupAttachment).filter(
+        GroupAttachment.group_id == group_id,
+        GroupAttachment.id.in_(request.attachment_ids)
+    ).all()
+
+    try:
+        urls = storage.presigned_urls([attachment.s3_key for attachment in attachments])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return [
+        {
+            "id": attachment.id,
+            "filename": attachment.original_filename,
+            "url": urls[attachment.s3_key]
+        } for attachment in attachments
+    ]
+
+
 @router.delete("/attachments/{attachment_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_attachment(
     attachment_id: UUID,
@@ -323,11 +495,13 @@ def delete_attachment(
     if not attachment:
         raise HTTPException(status_code=404, detail="Attachment not found")
 
+    group_id = attachment.group_id
     try:
-        delete_file_from_s3(attachment.s3_key)
+        storagerepo.release(db, attachment.s3_key)
         db.delete(attachment)
         db.commit()
     except Exception as e:
+        db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/{group_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -370,7 +544,7 @@ def join_group_request(
             detail=f"Error while sending group join request: {str(e)}"
         )
 
-@router.get("/{group_id}/join-requests")
+@router.get("/{group_id}/join-requests", dependencies=[Depends(group_etag)])
 def get_join_requests(
     group_id: UUID,
     current_user: UserData = Depends(get_current_user),
@@ -1,18 +1,25 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, status, Depends
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, status, Depends, Request, Response
 from uuid import UUID
 from typing import Optional
 from app.core.database import get_db
 from sqlalchemy.orm import Session
 from app.core.auth import get_current_user
-from app.api.schemas.itineraries import ItineraryRequest, ItineraryEntryUpdate
+from app.api.schemas.itineraries import ItineraryRequest, ItineraryEntryUpdate, ItineraryPlanResponse, ItineraryBulkUpdateRequest, ItineraryBulkUpdateResponse
 from app.api.schemas.auth import UserData 
 from app.models.group_models import Group
-from app.models.itineraries_model import ItineraryEntry
+from app.models.itineraries_model import ItineraryEntry, ItineraryAttachment
+from app.models.group_models import GroupMember
+from app.api.schemas.attachments import AttachmentUploadInit, AttachmentUploadInitResponse, AttachmentUploadComplete
 from app.models.user_models import User
-from app.core.aws import s3_client
+from app.core.storage import storage
+from app.repository.storage import storagerepo
+from app.repository.itinerary import itineraryrepo
+from app.repository.activity import activityrepo
+from app.repository.sync import syncrepo
+from app.helper.http_helper import etag_matches
 from app.core.config import settings
 from botocore.exceptions import ClientError
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 
 router = APIRouter(prefix="/itineraries")
 
@@ -22,15 +29,7 @@ def itinerary(
     db: Session = Depends(get_db),
     current_user: UserData = Depends(get_current_user)
 ):
-    new_entry = ItineraryEntry(
-        title=entry_data.title,
-        description=entry_data.description,
-        day_number=entry_data.day_number,
-        google_maps_link=entry_data.google_maps_link,  # This will be None if not provided
-        group_id=entry_data.group_id,
-        created_by=current_user.id,
-        )
-    db.add(new_entry)
+    new_entry = itineraryrepo.add_entry(db, entry_data.group_id, current_user.id, entry_data)
     db.commit()
     db.refresh(new_entry)
 
@@ -64,6 +63,45 @@ def get_itinerary_entry(entry_id: UUID, db: Session = Depends(get_db)):
         "creator_name": entry_data.creator_name
     }
 
+@router.get("/groups/{group_id}/plan", response_model=ItineraryPlanResponse)
+def get_itinerary_plan(
+    group_id: UUID,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: UserData = Depends(get_current_user)
+):
+    """
+    The whole itinerary grouped by day, with everything needed to render it.
+    Send the returned ETag back as If-None-Match to get a 304 when nothing
+    has changed.
+    """
+    if not db.query(GroupMember).filter_by(group_id=group_id, user_id=current_user.id).first():
+        raise HTTPException(403, "You're not a member of this group")
+
+    plan, etag = itineraryrepo.get_group_plan(db, group_id)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return ORJSONResponse(content=plan, headers=headers)
+
+@router.patch("/groups/{group_id}/entries:bulk", response_model=ItineraryBulkUpdateResponse)
+def bulk_update_itinerary_entries(
+    group_id: UUID,
+    payload: ItineraryBulkUpdateRequest,
+    db: Session = Depends(get_db),
+    current_user: UserData = Depends(get_current_user)
+):
+    """
+    Reorder a trip in one request: sets day_number and position for many
+    entries at once. Each entry carries the version the client last saw;
+    if any of them changed in the meantime nothing is applied (409).
+    """
+    if not db.query(GroupMember).filter_by(group_id=group_id, user_id=current_user.id).first():
+        raise HTTPException(403, "You're not a member of this group")
+
+    updated = itineraryrepo.bulk_update_placements(db, group_id, payload.entries, current_user.id)
+    return {"updated": updated}
+
 @router.patch("/itinerary-entries/{entry_id}")
 def update_itinerary_entry(
     entry_id: UUID,
@@ -92,16 +130,7 @@ def update_itinerary_entry(
             detail="Not authorized to update this entry"
         )
     
-    # Update only the fields that were provided
-    if entry_data.title is not None:
-        entry.title = entry_data.title
-    if entry_data.description is not None:
-        entry.description = entry_data.description
-    if entry_data.day_number is not None:
-        entry.day_number = entry_data.day_number
-    if entry_data.google_maps_link is not None:
-        entry.google_maps_link = entry_data.google_maps_link
-    
+    itineraryrepo.update_entry(db, entry, entry_data, current_user.id)
     db.commit()
     db.refresh(entry)
     
@@ -136,7 +165,8 @@ def delete_itinerary_entry(
             detail="Not authorized to delete this entry"
         )
     
-    db.delete(entry)
+    group_id = entry.group_id
+    itineraryrepo.remove_entry(db, entry, current_user.id)
     db.commit()
     
     return "Itinerary deleted."
@@ -161,6 +191,10 @@ async def update_itinerary_location(
         raise HTTPException(404, "Entry not found or unauthorized")
     
     entry.google_maps_link = google_maps_link
+    activityrepo.record(
+        db, group_id, current_user.id, "itinerary.updated", entry.id, {"title": entry.title}
+    )
+    syncrepo.touch(db, group_id, entry)
     db.commit()
     return {"status": "Location updated"}
 
@@ -197,42 +231,53 @@ async def clear_itinerary_location(
     
     # 2. Clear location (set to None)
     entry.google_maps_link = None
+    activityrepo.record(
+        db, group_id, current_user.id, "itinerary.updated", entry.id, {"title": entry.title}
+    )
+    syncrepo.touch(db, group_id, entry)
     db.commit()
     
     return {"status": "Location cleared"}
 
-# Upload files to s3
+# Upload files to storage
 @router.post("/groups/{group_id}/itineraries/{itinerary_id}/file")
 def upload_file(
-    group_id: str,
-    itinerary_id: str,
+    group_id: UUID,
+    itinerary_id: UUID,
     file: UploadFile = File(...),
     current_user: UserData = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    entry = db.query(ItineraryEntry).filter_by(id=itinerary_id, group_id=group_id).first()
+    if not entry:
+        raise HTTPException(404, "Entry not found")
+
+    file_name, is_new = None, False
     try:
-        # Upload file to S3
-        s3_client.upload_fileobj(
-            file.file,
-            settings.S3_BUCKET_NAME,
-            file.filename,
-            ExtraArgs={
-                'ContentType': file.content_type
-            }
+        # Content-addressed: a file that is already stored is not uploaded again
+        file_name, file_url, is_new = storagerepo.store_file(
+            db, file.file, file.filename, file.content_type
         )
-        
-        # Verify the file exists in S3
-        s3_client.head_object(
-            Bucket=settings.S3_BUCKET_NAME,
-            Key=file.filename
+
+        attachment = ItineraryAttachment(
+            entry_id=entry.id,
+            original_filename=file.filename,
+            file_url=file_url,
+            file_type=(file.content_type or "")[:50] or None
         )
-                # Generate public URL (if bucket is public)
-        file_url = f"https://{settings.S3_BUCKET_NAME}.s3.{settings.AWS_DEFAULT_REGION}.amazonaws.com/{file.filename}"
-        
-        return JSONResponse(
+        db.add(attachment)
+        activityrepo.record(
+            db, group_id, current_user.id, "itinerary.attachment_added", entry.id,
+            {"title": entry.title, "filename": file.filename}
+        )
+        db.commit()
+        db.refresh(attachment)
+
+        return ORJSONResponse(
             status_code=200, 
             content={
                 "status": "success",
+                "attachment_id": attachment.id,
                 "filename": file.filename,
                 "content_type": file.content_type,
                 "s3_url": file_url,
@@ -242,12 +287,98 @@ def upload_file(
         )
         
     except ClientError as e:
+        db.rollback()
+        if is_new:
+            storagerepo.purge_if_unreferenced(db, file_name)
         raise HTTPException(
             status_code=500,
             detail=f"S3 Error: {str(e)}"
         )
     except Exception as e:
+        db.rollback()
+        if is_new:
+            storagerepo.purge_if_unreferenced(db, file_name)
         raise HTTPException(
             status_code=500,
             detail=f"Upload Error: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+# Direct upload: the client posts the file to storage (S3) itself using the
+# presigned form returned by file:init, then registers it with file:complete.
+
+@router.post("/groups/{group_id}/itineraries/{itinerary_id}/file:init", response_model=AttachmentUploadInitResponse)
+def init_itinerary_file_upload(
+    group_id: UUID,
+    itinerary_id: UUID,
+    payload: AttachmentUploadInit,
+    current_user: UserData = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    entry = db.query(ItineraryEntry).filter_by(id=itinerary_id, group_id=group_id).first()
+    if not entry:
+        raise HTTPException(404, "Entry not found")
+    if not db.query(GroupMember).filter_by(group_id=group_id, user_id=current_user.id).first():
+        raise HTTPException(403, "You're not a member of this group")
+
+    try:
+        file_name, presigned_post = storage.presigned_upload(
+            payload.filename,
+            payload.content_type,
+            owner_id=entry.id,
+            max_size=settings.PRESIGNED_UPLOAD_MAX_BYTES,
+            expiration=settings.PRESIGNED_UPLOAD_EXPIRATION_SECONDS
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error preparing upload: {str(e)}")
+
+    return AttachmentUploadInitResponse(
+        key=file_name,
+        url=presigned_post["url"],
+        fields=presigned_post["fields"],
+        expires_in=settings.PRESIGNED_UPLOAD_EXPIRATION_SECONDS
+    )
+
+@router.post("/groups/{group_id}/itineraries/{itinerary_id}/file:complete", status_code=status.HTTP_201_CREATED)
+def complete_itinerary_file_upload(
+    group_id: UUID,
+    itinerary_id: UUID,
+    payload: AttachmentUploadComplete,
+    current_user: UserData = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    entry = db.query(ItineraryEntry).filter_by(id=itinerary_id, group_id=group_id).first()
+    if not entry:
+        raise HTTPException(404, "Entry not found")
+    if not db.query(GroupMember).filter_by(group_id=group_id, user_id=current_user.id).first():
+        raise HTTPException(403, "You're not a member of this group")
+
+    file_url = storage.get_url(payload.key)
+    if db.query(ItineraryAttachment).filter_by(file_url=file_url).first():
+        raise HTTPException(409, "Attachment already registered")
+
+    try:
+        metadata = storage.verify_upload(payload.key, entry.id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error verifying upload: {str(e)}")
+    if not metadata:
+        raise HTTPException(400, "Uploaded file not found for this entry")
+
+    attachment = ItineraryAttachment(
+        entry_id=entry.id,
+        original_filename=payload.filename,
+        file_url=file_url,
+        file_type=(metadata["content_type"] or "")[:50] or None
+    )
+    db.add(attachment)
+    activityrepo.record(
+        db, group_id, current_user.id, "itinerary.attachment_added", entry.id,
+        {"title": entry.title, "filename": payload.filename}
+    )
+    db.commit()
+    db.refresh(attachment)
+    return {
+        "status": "success",
+        "attachment_id": attachment.id,
+        "filename": attachment.original_filename,
+        "file_url": file_url
+    }
@@ -3,7 +3,9 @@ from sqlalchemy.orm import Session
 from uuid import UUID
 from app.core.database import get_db
 from app.core.auth import get_current_user
+from app.helper.http_helper import group_etag
 from app.repository.poll import pollrepo
+from app.repository.group import grouprepo
 from logger import logger
 from app.api.schemas.poll import (
     Poll,
@@ -22,10 +24,12 @@ from app.api.schemas.poll import (
     UserVoteCreate,
     PollOptionWithCount,
     PollResponse, 
-    VotersResponse
+    VotersResponse,
+    ArchivedPollResponse
 )
 from app.api.schemas.auth import UserData
 from typing import List
+from datetime import datetime, timezone
 
 router = APIRouter(prefix="/polls")
 
@@ -97,7 +101,7 @@ def read_poll(
         )
 
 
-@router.get("/{group_id}/polls", response_model=List[PollResponse])
+@router.get("/{group_id}/polls", response_model=List[PollResponse], dependencies=[Depends(group_etag)])
 def read_group_polls(group_id: str,
     skip: int = 0,
     limit: int = 100,
@@ -107,6 +111,17 @@ def read_group_polls(group_id: str,
     polls = pollrepo.get_polls_by_group(db, group_id, current_user.id, skip=skip, limit=limit)
     return polls 
 
+@router.get("/{group_id}/archived-polls", response_model=List[ArchivedPollResponse], dependencies=[Depends(group_etag)])
+def read_group_archived_polls(group_id: UUID,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user: UserData = Depends(get_current_user)
+):
+    if not grouprepo.is_user_group_member(db, group_id, current_user.id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You're not a member of this group")
+    return pollrepo.get_archived_polls(db, group_id, skip=skip, limit=limit)
+
 @router.post("/vote", response_model=UserVote)
 def vote_poll(
     vote: UserVoteCreate,
@@ -117,7 +132,7 @@ def vote_poll(
     poll = pollrepo.get_poll_info(db, vote.poll_id)
     if not poll:
         raise HTTPException(status_code=404, detail="Poll not found")
-    if not poll.is_active:
+    if not poll.is_active or (poll.closes_at and poll.closes_at <= datetime.now(timezone.utc)):
         raise HTTPException(status_code=400, detail="Poll is not active")
     
     # Verify the option exists
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, status
+from app.core.storage import storage, SignedUrlStorageBackend
+
+# Serves signed URLs and upload forms for the local/memory storage backends,
+# standing in for S3 so attachment flows can run without AWS.
+router = APIRouter(prefix="/storage")
+
+def _signed_storage() -> SignedUrlStorageBackend:
+    if not isinstance(storage, SignedUrlStorageBackend):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    return storage
+
+@router.get("/files/{key}")
+def download_file(key: str, expires: int, signature: str):
+    backend = _signed_storage()
+    if not backend.verify_download(key, expires, signature):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired signature")
+    return backend.file_response(key)
+
+@router.post("/uploads", status_code=status.HTTP_204_NO_CONTENT)
+def upload_file(
+    key: str = Form(...),
+    content_type: str = Form(..., alias="Content-Type"),
+    owner_id: str = Form(..., alias="x-amz-meta-owner-id"),
+    max_size: str = Form(..., alias="max-size"),
+    expires: str = Form(...),
+    signature: str = Form(...),
+    file: UploadFile = File(...)
+):
+    backend = _signed_storage()
+    fields = {
+        "key": key,
+        "Content-Type": content_type,
+        "x-amz-meta-owner-id": owner_id,
+        "max-size": max_size,
+        "expires": expires,
+        "signature": signature,
+    }
+    if not backend.verify_upload_form(fields):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired signature")
+    if file.size is not None and not 0 < file.size <= int(max_size):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File size not allowed")
+
+    backend.save(file.file, file.filename, content_type, key=key, metadata={"owner-id": owner_id})
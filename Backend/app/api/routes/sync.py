@@ -0,0 +1,124 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import Optional
+from uuid import UUID
+from app.api.schemas.auth import UserData
+from app.api.schemas.sync import SyncResponse, SyncBatchRequest, SyncBatchResponse
+from app.core.auth import get_current_user
+from app.core.database import get_db
+from app.helper.http_helper import group_etag
+from app.models.expense_models import Expense, Settlement
+from app.models.group_models import GroupMember
+from app.models.itineraries_model import ItineraryEntry
+from app.repository.expense import expenserepo
+from app.repository.itinerary import itineraryrepo
+from app.repository.sync import syncrepo
+
+router = APIRouter(prefix="/group")
+
+@router.get("/{group_id}/sync", response_model=SyncResponse, dependencies=[Depends(group_etag)])
+def sync_group(
+    group_id: UUID,
+    since_version: Optional[int] = Query(None, ge=0),
+    db: Session = Depends(get_db),
+    current_user: UserData = Depends(get_current_user)
+):
+    """
+    Expenses, expense splits, settlements, itinerary entries and polls
+    created or changed after `since_version`, and tombstones for the ones
+    deleted since. Pass the returned `version` next time; omit it for a
+    full copy.
+    """
+    if not db.query(GroupMember).filter_by(group_id=group_id, user_id=current_user.id).first():
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You're not a member of this group")
+
+    return syncrepo.get_changes(db, group_id, since_version)
+
+@router.post("/{group_id}/sync", response_model=SyncBatchResponse)
+def apply_sync_batch(
+    group_id: UUID,
+    payload: SyncBatchRequest,
+    db: Session = Depends(get_db),
+    current_user: UserData = Depends(get_current_user)
+):
+    """
+    Apply writes queued while offline, in order and in one transaction:
+    either all of them are applied or none is. A failing operation aborts
+    the batch with its status code and its index in `detail`; 409 means it
+    conflicts with a change made in the meantime (sync, then retry).
+    Operations that were already applied (same id) are skipped, so a batch
+    whose response was lost can be sent again.
+    """
+    if not db.query(GroupMember).filter_by(group_id=group_id, user_id=current_user.id).first():
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You're not a member of this group")
+
+    results = []
+    try:
+        for index, operation in enumerate(payload.operations):
+            try:
+                applied = _apply_operation(db, group_id, current_user.id, operation)
+            except HTTPException as e:
+                raise HTTPException(
+                    status_code=e.status_code,
+                    detail={"index": index, "op": operation.op, "id": str(operation.id), "detail": e.detail}
+                )
+            results.append({"op": operation.op, "id": operation.id, "status": "applied" if applied else "skipped"})
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return {"results": results}
+
+def _apply_operation(db: Session, group_id: UUID, user_id: UUID, operation) -> bool:
+    """Apply one queued write. Returns whether it was applied (not already there)."""
+    if operation.op == "expense.create":
+        if _exists(db, Expense, operation.id, group_id):
+            return False
+        expenserepo.add_expense(db, group_id, user_id, operation.data, expense_id=operation.id)
+        return True
+
+    if operation.op == "expense.delete":
+        if not _exists(db, Expense, operation.id, group_id):
+            return False
+        expenserepo.remove_expense(db, group_id, operation.id, user_id)
+        return True
+
+    if operation.op == "settlement.create":
+        if _exists(db, Settlement, operation.id, group_id):
+            return False
+        if operation.data.paid_to == user_id:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User can't pay himself.")
+        expenserepo.add_settlement(
+            group_id, user_id, operation.data.paid_to, operation.data.amount, operation.data.note, db,
+            settlement_id=operation.id
+        )
+        return True
+
+    if operation.op == "itinerary.create":
+        if _exists(db, ItineraryEntry, operation.id, group_id):
+            return False
+        itineraryrepo.add_entry(db, group_id, user_id, operation.data, entry_id=operation.id)
+        return True
+
+    entry = db.query(ItineraryEntry).filter_by(id=operation.id, group_id=group_id).first()
+    if operation.op == "itinerary.delete" and entry is None:
+        return False
+    if entry is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Itinerary entry was deleted")
+    if entry.created_by != user_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to change this entry")
+    if operation.base_version is not None and entry.version != operation.base_version:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Itinerary entry was changed in the meantime")
+
+    if operation.op == "itinerary.update":
+        itineraryrepo.update_entry(db, entry, operation.data, user_id)
+    else:
+        itineraryrepo.remove_entry(db, entry, user_id)
+    return True
+
+def _exists(db: Session, model, row_id: UUID, group_id: UUID) -> bool:
+    row = db.query(model.group_id).filter(model.id == row_id).first()
+    if row is not None and row.group_id != group_id:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Id is already in use")
+    return row is not None
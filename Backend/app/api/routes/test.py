@@ -1,8 +1,7 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException, APIRouter
-from fastapi.responses import JSONResponse
-import boto3
+from fastapi.responses import ORJSONResponse
 from botocore.exceptions import ClientError
-from app.core.aws import s3_client
+from app.core.storage import storage
 from app.core.config import settings
 
 router = APIRouter()
@@ -17,26 +16,19 @@ def upload_file(
     Returns success/failure status with file details.
     """
     try:
-        # Upload file to S3
-        s3_client.upload_fileobj(
+        # Upload file to storage
+        file_name, file_url = storage.save(
             file.file,
-            settings.S3_BUCKET_NAME,
             file.filename,
-            ExtraArgs={
-                'ContentType': file.content_type
-            }
-        )
-        
-        # Verify the file exists in S3
-        s3_client.head_object(
-            Bucket=settings.S3_BUCKET_NAME,
-            Key=file.filename
+            file.content_type,
+            key=file.filename
         )
         
-        # Generate public URL (if bucket is public)
-        file_url = f"https://{settings.S3_BUCKET_NAME}.s3.{settings.AWS_DEFAULT_REGION}.amazonaws.com/{file.filename}"
+        # Verify the file exists in storage
+        if storage.get_metadata(file_name) is None:
+            raise Exception("Uploaded file not found in storage")
         
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=200,
             content={
                 "status": "success",
@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Depends,status
+from fastapi import APIRouter, Depends, Query, Response, status
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from uuid import UUID
 from app.core.database import get_db
 from app.core.auth import get_current_user
+from app.helper.http_helper import group_etag
 from app.repository.user import userrepo
+from app.repository.activity import activityrepo
 from app.api.schemas.auth import UserData
-from app.api.schemas.user import GroupOut
-from typing import List
+from app.api.schemas.user import GroupOut, ActivityEventOut
+from typing import List, Optional
 from app.models.group_models import GroupMember
 
 
@@ -23,7 +25,7 @@ def get_user_balances(
         db=db,
     )
 
-@router.get("/groups/{group_id}/balances")
+@router.get("/groups/{group_id}/balances", dependencies=[Depends(group_etag)])
 def get_user_net_balances_in_group(
     group_id: UUID,
     current_user: UserData = Depends(get_current_user),
@@ -40,36 +42,57 @@ def get_user_net_balances_in_group(
     return userrepo.get_user_net_balances_in_group(group_id, current_user.id, db)
 
 
-@router.get("/groups")
-async def get_user_groups(
+@router.get("/groups", response_model=List[GroupOut])
+def get_user_groups(
+    response: Response,
+    limit: int = Query(100, ge=1, le=200),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: UserData = Depends(get_current_user)
 ):
     """
-    Get all groups that the current user is a member of.
-    
+    Get the groups the current user is a member of, newest first.
+
     Returns:
-    - List of groups with the user's role in each group
+    - List of groups with the user's role, member count, last activity and
+      net balance in each
+    - When there are more, an X-Next-Cursor header to pass back as `cursor`
     """
-    # Query all group memberships for the current user
-    memberships =  userrepo.get_user_groups(user_id = current_user.id, db = db )
-    
-    
-    if not memberships:
-        return []
-    
-    # Prepare the response
-    groups_with_roles = []
-    for membership in memberships:
-        group_data = {
-            "id": membership.group.id,
-            "name": membership.group.name,
-            "description": membership.group.description,
-            "created_at": membership.group.created_at,
-            "role": membership.role.value
-        }
-        groups_with_roles.append(group_data)
-    
-    return groups_with_roles
-    
-    
\ No newline at end of file
+    groups, next_cursor = userrepo.get_user_groups(
+        user_id=current_user.id,
+        db=db,
+        limit=limit,
+        cursor=cursor
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return groups
+
+
+@router.get("/feed", response_model=List[ActivityEventOut])
+def get_user_feed(
+    response: Response,
+    since: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: UserData = Depends(get_current_user)
+):
+    """
+    Activity across the current user's groups (expenses, settlements, polls,
+    votes, new members, itinerary changes), oldest first.
+
+    Pass the X-Next-Cursor header of the previous response as `since` to get
+    only what happened after it; a page shorter than `limit` means the client
+    is caught up. Without `since` the feed starts at the oldest retained
+    event. 410 means the cursor has expired and the client should refetch
+    its lists.
+    """
+    events, next_cursor = activityrepo.get_feed(
+        db=db,
+        user_id=current_user.id,
+        since=since,
+        limit=limit
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return events
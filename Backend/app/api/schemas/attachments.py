@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+from typing import Dict, Optional
+from uuid import UUID
+
+class AttachmentUploadInit(BaseModel):
+    filename: str = Field(..., max_length=255)
+    content_type: Optional[str] = None
+
+class AttachmentUploadInitResponse(BaseModel):
+    key: str
+    url: str
+    fields: Dict[str, str]  # Form fields the client must send along with the file
+    expires_in: int
+
+class AttachmentUploadComplete(BaseModel):
+    key: str
+    filename: str = Field(..., max_length=255)
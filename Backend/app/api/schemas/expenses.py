@@ -33,6 +33,7 @@ class ExpenseUpdateRequest(BaseModel):
     title: str
     description: Optional[str] = None
     total_amount: float
+    splits: Optional[List[SplitCreate]] = None  # Custom split expenses only
 
 class SettlementCreate(BaseModel):
     group_id: UUID = Field(..., description="ID of the group for the settlement")
@@ -59,11 +60,6 @@ class SettlementResponse(BaseModel):
     note: Optional[str]
     can_delete: bool
 
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat() if v else None
-        }
-
 class SettlementsListResponse(BaseModel):
     status: str
     message: str
@@ -1,7 +1,8 @@
 from datetime import datetime
 from pydantic import BaseModel, UUID4
 from typing import Optional
-from app.models.group_models import MembershipRole
+from app.models.group_models import MembershipRole, AttachmentType
+from app.api.schemas.attachments import AttachmentUploadComplete
 from uuid import UUID
 from typing import List
 
@@ -51,4 +52,10 @@ class GroupJoinRequestOut(BaseModel):
 
 class ApproveJoinRequest(BaseModel):
     user_id: UUID
-    group_id: UUID
\ No newline at end of file
+    group_id: UUID
+
+class GroupAttachmentUploadComplete(AttachmentUploadComplete):
+    attachment_type: AttachmentType = AttachmentType.MEDIA
+
+class AttachmentUrlsRequest(BaseModel):
+    attachment_ids: List[UUID]
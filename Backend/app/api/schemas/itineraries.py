@@ -1,5 +1,5 @@
-from pydantic import BaseModel, constr, validator
-from typing import Optional
+from pydantic import BaseModel, Field, constr, field_validator, validator
+from typing import List, Optional
 from uuid import UUID
 
 class ItineraryRequest(BaseModel):
@@ -13,4 +13,52 @@ class ItineraryEntryUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     day_number: Optional[int] = None
-    google_maps_link: Optional[str] = None
\ No newline at end of file
+    position: Optional[int] = Field(None, ge=0)
+    google_maps_link: Optional[str] = None
+
+class ItineraryEntryPlacement(BaseModel):
+    id: UUID
+    version: int  # Version the client last saw; stale versions fail the whole batch
+    day_number: Optional[int]  # Required; null moves the entry to unscheduled
+    position: int = Field(..., ge=0)
+
+class ItineraryBulkUpdateRequest(BaseModel):
+    entries: List[ItineraryEntryPlacement] = Field(..., min_length=1, max_length=1000)
+
+    @field_validator("entries")
+    @classmethod
+    def unique_entries(cls, entries):
+        if len({entry.id for entry in entries}) != len(entries):
+            raise ValueError("Each entry may only appear once")
+        return entries
+
+class ItineraryEntryVersion(BaseModel):
+    id: UUID
+    version: int
+
+class ItineraryBulkUpdateResponse(BaseModel):
+    updated: List[ItineraryEntryVersion]
+
+class ItineraryPlanAttachment(BaseModel):
+    id: UUID
+    filename: Optional[str] = None
+    file_type: Optional[str] = None
+    file_url: str
+
+class ItineraryPlanEntry(BaseModel):
+    id: UUID
+    title: str
+    description: Optional[str] = None
+    google_maps_link: Optional[str] = None
+    position: int
+    version: int
+    creator_name: Optional[str] = None
+    attachments: List[ItineraryPlanAttachment]
+
+class ItineraryPlanDay(BaseModel):
+    day_number: Optional[int] = None  # None holds entries not scheduled on a day yet
+    entries: List[ItineraryPlanEntry]
+
+class ItineraryPlanResponse(BaseModel):
+    group_id: UUID
+    days: List[ItineraryPlanDay]
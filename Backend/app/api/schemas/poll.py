@@ -13,6 +13,7 @@ class PollBase(BaseModel):
     poll_type: PollType
     group_id: UUID
     is_active: bool = True
+    closes_at: Optional[datetime] = None  # Poll is closed automatically after this time
 
 class PollCreate(PollBase):
     options: List[str]
@@ -42,6 +43,7 @@ class PollResponse(BaseModel):
     group_id: UUID
     created_by: UUID
     is_active: bool
+    closes_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
     options: List[PollOptionResponse] = []
@@ -114,4 +116,24 @@ class PollResults(BaseModel):
     poll_type: PollType
     options: List[OptionResult]
     total_votes: int
-    all_voters: List[str]
\ No newline at end of file
+    all_voters: List[str]
+
+class ArchivedOptionResult(BaseModel):
+    option_id: UUID
+    text: str
+    vote_count: int
+
+class ArchivedPollResponse(BaseModel):
+    id: UUID
+    question: str
+    poll_type: str
+    group_id: UUID
+    created_by: Optional[UUID] = None
+    results: List[ArchivedOptionResult]
+    total_votes: int
+    created_at: Optional[datetime] = None
+    closed_at: Optional[datetime] = None
+    archived_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,15 @@
+from typing import List, Literal
+from pydantic import BaseModel
+from uuid import UUID
+
+class SearchResult(BaseModel):
+    type: Literal["expense", "itinerary_entry", "poll"]
+    id: UUID
+    title: str
+    rank: float
+
+class SearchResponse(BaseModel):
+    query: str
+    results: List[SearchResult]
+    skip: int
+    limit: int
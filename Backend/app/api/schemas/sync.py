@@ -0,0 +1,156 @@
+from pydantic import BaseModel, Field
+from typing import Annotated, List, Literal, Optional, Union
+from uuid import UUID
+from datetime import datetime
+from app.api.schemas.expenses import ExpenseCreate, SettlementCreate
+from app.api.schemas.itineraries import ItineraryRequest, ItineraryEntryUpdate
+from app.models.expense_models import SplitType
+
+class SyncExpense(BaseModel):
+    id: UUID
+    group_id: UUID
+    created_by: UUID
+    title: str
+    description: Optional[str] = None
+    total_amount: float
+    split_type: SplitType
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    sync_version: int
+
+    class Config:
+        from_attributes = True
+
+class SyncExpenseSplit(BaseModel):
+    id: UUID
+    expense_id: UUID
+    user_id: UUID
+    amount: float
+    updated_at: Optional[datetime] = None
+    sync_version: int
+
+    class Config:
+        from_attributes = True
+
+class SyncSettlement(BaseModel):
+    id: UUID
+    group_id: UUID
+    paid_by: UUID
+    paid_to: UUID
+    amount: float
+    note: Optional[str] = None
+    settled_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    sync_version: int
+
+    class Config:
+        from_attributes = True
+
+class SyncItineraryEntry(BaseModel):
+    id: UUID
+    group_id: UUID
+    created_by: UUID
+    title: str
+    description: Optional[str] = None
+    day_number: Optional[int] = None
+    position: int
+    version: int  # Pass back as `base_version` when updating offline
+    google_maps_link: Optional[str] = None
+    updated_at: Optional[datetime] = None
+    sync_version: int
+
+    class Config:
+        from_attributes = True
+
+class SyncPollOption(BaseModel):
+    id: UUID
+    text: str
+    vote_count: int
+
+class SyncPoll(BaseModel):
+    id: UUID
+    group_id: UUID
+    created_by: UUID
+    question: str
+    poll_type: str
+    is_active: Optional[bool] = None
+    closes_at: Optional[datetime] = None
+    closed_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    sync_version: int
+    options: List[SyncPollOption]
+
+class SyncTombstone(BaseModel):
+    entity_type: Literal["expense", "expense_split", "settlement", "itinerary_entry", "poll"]
+    entity_id: UUID
+    sync_version: int
+
+    class Config:
+        from_attributes = True
+
+class SyncResponse(BaseModel):
+    version: int  # Pass back as `since_version` on the next sync
+    full: bool  # True: replace the local copy; False: merge, then drop `deleted`
+    expenses: List[SyncExpense]
+    expense_splits: List[SyncExpenseSplit]
+    settlements: List[SyncSettlement]
+    itinerary_entries: List[SyncItineraryEntry]
+    polls: List[SyncPoll]
+    deleted: List[SyncTombstone]
+
+# Offline writes. Creates carry the id the client generated for the row, so
+# a batch that is sent twice does not create anything twice.
+
+class SyncExpenseCreateOp(BaseModel):
+    op: Literal["expense.create"]
+    id: UUID
+    data: ExpenseCreate
+
+class SyncExpenseDeleteOp(BaseModel):
+    op: Literal["expense.delete"]
+    id: UUID
+
+class SyncSettlementCreateOp(BaseModel):
+    op: Literal["settlement.create"]
+    id: UUID
+    data: SettlementCreate
+
+class SyncItineraryCreateOp(BaseModel):
+    op: Literal["itinerary.create"]
+    id: UUID
+    data: ItineraryRequest
+
+class SyncItineraryUpdateOp(BaseModel):
+    op: Literal["itinerary.update"]
+    id: UUID
+    base_version: int  # Entry version the client edited; 409 if it changed since
+    data: ItineraryEntryUpdate
+
+class SyncItineraryDeleteOp(BaseModel):
+    op: Literal["itinerary.delete"]
+    id: UUID
+    base_version: Optional[int] = None
+
+SyncOperation = Annotated[
+    Union[
+        SyncExpenseCreateOp,
+        SyncExpenseDeleteOp,
+        SyncSettlementCreateOp,
+        SyncItineraryCreateOp,
+        SyncItineraryUpdateOp,
+        SyncItineraryDeleteOp,
+    ],
+    Field(discriminator="op")
+]
+
+class SyncBatchRequest(BaseModel):
+    operations: List[SyncOperation] = Field(..., min_length=1, max_length=500)
+
+class SyncOperationResult(BaseModel):
+    op: str
+    id: UUID
+    status: Literal["applied", "skipped"]  # skipped: already applied, or already deleted
+
+class SyncBatchResponse(BaseModel):
+    results: List[SyncOperationResult]
@@ -2,7 +2,7 @@
 from pydantic import BaseModel
 from uuid import UUID
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, Optional
 
 class GroupOut(BaseModel):
     id: UUID
@@ -10,6 +10,22 @@ class GroupOut(BaseModel):
     description: Optional[str]
     created_at: datetime
     role: str  # The user's role in this group
+    member_count: int = 0
+    last_activity_at: Optional[datetime] = None
+    net_balance: float = 0.0  # Positive = others owe the user
     
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+
+class ActivityEventOut(BaseModel):
+    id: int
+    group_id: UUID
+    actor_id: Optional[UUID]
+    event_type: str
+    entity_id: Optional[UUID]
+    payload: Optional[Dict[str, Any]]
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
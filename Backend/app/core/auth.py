@@ -46,4 +46,11 @@ async def get_current_user(
 
         
     except JWTError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
\ No newline at end of file
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+
+async def get_admin_user(current_user: UserData = Depends(get_current_user)) -> UserData:
+    """Current user, if listed in ADMIN_EMAILS"""
+    if current_user.email not in settings.ADMIN_EMAILS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
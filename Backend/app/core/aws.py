@@ -1,12 +1,15 @@
 import boto3
-import uuid
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from app.core.config import settings
+from app.core.cache import presigned_url_cache
+from app.helper.storage_helper import build_file_key
 from botocore.exceptions import NoCredentialsError, ClientError
 
 AWS_ACCESS_KEY_ID = settings.AWS_ACCESS_KEY_ID
 AWS_SECRET_ACCESS_KEY = settings.AWS_SECRET_ACCESS_KEY
 AWS_DEFAULT_REGION = settings.AWS_DEFAULT_REGION
 S3_BUCKET_NAME = settings.S3_BUCKET_NAME
+S3_DELETE_BATCH_SIZE = 1000
 
 
 s3_client = boto3.client(
@@ -16,36 +19,205 @@ s3_client = boto3.client(
     region_name=AWS_DEFAULT_REGION
 )
 
+def get_file_url(file_name):
+    return f"https://{S3_BUCKET_NAME}.s3.amazonaws.com/{file_name}"
+
 # Upload file to S3 and return URL
 def upload_file_to_s3(file_content, original_filename, content_type):
     try:
-        file_name = f"{uuid.uuid4()}_{original_filename}"  # Store original name as part of the file key
+        file_name = build_file_key(original_filename)
         s3_client.put_object(
             Bucket=S3_BUCKET_NAME,
             Key=file_name,
             Body=file_content,
             ContentType=content_type
         )
-        file_url = f"https://{S3_BUCKET_NAME}.s3.amazonaws.com/{file_name}"
+        file_url = get_file_url(file_name)
         return file_name, file_url
     except ClientError as e:
         raise Exception(f"Error uploading file: {str(e)}")
 
+# S3 rejects multipart parts smaller than 5 MiB (except the last one)
+MIN_MULTIPART_PART_SIZE = 5 * 1024 * 1024
+
+def _upload_part(client, bucket, file_name, upload_id, part_number, chunk):
+    response = client.upload_part(
+        Bucket=bucket,
+        Key=file_name,
+        UploadId=upload_id,
+        PartNumber=part_number,
+        Body=chunk
+    )
+    return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+# Stream a file-like object to S3 without loading it into memory.
+# Files smaller than one part go up with a single PUT; larger ones use a
+# multipart upload with up to `max_concurrency` parts in flight, so memory
+# stays around (max_concurrency + 1) * part_size whatever the file size.
+# `client`/`bucket` can be overridden, e.g. with a moto-backed client.
+def upload_stream_to_s3(
+    fileobj,
+    original_filename,
+    content_type,
+    part_size=None,
+    max_concurrency=None,
+    client=None,
+    bucket=None,
+    file_name=None,
+    metadata=None
+):
+    client = client or s3_client
+    bucket = bucket or S3_BUCKET_NAME
+    extra_args = {"Metadata": metadata} if metadata else {}
+    part_size = max(part_size or settings.S3_MULTIPART_PART_SIZE, MIN_MULTIPART_PART_SIZE)
+    max_concurrency = max(max_concurrency or settings.S3_MULTIPART_CONCURRENCY, 1)
+    content_type = content_type or "application/octet-stream"
+    file_name = file_name or build_file_key(original_filename)
+
+    chunk = fileobj.read(part_size)
+    if len(chunk) < part_size:
+        try:
+            client.put_object(Bucket=bucket, Key=file_name, Body=chunk, ContentType=content_type, **extra_args)
+            return file_name, get_file_url(file_name)
+        except ClientError as e:
+            raise Exception(f"Error uploading file: {str(e)}")
+
+    try:
+        upload_id = client.create_multipart_upload(
+            Bucket=bucket,
+            Key=file_name,
+            ContentType=content_type,
+            **extra_args
+        )["UploadId"]
+    except ClientError as e:
+        raise Exception(f"Error uploading file: {str(e)}")
+
+    parts = []
+    try:
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="s3-part") as pool:
+            in_flight = set()
+            part_number = 1
+            while chunk:
+                if len(in_flight) >= max_concurrency:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    parts.extend(future.result() for future in done)
+                in_flight.add(pool.submit(
+                    _upload_part, client, bucket, file_name, upload_id, part_number, chunk
+                ))
+                part_number += 1
+                chunk = fileobj.read(part_size)
+            parts.extend(future.result() for future in wait(in_flight).done)
+
+        client.complete_multipart_upload(
+            Bucket=bucket,
+            Key=file_name,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": sorted(parts, key=lambda part: part["PartNumber"])}
+        )
+        return file_name, get_file_url(file_name)
+    except Exception as e:
+        try:
+            client.abort_multipart_upload(Bucket=bucket, Key=file_name, UploadId=upload_id)
+        except ClientError:
+            pass
+        raise Exception(f"Error uploading file: {str(e)}")
+
 # Delete file from S3
 def delete_file_from_s3(file_name):
     try:
         s3_client.delete_object(Bucket=S3_BUCKET_NAME, Key=file_name)
+        presigned_url_cache.delete_where(lambda key: key[0] == file_name)
     except ClientError as e:
         raise Exception(f"Error deleting file: {str(e)}")
 
-# Generate a pre-signed URL for file access
+# Delete many files with DeleteObjects, 1000 keys per request (the S3 limit).
+# Returns {key: error message} for the keys that could not be deleted.
+def delete_files_from_s3(file_names, client=s3_client, bucket=S3_BUCKET_NAME):
+    errors = {}
+    file_names = list(file_names)
+    for start in range(0, len(file_names), S3_DELETE_BATCH_SIZE):
+        batch = file_names[start:start + S3_DELETE_BATCH_SIZE]
+        try:
+            response = client.delete_objects(
+                Bucket=bucket,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True}
+            )
+        except ClientError as e:
+            errors.update({key: str(e) for key in batch})
+            continue
+        for error in response.get("Errors", []):
+            errors[error["Key"]] = f"{error.get('Code')}: {error.get('Message')}"
+
+    deleted = set(file_names) - set(errors)
+    presigned_url_cache.delete_where(lambda key: key[0] in deleted)
+    return errors
+
+# Generate a pre-signed URL for file access.
+# URLs are cached per key and handed out again until
+# PRESIGNED_URL_REFRESH_MARGIN_SECONDS before they expire, so a client
+# never receives a URL that is about to stop working.
 def generate_presigned_url(file_name, expiration=3600):
+    cache_key = (file_name, expiration)
+    cached_url = presigned_url_cache.get(cache_key)
+    if cached_url:
+        return cached_url
     try:
         response = s3_client.generate_presigned_url(
             'get_object',
             Params={'Bucket': S3_BUCKET_NAME, 'Key': file_name},
             ExpiresIn=expiration
         )
-        return response
     except ClientError as e:
-        raise Exception(f"Error generating pre-signed URL: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Error generating pre-signed URL: {str(e)}")
+
+    ttl = expiration - settings.PRESIGNED_URL_REFRESH_MARGIN_SECONDS
+    if ttl > 0:
+        presigned_url_cache.set(cache_key, response, ttl)
+    return response
+
+def generate_presigned_urls(file_names, expiration=3600):
+    """Sign many keys at once; returns {file_name: url}"""
+    return {file_name: generate_presigned_url(file_name, expiration) for file_name in file_names}
+
+# Generate a pre-signed POST so the client uploads straight to S3.
+# `owner_id` is pinned as object metadata so the completion step can check
+# the object was uploaded for the same expense/group/itinerary entry.
+def generate_presigned_upload(original_filename, content_type, owner_id, max_size, expiration=900):
+    try:
+        file_name = build_file_key(original_filename)
+        content_type = content_type or "application/octet-stream"
+        presigned_post = s3_client.generate_presigned_post(
+            Bucket=S3_BUCKET_NAME,
+            Key=file_name,
+            Fields={
+                "Content-Type": content_type,
+                "x-amz-meta-owner-id": str(owner_id)
+            },
+            Conditions=[
+                {"Content-Type": content_type},
+                {"x-amz-meta-owner-id": str(owner_id)},
+                ["content-length-range", 1, max_size]
+            ],
+            ExpiresIn=expiration
+        )
+        return file_name, presigned_post
+    except ClientError as e:
+        raise Exception(f"Error generating pre-signed upload: {str(e)}")
+
+# Fetch object metadata, None if the object does not exist
+def get_file_metadata(file_name):
+    try:
+        return s3_client.head_object(Bucket=S3_BUCKET_NAME, Key=file_name)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return None
+        raise Exception(f"Error reading file metadata: {str(e)}")
+
+def verify_uploaded_file(file_name, owner_id):
+    """Return the object's metadata if it exists and was uploaded for `owner_id`"""
+    metadata = get_file_metadata(file_name)
+    if metadata is None:
+        return None
+    if metadata.get("Metadata", {}).get("owner-id") != str(owner_id):
+        return None
+    return metadata
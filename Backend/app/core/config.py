@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import AnyUrl, PostgresDsn, Field
-from typing import Optional
+from typing import Dict, List, Optional
 
 class Settings(BaseSettings):
     # Database Settings
@@ -21,6 +21,76 @@ class Settings(BaseSettings):
     AWS_DEFAULT_REGION:str
     S3_BUCKET_NAME:str
     S3_ENDPOINT_URL:str
+
+    # Attachment storage: "s3", "local" (UPLOAD_FOLDER) or "memory"
+    STORAGE_BACKEND: str = "s3"
+    STORAGE_PUBLIC_BASE_URL: str = ""  # Prefix for URLs served by the local/memory backends
+
+    # Max parallel S3 transfers per worker
+    S3_UPLOAD_CONCURRENCY: int = 8
+
+    # Streaming multipart uploads
+    S3_MULTIPART_PART_SIZE: int = 8 * 1024 * 1024
+    S3_MULTIPART_CONCURRENCY: int = 4
+
+    # Presigned GET URLs are reused until this long before they expire
+    PRESIGNED_URL_REFRESH_MARGIN_SECONDS: int = 600
+
+    # Direct-to-S3 uploads
+    PRESIGNED_UPLOAD_MAX_BYTES: int = 500 * 1024 * 1024
+    PRESIGNED_UPLOAD_EXPIRATION_SECONDS: int = 900
+
+    # Thumbnail / preview generation for image attachments
+    THUMBNAIL_POLL_INTERVAL_SECONDS: int = 5
+    THUMBNAIL_BATCH_SIZE: int = 20
+    THUMBNAIL_WORKERS: int = 2
+    THUMBNAIL_MAX_SOURCE_BYTES: int = 40 * 1024 * 1024
+
+    # Storage deletion outbox
+    STORAGE_DELETE_INTERVAL_SECONDS: int = 10
+    STORAGE_DELETE_BATCH_SIZE: int = 1000
+    STORAGE_DELETE_RETRY_BASE_SECONDS: int = 30
+    STORAGE_DELETE_RETRY_MAX_SECONDS: int = 3600
+
+    # Logging: records go through a bounded queue to a background writer;
+    # when the queue is full they are dropped rather than blocking requests
+    LOG_LEVEL: str = "INFO"
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_SAMPLE_RATES: Dict[str, float] = {}  # e.g. {"DEBUG": 0.01, "INFO": 0.5}; unlisted levels keep everything
+
+    # Requests slower than this are logged with their timing
+    SLOW_REQUEST_LOG_MS: int = 1000
+
+    # Emails of users allowed to use the /admin endpoints
+    ADMIN_EMAILS: List[str] = []
+
+    # Request profiling: a sampled fraction of requests, plus any request
+    # carrying a signed X-Profile header (see POST /admin/profiles/token)
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_INTERVAL: float = 0.001
+    PROFILE_MAX_CONCURRENT: int = 2
+    PROFILE_DIR: str = "/tmp/tripsquad-profiles"
+    PROFILE_MAX_STORED: int = 200
+
+    # Response compression: brotli or gzip as the client accepts (brotli
+    # needs the Brotli package). Single-chunk bodies under the minimum size
+    # are sent as-is; streamed bodies are always compressed.
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # Group dashboard: sections run concurrently, each on its own DB session
+    DASHBOARD_WORKERS: int = 8
+
+    # Poll sweeper
+    POLL_SWEEP_INTERVAL_SECONDS: int = 60
+    POLL_SWEEP_BATCH_SIZE: int = 500
+    POLL_ARCHIVE_AFTER_DAYS: int = 30
+
+    # Activity feed outbox (activity_events)
+    ACTIVITY_RETENTION_DAYS: int = 30
+    ACTIVITY_COMPACT_INTERVAL_SECONDS: int = 3600
+    ACTIVITY_COMPACT_BATCH_SIZE: int = 5000
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,74 @@
+import contextvars
+import os
+import time
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, REGISTRY, generate_latest
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from app.core.database import engine
+
+# With PROMETHEUS_MULTIPROC_DIR set (one directory shared by all workers,
+# emptied before start) every worker writes its samples there and
+# /metrics aggregates them; otherwise metrics live in this process.
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+RATIO_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+SIZE_BUCKETS = tuple(256 * 4 ** i for i in range(10))  # 256 B .. 64 MiB
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency by route",
+    ["method", "route"], buckets=LATENCY_BUCKETS
+)
+REQUESTS = Counter(
+    "http_requests_total", "Requests by route and status",
+    ["method", "route", "status"]
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requests being handled",
+    ["method"], multiprocess_mode="livesum"
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds", "Time spent in database calls per request",
+    ["method", "route"], buckets=LATENCY_BUCKETS
+)
+REQUEST_DB_SHARE = Histogram(
+    "http_request_db_time_ratio", "Share of request latency spent in database calls",
+    ["method", "route"], buckets=RATIO_BUCKETS
+)
+REQUEST_SIZE = Histogram(
+    "http_request_size_bytes", "Request body size",
+    ["method", "route"], buckets=SIZE_BUCKETS
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "Response body size",
+    ["method", "route"], buckets=SIZE_BUCKETS
+)
+
+# Set by MetricsMiddleware to a one-element list that the engine hooks
+# below add query time to. Threadpool routes run in a copy of the request
+# context, so they see the same list.
+db_time_var: contextvars.ContextVar = contextvars.ContextVar("db_time", default=None)
+
+@event.listens_for(engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+@event.listens_for(engine, "after_cursor_execute")
+def _stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    started_at = conn.info["query_started_at"].pop()
+    db_time = db_time_var.get()
+    if db_time is not None:
+        db_time[0] += time.perf_counter() - started_at
+
+def render_metrics() -> bytes:
+    """Prometheus text exposition of all metrics"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges from the shared directory on shutdown"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,247 @@
+import asyncio
+import time
+import uuid
+from starlette.datastructures import Headers, MutableHeaders
+from app.core import metrics, profiling
+from app.core.config import settings
+from app.helper import compression_helper
+from logger import logger, request_id_var
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+
+class RequestIdMiddleware:
+    """
+    Gives every request an id (the client's X-Request-ID if it sent a sane
+    one) so all log lines written while handling it can be correlated. The
+    id is echoed back in the X-Request-ID response header.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = dict(scope["headers"]).get(REQUEST_ID_HEADER, b"").decode("latin-1")
+        if not request_id or len(request_id) > 128:
+            request_id = uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (REQUEST_ID_HEADER, request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
+
+
+class MetricsMiddleware:
+    """
+    Records per-route latency, status counts, in-flight requests, database
+    time and payload sizes (see app/core/metrics.py). Routes are labelled
+    by their path template, so /group/{group_id} is one series.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        status_code = 500
+        request_bytes = 0
+        response_bytes = 0
+
+        async def receive_counting():
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def send_counting(message):
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        db_time = [0.0]
+        token = metrics.db_time_var.set(db_time)
+        metrics.REQUESTS_IN_FLIGHT.labels(method).inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive_counting, send_counting)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.REQUESTS_IN_FLIGHT.labels(method).dec()
+            metrics.db_time_var.reset(token)
+
+            route = scope.get("route")
+            # Unmatched paths (404s, scanners) share one series
+            template = getattr(route, "path", None) or "unmatched"
+            metrics.REQUEST_LATENCY.labels(method, template).observe(elapsed)
+            metrics.REQUESTS.labels(method, template, str(status_code)).inc()
+            metrics.REQUEST_DB_TIME.labels(method, template).observe(db_time[0])
+            metrics.REQUEST_DB_SHARE.labels(method, template).observe(
+                min(db_time[0] / elapsed, 1.0) if elapsed > 0 else 0.0
+            )
+            metrics.REQUEST_SIZE.labels(method, template).observe(request_bytes)
+            metrics.RESPONSE_SIZE.labels(method, template).observe(response_bytes)
+
+            if elapsed * 1000 >= settings.SLOW_REQUEST_LOG_MS:
+                logger.log_message(
+                    "WARN",
+                    "Slow request",
+                    {"source": template, "data": {
+                        "method": method,
+                        "status": status_code,
+                        "db_ms": round(db_time[0] * 1000, 1)
+                    }},
+                    time_taken=f"{elapsed * 1000:.1f}ms"
+                )
+
+
+class ProfilerMiddleware:
+    """
+    Profiles sampled requests and requests carrying a signed X-Profile
+    header, and stores the result in the profile ring buffer. The profile id
+    is returned in the X-Profile-Id response header. Other requests only pay
+    for the sampling check.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not profiling.should_profile(scope):
+            return await self.app(scope, receive, send)
+
+        profiler = profiling.RequestProfiler()
+        if not profiler.start():
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+
+        async def send_with_profile_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", profiler.id.encode("latin-1"))
+                ]
+            await send(message)
+
+        token = profiling.active_profiler_var.set(profiler)
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiling.active_profiler_var.reset(token)
+            profiler.stop()
+            route = scope.get("route")
+            metadata = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(route, "path", None),
+                "status": status_code,
+                "duration_ms": round(profiler.duration * 1000, 2),
+                "request_id": request_id_var.get(),
+                "created_at": time.time(),
+            }
+            try:
+                await asyncio.to_thread(profiling.profile_store.save, profiler, metadata)
+            except Exception as e:
+                logger.log_message("ERROR", f"Failed to store profile {profiler.id}: {str(e)}")
+
+
+class CompressionMiddleware:
+    """
+    Brotli/gzip response compression negotiated from Accept-Encoding.
+
+    The decision is made on the first body chunk: responses that are not a
+    compressible type, already encoded, or a single chunk smaller than
+    `minimum_size` pass through untouched. Streamed responses are compressed
+    chunk by chunk and flushed after each one, so clients can decode every
+    chunk as soon as it arrives instead of waiting for the stream to end.
+    """
+
+    def __init__(self, app, minimum_size=None, gzip_level=None, brotli_quality=None) -> None:
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MINIMUM_SIZE if minimum_size is None else minimum_size
+        self.gzip_level = settings.COMPRESSION_GZIP_LEVEL if gzip_level is None else gzip_level
+        self.brotli_quality = settings.COMPRESSION_BROTLI_QUALITY if brotli_quality is None else brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        encoding = compression_helper.negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start_message = None
+        encoder = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, encoder, passthrough
+            if passthrough:
+                return await send(message)
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            if encoder is None:
+                headers = MutableHeaders(raw=list(start_message.get("headers", [])))
+                start_message["headers"] = headers.raw
+                body = message.get("body", b"")
+                more_body = message.get("more_body", False)
+                # Anything but a body (e.g. zero-copy file sends) goes out as-is
+                if (
+                    message["type"] != "http.response.body"
+                    or start_message["status"] in (204, 206, 304)
+                    or "content-encoding" in headers
+                    or not compression_helper.is_compressible(headers.get("content-type"))
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start_message)
+                    return await send(message)
+
+                encoder = compression_helper.create_encoder(encoding, self.gzip_level, self.brotli_quality)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                # The encoded body is a different representation, so a strong
+                # validator no longer holds; weak comparison still matches it
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+                if more_body:
+                    del headers["Content-Length"]
+                    data = encoder.compress(body) + encoder.flush()
+                else:
+                    data = encoder.compress(body) + encoder.finish()
+                    headers["Content-Length"] = str(len(data))
+                await send(start_message)
+                return await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if more_body:
+                data = encoder.compress(body) + encoder.flush() if body else b""
+            else:
+                data = encoder.compress(body) + encoder.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,212 @@
+import contextvars
+import hashlib
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from app.core.config import settings
+from app.core.database import engine
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_RE = re.compile(r"^[0-9]+-[0-9a-f]{8}$")
+
+# The profiler of the request being handled, if it is profiled
+active_profiler_var: contextvars.ContextVar = contextvars.ContextVar("active_profiler", default=None)
+
+_active_count = 0
+_active_lock = threading.Lock()
+
+
+def _sign(expires: int) -> str:
+    message = f"profile|{expires}".encode("utf-8")
+    return hmac.new(settings.JWT_SECRET_KEY.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+def create_profile_token(ttl_seconds: int) -> str:
+    """Value for the X-Profile request header, valid for `ttl_seconds`"""
+    expires = int(time.time()) + ttl_seconds
+    return f"{expires}.{_sign(expires)}"
+
+def verify_profile_token(token: str) -> bool:
+    try:
+        expires, signature = token.split(".", 1)
+        expires = int(expires)
+    except ValueError:
+        return False
+    return expires >= time.time() and hmac.compare_digest(_sign(expires), signature)
+
+def should_profile(scope) -> bool:
+    """Sampled requests and requests with a valid signed X-Profile header"""
+    if settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE:
+        return True
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return verify_profile_token(value.decode("latin-1"))
+    return False
+
+
+class RequestProfiler:
+    """
+    Statistical profiler for one request. A sampler thread snapshots the
+    stacks of the threads working on the request every PROFILE_INTERVAL
+    seconds: the event loop thread, plus any threadpool thread the request
+    runs database queries on (sync routes run in the threadpool, where
+    pyinstrument and cProfile can't see them).
+    """
+
+    def __init__(self) -> None:
+        self.id = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        self.threads: Dict[int, str] = {}
+        self.samples: List[tuple] = []  # (thread id, stack, seconds)
+        self.started_at = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def start(self) -> bool:
+        global _active_count
+        with _active_lock:
+            if _active_count >= settings.PROFILE_MAX_CONCURRENT:
+                return False
+            _active_count += 1
+        self.add_thread(threading.get_ident())
+        self.started_at = time.perf_counter()
+        self._sampler = threading.Thread(target=self._run, name=f"profiler-{self.id}", daemon=True)
+        self._sampler.start()
+        return True
+
+    def stop(self) -> None:
+        global _active_count
+        self._stop.set()
+        self._sampler.join()
+        self.duration = time.perf_counter() - self.started_at
+        with _active_lock:
+            _active_count -= 1
+
+    def add_thread(self, thread_id: int) -> None:
+        if thread_id not in self.threads:
+            self.threads[thread_id] = threading.current_thread().name
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(settings.PROFILE_INTERVAL):
+            now = time.perf_counter()
+            frames = sys._current_frames()
+            for thread_id in list(self.threads):
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    self.samples.append((thread_id, self._stack(frame), now - last))
+            last = now
+
+    @staticmethod
+    def _stack(frame) -> tuple:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_qualname, code.co_filename, code.co_firstlineno))
+            frame = frame.f_back
+        stack.reverse()  # root first
+        return tuple(stack)
+
+    def to_speedscope(self, name: str) -> dict:
+        """The samples in speedscope's file format (https://www.speedscope.app)"""
+        frames, frame_index = [], {}
+        profiles = {}
+        for thread_id, stack, weight in self.samples:
+            indexes = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                indexes.append(frame_index[frame])
+            profile = profiles.setdefault(thread_id, {
+                "type": "sampled",
+                "name": self.threads[thread_id],
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": self.duration,
+                "samples": [],
+                "weights": [],
+            })
+            profile["samples"].append(indexes)
+            profile["weights"].append(weight)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "tripsquad",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": list(profiles.values()),
+        }
+
+# Queries tell the profiler which threadpool thread the request runs on
+@event.listens_for(engine, "before_cursor_execute")
+def _register_query_thread(conn, cursor, statement, parameters, context, executemany):
+    profiler = active_profiler_var.get()
+    if profiler is not None:
+        profiler.add_thread(threading.get_ident())
+
+
+class ProfileStore:
+    """Ring buffer of the last `max_profiles` profiles on disk"""
+
+    def __init__(self, directory: str, max_profiles: int) -> None:
+        self.directory = directory
+        self.max_profiles = max_profiles
+
+    def _profile_path(self, profile_id: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.speedscope.json")
+
+    def _meta_path(self, profile_id: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.meta.json")
+
+    def save(self, profiler: RequestProfiler, metadata: dict) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{metadata['method']} {metadata['path']}"
+        with open(self._profile_path(profiler.id), "w") as out:
+            json.dump(profiler.to_speedscope(name), out)
+        with open(self._meta_path(profiler.id), "w") as out:
+            json.dump({**metadata, "id": profiler.id, "samples": len(profiler.samples)}, out)
+        for profile_id in self._ids()[self.max_profiles:]:
+            self.delete(profile_id)
+
+    def _ids(self) -> List[str]:
+        """Stored profile ids, newest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        ids = [
+            name[:-len(".meta.json")] for name in os.listdir(self.directory)
+            if name.endswith(".meta.json")
+        ]
+        return sorted(ids, key=lambda profile_id: int(profile_id.split("-")[0]), reverse=True)
+
+    def list(self) -> List[dict]:
+        profiles = []
+        for profile_id in self._ids():
+            try:
+                with open(self._meta_path(profile_id)) as meta:
+                    profiles.append(json.load(meta))
+            except (FileNotFoundError, ValueError):
+                continue
+        return profiles
+
+    def path(self, profile_id: str) -> Optional[str]:
+        if not PROFILE_ID_RE.match(profile_id):
+            return None
+        path = self._profile_path(profile_id)
+        return path if os.path.exists(path) else None
+
+    def delete(self, profile_id: str) -> None:
+        for path in (self._profile_path(profile_id), self._meta_path(profile_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+profile_store = ProfileStore(settings.PROFILE_DIR, settings.PROFILE_MAX_STORED)
@@ -0,0 +1,44 @@
+import asyncio
+from typing import Callable, List, Tuple
+from logger import logger
+
+
+class BackgroundScheduler:
+    """
+    In-process scheduler for periodic maintenance jobs.
+
+    Jobs are plain blocking callables; each one runs in the default thread
+    pool so database work never blocks the event loop. Started and stopped
+    from the application lifespan in `app/main.py`.
+    """
+
+    def __init__(self) -> None:
+        self._jobs: List[Tuple[str, float, Callable[[], object]]] = []
+        self._tasks: List[asyncio.Task] = []
+
+    def add_job(self, name: str, interval_seconds: float, func: Callable[[], object]) -> None:
+        self._jobs.append((name, interval_seconds, func))
+
+    async def _run_job(self, name: str, interval_seconds: float, func: Callable[[], object]) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(func)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.log_message("ERROR", f"Background job {name} failed: {str(e)}")
+            await asyncio.sleep(interval_seconds)
+
+    def start(self) -> None:
+        for name, interval_seconds, func in self._jobs:
+            self._tasks.append(
+                asyncio.create_task(self._run_job(name, interval_seconds, func), name=name)
+            )
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+scheduler = BackgroundScheduler()
@@ -0,0 +1,369 @@
+import asyncio
+import hashlib
+import hmac
+import io
+import json
+import os
+import shutil
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Dict, Iterable, Optional, Tuple
+from fastapi.responses import FileResponse, Response, RedirectResponse
+from app.core.config import settings
+from app.helper.storage_helper import build_file_key
+
+# Bounded pool for blocking storage calls made from async routes
+storage_executor = ThreadPoolExecutor(
+    max_workers=settings.S3_UPLOAD_CONCURRENCY,
+    thread_name_prefix="storage-io"
+)
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class StorageBackend(ABC):
+    """
+    Where attachment bodies live. Routes only talk to `storage` (see the
+    bottom of this module), so the S3, local-disk and in-memory backends are
+    interchangeable through the STORAGE_BACKEND setting.
+
+    Blocking methods are the primitives; the `a*` variants run them on
+    `storage_executor` for use from async routes.
+    """
+
+    @abstractmethod
+    def save(
+        self,
+        fileobj: BinaryIO,
+        original_filename: str,
+        content_type: Optional[str],
+        key: Optional[str] = None,
+        metadata: Optional[Dict[str, str]] = None
+    ) -> Tuple[str, str]:
+        """Stream `fileobj` into storage; returns (key, url)"""
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        """Open a stored object for reading"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def get_metadata(self, key: str) -> Optional[dict]:
+        """{"size", "content_type", "metadata"} or None if the key is missing"""
+
+    @abstractmethod
+    def get_url(self, key: str) -> str:
+        pass
+
+    @abstractmethod
+    def presigned_url(self, key: str, expiration: int = 3600) -> str:
+        pass
+
+    @abstractmethod
+    def presigned_upload(
+        self,
+        original_filename: str,
+        content_type: Optional[str],
+        owner_id,
+        max_size: int,
+        expiration: int = 900
+    ) -> Tuple[str, dict]:
+        """Returns (key, {"url", "fields"}) for a browser form upload"""
+
+    @abstractmethod
+    def file_response(self, key: str) -> Response:
+        """Response that serves the object body"""
+
+    def delete_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Delete `keys`; returns {key: error} for the ones that failed"""
+        errors = {}
+        for key in keys:
+            try:
+                self.delete(key)
+            except Exception as e:
+                errors[key] = str(e)
+        return errors
+
+    def key_from_url(self, file_url: str) -> str:
+        return file_url.split("/")[-1]
+
+    def presigned_urls(self, keys: Iterable[str], expiration: int = 3600) -> Dict[str, str]:
+        return {key: self.presigned_url(key, expiration) for key in keys}
+
+    def verify_upload(self, key: str, owner_id) -> Optional[dict]:
+        """Metadata of `key` if it exists and was uploaded for `owner_id`"""
+        metadata = self.get_metadata(key)
+        if metadata is None or metadata["metadata"].get("owner-id") != str(owner_id):
+            return None
+        return metadata
+
+    async def run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(storage_executor, func, *args)
+
+    async def asave(self, fileobj, original_filename, content_type, key=None, metadata=None):
+        return await self.run(self.save, fileobj, original_filename, content_type, key, metadata)
+
+    async def adelete(self, key: str) -> None:
+        return await self.run(self.delete, key)
+
+    async def averify_upload(self, key: str, owner_id) -> Optional[dict]:
+        return await self.run(self.verify_upload, key, owner_id)
+
+
+class S3StorageBackend(StorageBackend):
+    def __init__(self) -> None:
+        # Imported lazily so the local backends work without AWS set up
+        from app.core import aws
+        self.aws = aws
+
+    def save(self, fileobj, original_filename, content_type, key=None, metadata=None):
+        return self.aws.upload_stream_to_s3(
+            fileobj, original_filename, content_type, file_name=key, metadata=metadata
+        )
+
+    def open(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            response = self.aws.s3_client.get_object(Bucket=self.aws.S3_BUCKET_NAME, Key=key)
+        except ClientError as e:
+            raise Exception(f"Error reading file: {str(e)}")
+        return response["Body"]
+
+    def delete(self, key):
+        self.aws.delete_file_from_s3(key)
+
+    def delete_many(self, keys):
+        return self.aws.delete_files_from_s3(keys)
+
+    def get_metadata(self, key):
+        head = self.aws.get_file_metadata(key)
+        if head is None:
+            return None
+        return {
+            "size": head.get("ContentLength"),
+            "content_type": head.get("ContentType"),
+            "metadata": head.get("Metadata", {})
+        }
+
+    def get_url(self, key):
+        return self.aws.get_file_url(key)
+
+    def presigned_url(self, key, expiration=3600):
+        return self.aws.generate_presigned_url(key, expiration)
+
+    def presigned_upload(self, original_filename, content_type, owner_id, max_size, expiration=900):
+        return self.aws.generate_presigned_upload(
+            original_filename, content_type, owner_id, max_size, expiration
+        )
+
+    def file_response(self, key):
+        return RedirectResponse(self.presigned_url(key))
+
+
+class SignedUrlStorageBackend(StorageBackend):
+    """
+    Base for backends served by this app itself (`app/api/routes/storage.py`).
+    Presigned URLs and upload forms are HMAC-signed with the JWT secret so
+    they behave like their S3 counterparts.
+    """
+
+    def _sign(self, *parts) -> str:
+        message = "|".join(str(part) for part in parts).encode("utf-8")
+        return hmac.new(settings.JWT_SECRET_KEY.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+    def _base_url(self) -> str:
+        return f"{settings.STORAGE_PUBLIC_BASE_URL.rstrip('/')}/storage"
+
+    def get_url(self, key):
+        return f"{self._base_url()}/files/{key}"
+
+    def presigned_url(self, key, expiration=3600):
+        expires = int(time.time()) + expiration
+        return f"{self.get_url(key)}?expires={expires}&signature={self._sign('get', key, expires)}"
+
+    def verify_download(self, key: str, expires: int, signature: str) -> bool:
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(self._sign("get", key, expires), signature)
+
+    def presigned_upload(self, original_filename, content_type, owner_id, max_size, expiration=900):
+        key = build_file_key(original_filename)
+        content_type = content_type or "application/octet-stream"
+        expires = int(time.time()) + expiration
+        fields = {
+            "key": key,
+            "Content-Type": content_type,
+            "x-amz-meta-owner-id": str(owner_id),
+            "max-size": str(max_size),
+            "expires": str(expires),
+        }
+        fields["signature"] = self._sign(
+            "put", key, content_type, fields["x-amz-meta-owner-id"], max_size, expires
+        )
+        return key, {"url": f"{self._base_url()}/uploads", "fields": fields}
+
+    def verify_upload_form(self, fields: Dict[str, str]) -> bool:
+        try:
+            if int(fields["expires"]) < time.time():
+                return False
+            expected = self._sign(
+                "put",
+                fields["key"],
+                fields["Content-Type"],
+                fields["x-amz-meta-owner-id"],
+                int(fields["max-size"]),
+                int(fields["expires"])
+            )
+        except (KeyError, ValueError):
+            return False
+        return hmac.compare_digest(expected, fields.get("signature", ""))
+
+
+class LocalStorageBackend(SignedUrlStorageBackend):
+    """Stores objects under UPLOAD_FOLDER with a JSON sidecar for metadata"""
+
+    def __init__(self, root: str) -> None:
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if os.path.dirname(path) != self.root:
+            raise Exception(f"Invalid storage key: {key}")
+        return path
+
+    def _meta_path(self, key: str) -> str:
+        return self._path(key) + ".meta.json"
+
+    def save(self, fileobj, original_filename, content_type, key=None, metadata=None):
+        key = key or build_file_key(original_filename)
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as out:
+            shutil.copyfileobj(fileobj, out, COPY_CHUNK_SIZE)
+        os.replace(tmp_path, path)
+        with open(self._meta_path(key), "w") as meta:
+            json.dump({
+                "content_type": content_type or "application/octet-stream",
+                "metadata": metadata or {}
+            }, meta)
+        return key, self.get_url(key)
+
+    def open(self, key):
+        return open(self._path(key), "rb")
+
+    def delete(self, key):
+        for path in (self._path(key), self._meta_path(key)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def get_metadata(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(self._meta_path(key)) as meta:
+                stored = json.load(meta)
+        except FileNotFoundError:
+            stored = {}
+        return {
+            "size": os.path.getsize(path),
+            "content_type": stored.get("content_type"),
+            "metadata": stored.get("metadata", {})
+        }
+
+    def file_response(self, key):
+        metadata = self.get_metadata(key)
+        if metadata is None:
+            return Response(status_code=404)
+        return ZeroCopyFileResponse(self._path(key), media_type=metadata["content_type"])
+
+
+class InMemoryStorageBackend(SignedUrlStorageBackend):
+    """Process-local storage for tests and load tests; nothing touches disk"""
+
+    def __init__(self) -> None:
+        self._objects: Dict[str, Tuple[bytes, str, Dict[str, str]]] = {}
+        self._lock = threading.Lock()
+
+    def save(self, fileobj, original_filename, content_type, key=None, metadata=None):
+        key = key or build_file_key(original_filename)
+        body = fileobj.read()
+        with self._lock:
+            self._objects[key] = (body, content_type or "application/octet-stream", dict(metadata or {}))
+        return key, self.get_url(key)
+
+    def open(self, key):
+        with self._lock:
+            body, _, _ = self._objects[key]
+        return io.BytesIO(body)
+
+    def delete(self, key):
+        with self._lock:
+            self._objects.pop(key, None)
+
+    def get_metadata(self, key):
+        with self._lock:
+            stored = self._objects.get(key)
+        if stored is None:
+            return None
+        body, content_type, metadata = stored
+        return {"size": len(body), "content_type": content_type, "metadata": metadata}
+
+    def file_response(self, key):
+        with self._lock:
+            stored = self._objects.get(key)
+        if stored is None:
+            return Response(status_code=404)
+        return Response(content=stored[0], media_type=stored[1])
+
+
+class ZeroCopyFileResponse(FileResponse):
+    """
+    FileResponse that hands the file descriptor to the server through the
+    ASGI `http.response.zerocopysend` extension (sendfile) when the server
+    offers it, and falls back to regular chunked reads otherwise.
+    """
+
+    async def __call__(self, scope, receive, send):
+        extensions = scope.get("extensions") or {}
+        headers = dict(scope.get("headers") or [])
+        if (
+            "http.response.zerocopysend" not in extensions
+            or scope.get("method") == "HEAD"
+            or b"range" in headers
+        ):
+            return await super().__call__(scope, receive, send)
+
+        self.set_stat_headers(os.stat(self.path))
+        with open(self.path, "rb") as file:
+            await send({
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            })
+            await send({
+                "type": "http.response.zerocopysend",
+                "file": file.fileno(),
+                "more_body": False,
+            })
+
+
+def create_storage(backend: str) -> StorageBackend:
+    if backend == "s3":
+        return S3StorageBackend()
+    if backend == "local":
+        return LocalStorageBackend(settings.UPLOAD_FOLDER)
+    if backend == "memory":
+        return InMemoryStorageBackend()
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+storage = create_storage(settings.STORAGE_BACKEND)
@@ -0,0 +1,89 @@
+import zlib
+from typing import Optional
+
+# Brotli is optional; without it clients that accept gzip still get gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Most preferred first
+ENCODINGS = ("br", "gzip")
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def is_available(encoding: str) -> bool:
+    return encoding == "gzip" or (encoding == "br" and brotli is not None)
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    if not content_type:
+        return False
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith(COMPRESSIBLE_TYPES) or media_type.endswith(("+json", "+xml"))
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Best encoding we support that the Accept-Encoding header allows, or None"""
+    qualities = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding] = quality
+
+    for encoding in ENCODINGS:
+        if is_available(encoding) and qualities.get(encoding, qualities.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class GzipEncoder:
+    def __init__(self, level: int = 6) -> None:
+        # wbits 31: zlib stream with a gzip header and trailer
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        """Everything compressed so far, decodable by the client right away"""
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+    def __init__(self, quality: int = 4) -> None:
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def create_encoder(encoding: str, gzip_level: int = 6, brotli_quality: int = 4):
+    if encoding == "br":
+        return BrotliEncoder(brotli_quality)
+    if encoding == "gzip":
+        return GzipEncoder(gzip_level)
+    raise ValueError(f"Unsupported encoding: {encoding}")
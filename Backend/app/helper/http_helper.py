@@ -0,0 +1,71 @@
+import hashlib
+import json
+from typing import Dict
+from uuid import UUID
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy.orm import Session
+from app.api.schemas.auth import UserData
+from app.core.auth import get_current_user
+from app.core.database import get_db
+from app.models.group_models import Group, GroupMember
+
+
+def compute_etag(payload) -> str:
+    """Strong ETag of a JSON-serialisable payload"""
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return f'"{hashlib.sha256(body.encode("utf-8")).hexdigest()[:32]}"'
+
+def weak_etag(*parts) -> str:
+    """Weak ETag identifying a combination of version inputs"""
+    body = "|".join(str(part) for part in parts)
+    return f'W/"{hashlib.sha256(body.encode("utf-8")).hexdigest()[:32]}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match already names `etag` (weak comparison)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    tags = [tag.strip() for tag in header.split(",")]
+    return any((tag[2:] if tag.startswith("W/") else tag) == opaque for tag in tags)
+
+def group_etag(
+    group_id: UUID,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: UserData = Depends(get_current_user)
+) -> Dict[str, str]:
+    """
+    Conditional GET for group-scoped reads. The caller is authenticated and
+    must be a member of the group; after that the ETag is derived from the
+    group's version (`Group.sync_version`, bumped by every write to the group
+    when it commits), the URL and the caller's credentials, so a
+    matching If-None-Match is answered with 304 before the route's own
+    queries run. Otherwise the caching headers are set on the response and
+    also returned, for routes that build their own Response.
+
+    Register it in the route's `dependencies`; `get_db` and
+    `get_current_user` are shared with the route, so they only run once.
+    """
+    # Membership and version in one lookup
+    version = db.query(Group.sync_version) \
+        .join(GroupMember, GroupMember.group_id == Group.id) \
+        .filter(Group.id == group_id, GroupMember.user_id == current_user.id) \
+        .scalar()
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You're not a member of this group")
+
+    etag = weak_etag(
+        version,
+        request.headers.get("authorization", ""),
+        request.url.path,
+        request.url.query
+    )
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return headers
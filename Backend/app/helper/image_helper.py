@@ -0,0 +1,39 @@
+import io
+
+# Pillow is optional; without it image variants are simply not generated
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+# name -> longest edge in pixels
+VARIANT_SIZES = {
+    "thumbnail": 256,
+    "preview": 1280,
+}
+WEBP_QUALITY = 80
+
+def is_available():
+    return Image is not None
+
+def variant_key(key, variant):
+    return f"{key}.{variant}.webp"
+
+def render_variants(image_bytes):
+    """
+    Decode an image and return {variant: webp_bytes}. Runs in the thumbnail
+    process pool, so it only depends on Pillow.
+    """
+    with Image.open(io.BytesIO(image_bytes)) as source:
+        source.draft("RGB", (max(VARIANT_SIZES.values()),) * 2)  # Cheap JPEG downscale on decode
+        image = ImageOps.exif_transpose(source)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+
+    variants = {}
+    for variant, size in VARIANT_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        out = io.BytesIO()
+        resized.save(out, format="WEBP", quality=WEBP_QUALITY, method=4)
+        variants[variant] = out.getvalue()
+    return variants
@@ -0,0 +1,54 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import List, Sequence, Union
+
+# Amounts are stored as NUMERIC(12, 2) and handled as Decimal, so sums and
+# balance updates are exact. The API still speaks JSON numbers.
+CENT = Decimal("0.01")
+MINOR_UNITS_PER_UNIT = 100
+
+Amount = Union[Decimal, float, int, str]
+
+def to_money(value: Amount) -> Decimal:
+    """`value` rounded half-up to whole cents. Floats go through their
+    shortest repr, so 25.1 becomes Decimal("25.10") and not 25.0999..."""
+    if isinstance(value, float):
+        value = repr(value)
+    return Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
+def to_minor(value: Amount) -> int:
+    """Whole cents in `value`"""
+    return int(to_money(value) * MINOR_UNITS_PER_UNIT)
+
+def from_minor(units: int) -> Decimal:
+    return Decimal(units).scaleb(-2)
+
+def allocate(total: Amount, weights: Sequence[Amount], offset: int = 0) -> List[Decimal]:
+    """
+    Split `total` in proportion to `weights` into whole-cent shares that add
+    up to exactly `total` (largest remainder method). All arithmetic is on
+    integer cents in a single pass, so the cost does not depend on the
+    amount. The cents left over after rounding down go to the largest
+    remainders; ties are broken by position, starting at `offset` and
+    wrapping, so callers can rotate who absorbs the odd cent.
+    """
+    count = len(weights)
+    if count == 0:
+        raise ValueError("Cannot allocate between zero parts")
+    total_units = to_minor(total)
+    # Only the ratios matter: integer weights are used as they are
+    weight_units = weights if all(type(weight) is int for weight in weights) else [to_minor(weight) for weight in weights]
+    weight_total = sum(weight_units)
+    if weight_total <= 0 or any(weight < 0 for weight in weight_units):
+        raise ValueError("Weights must be non-negative and not all zero")
+
+    shares, remainders = zip(*(divmod(total_units * weight, weight_total) for weight in weight_units))
+    shares = list(shares)
+    leftover = total_units - sum(shares)
+    order = sorted(range(count), key=lambda i: (-remainders[i], (i - offset) % count))
+    for i in order[:leftover]:
+        shares[i] += 1
+    return [from_minor(units) for units in shares]
+
+def split_equally(total: Amount, count: int, offset: int = 0) -> List[Decimal]:
+    """`total` in `count` shares that differ by at most one cent"""
+    return allocate(total, [1] * count, offset)
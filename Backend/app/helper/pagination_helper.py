@@ -0,0 +1,20 @@
+import base64
+import json
+from fastapi import HTTPException, status
+
+
+def encode_cursor(*values) -> str:
+    """Opaque keyset cursor holding the sort key of the last row returned"""
+    payload = json.dumps(values, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, *parsers) -> tuple:
+    """Sort-key values of `cursor`, each passed through the matching parser"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(payload)
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError("wrong number of values")
+        return tuple(parse(value) for parse, value in zip(parsers, values))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
@@ -0,0 +1,60 @@
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Hashable, List, Tuple
+from sqlalchemy import func, literal_column
+
+# Text search configuration for PostgreSQL. Literal SQL rather than bind
+# parameters so query expressions are identical to the GIN index
+# expressions and the planner can use the indexes.
+SEARCH_CONFIG = literal_column("'english'::regconfig")
+
+def search_vector(*columns):
+    """to_tsvector over the columns, NULLs treated as empty text"""
+    document = func.coalesce(columns[0], literal_column("''"))
+    for column in columns[1:]:
+        document = document.op("||")(literal_column("' '")).op("||")(
+            func.coalesce(column, literal_column("''"))
+        )
+    return func.to_tsvector(SEARCH_CONFIG, document)
+
+def search_query(q: str):
+    return func.websearch_to_tsquery(SEARCH_CONFIG, q)
+
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall((text or "").lower())
+
+
+class InvertedIndex:
+    """
+    In-memory token -> document index used where PostgreSQL full-text search
+    is not available (SQLite). Documents match when they contain every query
+    token; scores are TF-IDF sums.
+    """
+
+    def __init__(self) -> None:
+        self._postings: Dict[str, Dict[Hashable, int]] = defaultdict(dict)
+        self._documents = 0
+
+    def add(self, doc_id: Hashable, *texts: str) -> None:
+        self._documents += 1
+        for token, count in Counter(token for text in texts for token in tokenize(text)).items():
+            self._postings[token][doc_id] = count
+
+    def search(self, query: str) -> List[Tuple[Hashable, float]]:
+        tokens = set(tokenize(query))
+        if not tokens:
+            return []
+        postings = [self._postings.get(token, {}) for token in tokens]
+        matches = set.intersection(*(set(posting) for posting in postings))
+        scores = {
+            doc_id: sum(
+                posting[doc_id] * math.log(1 + self._documents / len(posting))
+                for posting in postings
+            )
+            for doc_id in matches
+        }
+        return sorted(scores.items(), key=lambda item: -item[1])
@@ -0,0 +1,25 @@
+import hashlib
+import os
+import uuid
+
+def build_file_key(original_filename):
+    # Store original name as part of the file key; keys never contain "/"
+    safe_name = os.path.basename((original_filename or "file").replace("\\", "/")) or "file"
+    return f"{uuid.uuid4()}_{safe_name}"
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def hash_fileobj(fileobj):
+    """SHA-256 and size of a file object, read in chunks; rewinds it afterwards"""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: fileobj.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+        size += len(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest(), size
+
+def build_content_key(sha256, original_filename):
+    # Content-addressed key; the extension is kept so downloads get a sensible name
+    extension = os.path.splitext(os.path.basename(original_filename or ""))[1][:16]
+    return f"sha256-{sha256}{extension.lower()}"
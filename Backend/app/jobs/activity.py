@@ -0,0 +1,24 @@
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.repository.activity import activityrepo
+from logger import logger
+
+
+def compact_activity_events():
+    """Prune activity events older than the retention period"""
+    db = SessionLocal()
+    try:
+        total = 0
+        while True:
+            deleted = activityrepo.compact(
+                db,
+                older_than_days=settings.ACTIVITY_RETENTION_DAYS,
+                batch_size=settings.ACTIVITY_COMPACT_BATCH_SIZE
+            )
+            total += deleted
+            if deleted < settings.ACTIVITY_COMPACT_BATCH_SIZE:
+                break
+        if total:
+            logger.log_message("INFO", f"Activity compactor pruned {total} events")
+    finally:
+        db.close()
@@ -0,0 +1,20 @@
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.repository.poll import pollrepo
+from logger import logger
+
+
+def sweep_polls():
+    """Close polls past their `closes_at` and archive long-closed ones"""
+    db = SessionLocal()
+    try:
+        closed = pollrepo.close_expired_polls(db, batch_size=settings.POLL_SWEEP_BATCH_SIZE)
+        archived = pollrepo.archive_closed_polls(
+            db,
+            older_than_days=settings.POLL_ARCHIVE_AFTER_DAYS,
+            batch_size=settings.POLL_SWEEP_BATCH_SIZE
+        )
+        if closed or archived:
+            logger.log_message("INFO", f"Poll sweep closed {closed} and archived {archived} polls")
+    finally:
+        db.close()
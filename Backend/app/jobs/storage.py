@@ -0,0 +1,22 @@
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.repository.storage import storagerepo
+from logger import logger
+
+
+def drain_pending_deletions():
+    """Delete queued storage objects until the due part of the queue is empty"""
+    db = SessionLocal()
+    try:
+        total = 0
+        while True:
+            processed = storagerepo.process_pending_deletions(
+                db, batch_size=settings.STORAGE_DELETE_BATCH_SIZE
+            )
+            total += processed
+            if processed < settings.STORAGE_DELETE_BATCH_SIZE:
+                break
+        if total:
+            logger.log_message("INFO", f"Storage deleter processed {total} queued deletions")
+    finally:
+        db.close()
@@ -0,0 +1,120 @@
+import io
+import mimetypes
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.storage import storage
+from app.helper import image_helper
+from app.models.expense_models import Attachment
+from app.models.group_models import GroupAttachment
+from logger import logger
+
+_process_pool = None
+
+def _get_process_pool():
+    # Created on first use; "spawn" keeps the workers free of the parent's
+    # threads, DB connections and boto3 clients.
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _process_pool
+
+def shutdown_process_pool():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(cancel_futures=True)
+        _process_pool = None
+
+def _source_key(attachment):
+    if isinstance(attachment, GroupAttachment):
+        return attachment.s3_key
+    return storage.key_from_url(attachment.file_url)
+
+def _is_image(filename):
+    content_type, _ = mimetypes.guess_type(filename or "")
+    return bool(content_type and content_type.startswith("image/"))
+
+def _read_source(key):
+    metadata = storage.get_metadata(key)
+    if metadata is None or (metadata["size"] or 0) > settings.THUMBNAIL_MAX_SOURCE_BYTES:
+        return None
+    body = storage.open(key)
+    try:
+        return body.read()
+    finally:
+        body.close()
+
+def _mark_ready(attachment, key):
+    attachment.thumbnail_key = image_helper.variant_key(key, "thumbnail")
+    attachment.preview_key = image_helper.variant_key(key, "preview")
+    attachment.variant_status = "ready"
+
+def generate_pending_variants():
+    """
+    Render WebP thumbnail/preview variants for image attachments that don't
+    have them yet. Decoding and resizing run in a process pool so they never
+    compete with request handling for the GIL.
+    """
+    if not image_helper.is_available():
+        return
+
+    db = SessionLocal()
+    try:
+        for model in (GroupAttachment, Attachment):
+            pending = db.query(model)\
+                .filter(model.variant_status.is_(None))\
+                .limit(settings.THUMBNAIL_BATCH_SIZE)\
+                .all()
+
+            images = []
+            for attachment in pending:
+                if not _is_image(attachment.original_filename):
+                    attachment.variant_status = "skipped"
+                    continue
+                key = _source_key(attachment)
+                # Variant keys derive from the (content-addressed) source key,
+                # so duplicates share them and purges can find them
+                if storage.get_metadata(image_helper.variant_key(key, "thumbnail")) is not None:
+                    _mark_ready(attachment, key)
+                    continue
+                images.append((attachment, key))
+
+            # Only hold as many source images in memory as there are workers
+            window = max(settings.THUMBNAIL_WORKERS, 1)
+            for start in range(0, len(images), window):
+                jobs = []
+                for attachment, key in images[start:start + window]:
+                    image_bytes = _read_source(key)
+                    if image_bytes is None:
+                        attachment.variant_status = "skipped"
+                        continue
+                    jobs.append((
+                        attachment,
+                        key,
+                        _get_process_pool().submit(image_helper.render_variants, image_bytes)
+                    ))
+
+                for attachment, key, future in jobs:
+                    try:
+                        for variant, data in future.result().items():
+                            storage.save(
+                                io.BytesIO(data),
+                                f"{variant}.webp",
+                                "image/webp",
+                                key=image_helper.variant_key(key, variant)
+                            )
+                        _mark_ready(attachment, key)
+                    except Exception as e:
+                        logger.log_message("WARN", f"Thumbnail generation failed for {key}: {str(e)}")
+                        attachment.variant_status = "failed"
+
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
@@ -1,21 +1,51 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from app.api.main import api_router
+from app.core.config import settings
 from app.core.database import engine
-from app.models import user_models, group_models, expense_models, itineraries_model
+from app.core.scheduler import scheduler
+from app.jobs.activity import compact_activity_events
+from app.jobs.polls import sweep_polls
+from app.jobs.storage import drain_pending_deletions
+from app.jobs.thumbnails import generate_pending_variants, shutdown_process_pool
+from app.models import user_models, group_models, expense_models, itineraries_model, poll_models, storage_models, activity_models, sync_models
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.middleware import RequestIdMiddleware, MetricsMiddleware, ProfilerMiddleware, CompressionMiddleware
+from app.core.metrics import mark_process_dead
+
+scheduler.add_job("poll-sweeper", settings.POLL_SWEEP_INTERVAL_SECONDS, sweep_polls)
+scheduler.add_job("thumbnail-generator", settings.THUMBNAIL_POLL_INTERVAL_SECONDS, generate_pending_variants)
+scheduler.add_job("storage-deleter", settings.STORAGE_DELETE_INTERVAL_SECONDS, drain_pending_deletions)
+scheduler.add_job("activity-compactor", settings.ACTIVITY_COMPACT_INTERVAL_SECONDS, compact_activity_events)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    scheduler.start()
+    yield
+    await scheduler.stop()
+    shutdown_process_pool()
+    mark_process_dead()
 
 # allow_origins=["https://trip-squad-ashy.vercel.app/", "http://localhost:3000","http://127.0.0.1:3000"],
-app = FastAPI()
+# orjson serializes UUID/datetime natively, so routes can return them as-is
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["https://trip-squad-ashy.vercel.app", "http://localhost:3000","http://127.0.0.1:3000"],
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods including OPTIONS
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+# Inside the metrics middleware so response sizes are bytes on the wire
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(ProfilerMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestIdMiddleware)
 app.include_router(api_router)
 
 # Create all tables at once using the same Base metadata
 Base = user_models.Base  # or group_models.Base (they should be the same)
 # print(f"Base tables: {Base.metadata.tables.keys()}")
-Base.metadata.create_all(engine)
\ No newline at end of file
+Base.metadata.create_all(engine)
@@ -0,0 +1,47 @@
+from datetime import datetime, timezone
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, BigInteger, JSON, Index
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+
+class ActivityEvent(Base):
+    # Outbox of group activity, written in the same transaction as the change
+    # it describes (app/repository/activity.py) and read by GET /user/feed.
+    # (`xid`, `id`) is the feed cursor. On PostgreSQL `xid` is the id of the
+    # transaction that wrote the event; the feed only serves transactions
+    # older than every one still running, so nothing can commit behind the
+    # cursor. Elsewhere it is drawn from ActivitySequence when the
+    # transaction commits. `id` alone only reflects insertion order.
+    # Pruned by the activity-compactor job (app/jobs/activity.py).
+    __tablename__ = "activity_events"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    group_id = Column(UUID(as_uuid=True), ForeignKey("groups.id", ondelete="CASCADE"), nullable=False)
+    actor_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    event_type = Column(String(50), nullable=False)  # e.g. "expense.created", "poll.voted"
+    entity_id = Column(UUID(as_uuid=True), nullable=True)
+    payload = Column(JSON, nullable=True)  # Small summary for rendering the feed without lookups
+    xid = Column(BigInteger, nullable=True)  # See above; set by the INSERT or at commit
+    created_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow, index=True)
+
+    __table_args__ = (
+        # Feed reads (group_id IN (...) AND (xid, id) > :since ORDER BY
+        # xid, id) are answered from this index alone on PostgreSQL
+        Index(
+            "ix_activity_events_group_id_xid_id", group_id, xid, id,
+            postgresql_include=["created_at", "actor_id", "event_type", "entity_id", "payload"]
+        ),
+    )
+
+
+class ActivitySequence(Base):
+    # Single row holding the last `ActivityEvent.xid` handed out where the
+    # database has no transaction ids to use (SQLite)
+    __tablename__ = "activity_sequence"
+
+    id = Column(Integer, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
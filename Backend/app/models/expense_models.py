@@ -1,8 +1,10 @@
 import enum
-from sqlalchemy import Enum as SQLEnum, Float, Text
-from sqlalchemy import Column, String, DateTime, UUID, ForeignKey
+from sqlalchemy import Enum as SQLEnum, Numeric, Text, BigInteger
+from sqlalchemy import Column, String, DateTime, UUID, ForeignKey, Index
+from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
+from app.helper.search_helper import search_vector
 import uuid
 from datetime import datetime
 
@@ -19,20 +21,31 @@ class Expense(Base):
     created_by = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=False)
     title = Column(String, nullable=False)
     description = Column(Text)
-    total_amount = Column(Float, nullable=False)
+    total_amount = Column(Numeric(12, 2), nullable=False)  # Exact; see app/helper/money_helper.py
     split_type = Column(SQLEnum(SplitType), nullable=False, default=SplitType.EQUAL)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    sync_version = Column(BigInteger, nullable=False, default=0, server_default="0")  # See app/repository/sync.py
 
     splits = relationship("ExpenseSplit", back_populates="expense", cascade="all, delete")
     attachments = relationship("Attachment", back_populates="expense", cascade="all, delete")
 
+    __table_args__ = (
+        # Full-text search (PostgreSQL only; SQLite uses an in-memory index)
+        Index("ix_expenses_search", search_vector(title, description), postgresql_using="gin")
+            .ddl_if(dialect="postgresql"),
+        Index("ix_expenses_group_id_sync_version", "group_id", "sync_version"),
+    )
+
 class ExpenseSplit(Base):
     __tablename__ = "expense_splits"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     expense_id = Column(UUID(as_uuid=True), ForeignKey("expenses.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=False)
-    amount = Column(Float, nullable=False)  # Exact amount owed
+    amount = Column(Numeric(12, 2), nullable=False)  # Exact amount owed
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    sync_version = Column(BigInteger, nullable=False, default=0, server_default="0")
 
     expense = relationship("Expense", back_populates="splits")
     # settlements = relationship("Settlement", back_populates="expense_split", cascade="all, delete-orphan")
@@ -45,9 +58,15 @@ class Settlement(Base):
     group_id = Column(UUID(as_uuid=True), ForeignKey("groups.id"), nullable=False)
     paid_by = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=False)
     paid_to = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=False)
-    amount = Column(Float, nullable=False)
+    amount = Column(Numeric(12, 2), nullable=False)
     settled_at = Column(DateTime, default=datetime.utcnow)
     note = Column(Text, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    sync_version = Column(BigInteger, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        Index("ix_settlements_group_id_sync_version", "group_id", "sync_version"),
+    )
 
     # expense_split = relationship("ExpenseSplit", back_populates="settlements", passive_deletes=True)
 
@@ -56,9 +75,9 @@ class UserBalance(Base):
     # Tracks net balances
     __tablename__ = "user_balances"
     debtor_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), primary_key=True) # got the money, will pay
-    creditor_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), primary_key=True) # had paid the money, will receive
+    creditor_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), primary_key=True, index=True) # had paid the money, will receive
     group_id = Column(UUID(as_uuid=True), ForeignKey("groups.id", ondelete="CASCADE"), primary_key=True)
-    amount = Column(Float, nullable=False)  # Positive = debtor owes creditor
+    amount = Column(Numeric(12, 2), nullable=False)  # Positive = debtor owes creditor
 
 class Attachment(Base):
     __tablename__ = "attachments"
@@ -70,4 +89,9 @@ class Attachment(Base):
     uploaded_by = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
 
+    # Image variants written by the thumbnail job (app/jobs/thumbnails.py)
+    thumbnail_key = Column(String, nullable=True)
+    preview_key = Column(String, nullable=True)
+    variant_status = Column(String(16), nullable=True, index=True)  # None = pending, "ready", "skipped", "failed"
+
     expense = relationship("Expense", back_populates="attachments")
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, String, DateTime, UUID, ForeignKey, LargeBinary, Integer, Enum, Boolean, UniqueConstraint
+from sqlalchemy import Column, String, DateTime, UUID, ForeignKey, LargeBinary, Integer, BigInteger, Enum, Boolean, UniqueConstraint
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, backref
 from app.core.database import Base
 import uuid
 import secrets
@@ -33,8 +33,12 @@ class Group(Base):
     created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Bumped once per transaction that changes anything in the group; see
+    # app/repository/sync.py
+    sync_version = Column(BigInteger, nullable=False, default=0, server_default="0")
     
-    members = relationship("GroupMember", back_populates="group")
+    # Rows with ON DELETE CASCADE foreign keys are left to the database
+    members = relationship("GroupMember", back_populates="group", passive_deletes=True)
     itinerary_entries = relationship("ItineraryEntry", back_populates="group", cascade="all, delete-orphan")
     invites = relationship("GroupInvite", back_populates="group", cascade="all, delete-orphan")
     polls = relationship("Poll", back_populates="group", cascade="all, delete-orphan")
@@ -65,11 +69,16 @@ class GroupAttachment(Base):
     file_url = Column(String, nullable=False)  # Full S3 path or pre-signed URL
     s3_key = Column(String, nullable=False)
     attachment_type = Column(Enum(AttachmentType), nullable=False)
+
+    # Image variants written by the thumbnail job (app/jobs/thumbnails.py)
+    thumbnail_key = Column(String, nullable=True)
+    preview_key = Column(String, nullable=True)
+    variant_status = Column(String(16), nullable=True, index=True)  # None = pending, "ready", "skipped", "failed"
     
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships (optional, in case you want to access them easily)
-    group = relationship("Group", backref="attachments")
+    group = relationship("Group", backref=backref("attachments", passive_deletes=True))
 
 class GroupInvite(Base):
     __tablename__ = "group_invites"
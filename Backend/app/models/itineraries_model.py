@@ -1,6 +1,8 @@
-from sqlalchemy import Column, String, UUID, ForeignKey, Text, Integer
+from sqlalchemy import Column, String, UUID, ForeignKey, Text, Integer, BigInteger, DateTime, Index
+from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
+from app.helper.search_helper import search_vector
 import uuid
 
 class ItineraryEntry(Base):
@@ -14,15 +16,30 @@ class ItineraryEntry(Base):
     title = Column(String(100), nullable=False)
     description = Column(Text)
     day_number = Column(Integer, nullable=True)
+    position = Column(Integer, nullable=False, default=0, server_default="0")  # Order within the day
+    
+    # Optimistic concurrency: bumped on every update, checked by bulk edits
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     # Google Maps location (simple string link)
     google_maps_link = Column(String(500))  # Stores full Google Maps URLs like "https://goo.gl/maps/..."
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    sync_version = Column(BigInteger, nullable=False, default=0, server_default="0")  # See app/repository/sync.py
     
     # Relationships
     group = relationship("Group", back_populates="itinerary_entries")
     creator = relationship("User")
     attachments = relationship("ItineraryAttachment", back_populates="entry", cascade="all, delete-orphan")
 
+    __mapper_args__ = {"version_id_col": version}
+    __table_args__ = (
+        # Full-text search (PostgreSQL only; SQLite uses an in-memory index)
+        Index("ix_itinerary_entries_search", search_vector(title, description), postgresql_using="gin")
+            .ddl_if(dialect="postgresql"),
+        Index("ix_itinerary_entries_group_id_sync_version", "group_id", "sync_version"),
+    )
+
 class ItineraryAttachment(Base):
     __tablename__ = 'itinerary_attachments'
     
@@ -1,8 +1,9 @@
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Integer, BigInteger, JSON, Index, Enum as SQLEnum
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
+from app.helper.search_helper import search_vector
 
 class Poll(Base):
     __tablename__ = "polls"
@@ -13,8 +14,11 @@ class Poll(Base):
     group_id = Column(UUID(as_uuid=True), ForeignKey("groups.id"), nullable=False)
     created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     is_active = Column(Boolean, default=True)
+    closes_at = Column(DateTime(timezone=True), nullable=True, index=True)  # Auto-closed by the poll sweeper
+    closed_at = Column(DateTime(timezone=True), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    sync_version = Column(BigInteger, nullable=False, default=0, server_default="0")  # See app/repository/sync.py
     
     # Relationships
     group = relationship("Group", back_populates="polls")
@@ -22,6 +26,13 @@ class Poll(Base):
     options = relationship("PollOption", back_populates="poll", cascade="all, delete-orphan")
     votes = relationship("UserVote", back_populates="poll", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Full-text search (PostgreSQL only; SQLite uses an in-memory index)
+        Index("ix_polls_search", search_vector(question), postgresql_using="gin")
+            .ddl_if(dialect="postgresql"),
+        Index("ix_polls_group_id_sync_version", "group_id", "sync_version"),
+    )
+
 class PollOption(Base):
     __tablename__ = "poll_options"
     
@@ -34,6 +45,11 @@ class PollOption(Base):
     poll = relationship("Poll", back_populates="options")
     votes = relationship("UserVote", back_populates="option")
 
+    __table_args__ = (
+        Index("ix_poll_options_search", search_vector(text), postgresql_using="gin")
+            .ddl_if(dialect="postgresql"),
+    )
+
 class UserVote(Base):
     __tablename__ = "poll_user_votes"
     
@@ -47,4 +63,20 @@ class UserVote(Base):
     # Relationships
     poll = relationship("Poll", back_populates="votes")
     option = relationship("PollOption", back_populates="votes")
-    user = relationship("User", back_populates="poll_votes")
\ No newline at end of file
+    user = relationship("User", back_populates="poll_votes")
+
+class ArchivedPoll(Base):
+    # Compact, read-only copy of a closed poll with its final counts frozen.
+    # Options and votes are dropped from the hot tables once archived.
+    __tablename__ = "archived_polls"
+
+    id = Column(UUID(as_uuid=True), primary_key=True)  # Same id as the original poll
+    group_id = Column(UUID(as_uuid=True), ForeignKey("groups.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    question = Column(String, nullable=False)
+    poll_type = Column(String(20), nullable=False)
+    results = Column(JSON, nullable=False)  # [{"option_id", "text", "vote_count"}]
+    total_votes = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True))
+    closed_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
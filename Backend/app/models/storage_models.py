@@ -0,0 +1,33 @@
+from sqlalchemy import Column, String, DateTime, Integer, BigInteger, Text
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class StoredObject(Base):
+    # One row per content-addressed object in attachment storage.
+    # `ref_count` counts the Attachment, GroupAttachment and
+    # ItineraryAttachment rows pointing at the key. At zero the key is queued
+    # in `pending_deletions`; the row stays (ref_count 0) until the deleter
+    # has removed the object, so an upload of the same content in between
+    # simply revives it.
+    __tablename__ = "stored_objects"
+
+    key = Column(String, primary_key=True)
+    sha256 = Column(String(64), nullable=False, unique=True, index=True)
+    size = Column(BigInteger, nullable=False)
+    content_type = Column(String(255))
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class PendingDeletion(Base):
+    # Outbox of storage keys to delete. Rows are written in the same
+    # transaction as the rows that stopped referencing the key and drained
+    # in batches by the storage-deleter job (app/jobs/storage.py).
+    __tablename__ = "pending_deletions"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    key = Column(String, nullable=False, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,26 @@
+from datetime import datetime, timezone
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, BigInteger, Index
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+
+class SyncTombstone(Base):
+    # Marks a synced row (expense, expense split, settlement, itinerary entry
+    # or poll) as deleted at `sync_version`, so GET /group/{id}/sync can tell
+    # offline clients to drop it. Written by app/repository/sync.py.
+    __tablename__ = "sync_tombstones"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    group_id = Column(UUID(as_uuid=True), ForeignKey("groups.id", ondelete="CASCADE"), nullable=False)
+    entity_type = Column(String(30), nullable=False)
+    entity_id = Column(UUID(as_uuid=True), nullable=False)
+    sync_version = Column(BigInteger, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow)
+
+    __table_args__ = (
+        Index("ix_sync_tombstones_group_id_sync_version", group_id, sync_version),
+    )
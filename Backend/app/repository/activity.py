@@ -0,0 +1,180 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from fastapi import HTTPException, status
+from sqlalchemy import BigInteger, Text, and_, cast, event, func, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+from uuid import UUID
+from app.models.activity_models import ActivityEvent, ActivitySequence
+from app.models.group_models import GroupMember
+from app.core.config import settings
+from app.helper.pagination_helper import encode_cursor, decode_cursor
+# Imported for its commit hooks, which must run before ours; see `stamp`
+from app.repository import sync  # noqa: F401
+
+_PENDING_KEY = "activity_pending"
+
+
+def _xid8_to_bigint(expression):
+    # xid8 has no direct cast to bigint; its text form is the plain number
+    return cast(cast(expression, Text), BigInteger)
+
+
+class ActivityRepo:
+    def record(
+        self,
+        db: Session,
+        group_id: UUID,
+        actor_id: Optional[UUID],
+        event_type: str,
+        entity_id: Optional[UUID] = None,
+        payload: Optional[dict] = None
+    ) -> None:
+        """
+        Add an activity event for `group_id`. Not committed, so the event
+        lands in the same transaction as the change it describes.
+        On PostgreSQL the INSERT stamps it with the transaction's id;
+        elsewhere `stamp` numbers it when the transaction commits.
+        """
+        activity_event = ActivityEvent(
+            group_id=group_id,
+            actor_id=actor_id,
+            event_type=event_type,
+            entity_id=entity_id,
+            payload={
+                key: str(value) if isinstance(value, UUID) else float(value) if isinstance(value, Decimal) else value
+                for key, value in (payload or {}).items()
+            } or None
+        )
+        if db.bind.dialect.name == "postgresql":
+            activity_event.xid = _xid8_to_bigint(func.pg_current_xact_id())
+        else:
+            db.info.setdefault(_PENDING_KEY, []).append(activity_event)
+        db.add(activity_event)
+
+    def stamp(self, db: Session) -> None:
+        """
+        Give the events added in this transaction the next value of the
+        ActivitySequence row, for databases without transaction ids. Runs
+        when the transaction commits, after everything else is flushed and
+        the sync versions are stamped; the row stays locked until the
+        commit is done, so events become visible in `xid` order.
+        """
+        activity_events = [
+            activity_event for activity_event in db.info.pop(_PENDING_KEY, [])
+            if activity_event in db
+        ]
+        if not activity_events:
+            return
+
+        db.flush()
+        xid = db.execute(
+            sqlite_insert(ActivitySequence)
+                .values(id=1, value=1)
+                .on_conflict_do_update(
+                    index_elements=[ActivitySequence.id],
+                    set_={"value": ActivitySequence.value + 1}
+                )
+                .returning(ActivitySequence.value)
+        ).scalar()
+        for activity_event in activity_events:
+            activity_event.xid = xid
+
+    def discard(self, db: Session) -> None:
+        db.info.pop(_PENDING_KEY, None)
+
+    def get_feed(
+        self,
+        db: Session,
+        user_id: UUID,
+        since: Optional[str] = None,
+        limit: int = 100
+    ) -> Tuple[List[ActivityEvent], Optional[str]]:
+        """
+        Events in the user's groups after the `since` cursor, oldest first.
+        Returns (events, cursor); the cursor is the position to pass next
+        time and is returned even when nothing new happened. Raises 410 when
+        `since` is older than the retention period, because events after it
+        may already have been pruned.
+
+        On PostgreSQL only events of transactions older than the oldest one
+        still running are served. Transaction ids are handed out when a
+        transaction starts writing, not when it commits, so a newer one may
+        commit first; holding those back keeps an older one from becoming
+        visible behind the cursor. A long-running write delays the feed by
+        as long as it runs.
+        """
+        since_xid = since_id = None
+        if since:
+            since_xid, since_id, since_at = decode_cursor(since, int, int, datetime.fromisoformat)
+            if since_at.tzinfo is None:
+                since_at = since_at.replace(tzinfo=timezone.utc)
+            if since_at < datetime.now(timezone.utc) - timedelta(days=settings.ACTIVITY_RETENTION_DAYS):
+                raise HTTPException(
+                    status_code=status.HTTP_410_GONE,
+                    detail="Cursor is older than the activity retention period; refetch and start over."
+                )
+
+        member_groups = db.query(GroupMember.group_id) \
+            .filter(GroupMember.user_id == user_id)
+        query = db.query(ActivityEvent) \
+            .filter(
+                ActivityEvent.group_id.in_(member_groups),
+                ActivityEvent.xid.isnot(None)
+            )
+        if db.bind.dialect.name == "postgresql":
+            query = query.filter(
+                ActivityEvent.xid < _xid8_to_bigint(func.pg_snapshot_xmin(func.pg_current_snapshot()))
+            )
+        if since_xid is not None:
+            query = query.filter(or_(
+                ActivityEvent.xid > since_xid,
+                and_(ActivityEvent.xid == since_xid, ActivityEvent.id > since_id)
+            ))
+        events = query.order_by(ActivityEvent.xid, ActivityEvent.id).limit(limit).all()
+
+        if events:
+            return events, encode_cursor(events[-1].xid, events[-1].id, events[-1].created_at.isoformat())
+        return events, since
+
+    def compact(self, db: Session, older_than_days: int, batch_size: int) -> int:
+        """
+        Delete up to `batch_size` events older than `older_than_days` and
+        commit. Returns the number of events deleted.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+        expired_ids = [
+            event_id for (event_id,) in db.query(ActivityEvent.id)
+                .filter(ActivityEvent.created_at < cutoff)
+                .order_by(ActivityEvent.id)
+                .limit(batch_size)
+                .all()
+        ]
+        if not expired_ids:
+            db.rollback()
+            return 0
+
+        try:
+            db.query(ActivityEvent) \
+                .filter(ActivityEvent.id.in_(expired_ids)) \
+                .delete(synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return len(expired_ids)
+
+activityrepo = ActivityRepo()
+
+
+@event.listens_for(Session, "before_commit")
+def _stamp_activity_xids(session):
+    activityrepo.stamp(session)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_activity_xids(session, transaction):
+    # Rolled back (or closed) without committing
+    if transaction.parent is None:
+        activityrepo.discard(session)
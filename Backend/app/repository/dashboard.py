@@ -0,0 +1,164 @@
+import asyncio
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from sqlalchemy.orm import Session
+from uuid import UUID
+from fastapi import HTTPException
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.storage import storage
+from app.models.group_models import GroupMember, GroupAttachment
+from app.models.itineraries_model import ItineraryEntry
+from app.models.user_models import User
+from app.api.schemas.group import GroupResponse
+from app.repository.group import grouprepo
+from app.repository.expense import expenserepo
+from app.repository.poll import pollrepo
+from app.repository.user import userrepo
+
+# Shared by all dashboard requests so the sections (each on its own
+# session) can't take more than this many pool connections at once
+dashboard_executor = ThreadPoolExecutor(
+    max_workers=settings.DASHBOARD_WORKERS,
+    thread_name_prefix="dashboard"
+)
+
+@dataclass
+class DashboardLimits:
+    members: int = 100
+    expenses: int = 20
+    polls: int = 20
+    itinerary: int = 50
+    attachments: int = 20
+
+class DashboardRepo:
+    async def get_dashboard(self, group_id: UUID, user_id: UUID, limits: DashboardLimits) -> dict:
+        """
+        Everything the group screen loads, gathered concurrently. The caller
+        has already checked membership. Each section runs on its own session
+        in `dashboard_executor`; a failing section is reported under
+        `errors` instead of failing the whole dashboard.
+        """
+        sections = {
+            "group": (self._group, ()),
+            "members": (self._members, (limits.members,)),
+            "expenses": (self._expenses, (limits.expenses,)),
+            "balances": (self._balances, ()),
+            "polls": (self._polls, (limits.polls,)),
+            "itinerary": (self._itinerary, (limits.itinerary,)),
+            "attachments": (self._attachments, (limits.attachments,)),
+        }
+        loop = asyncio.get_running_loop()
+        # Each section runs in a copy of the request context so request ids
+        # and DB-time accounting carry over to the pool threads
+        results = await asyncio.gather(*(
+            loop.run_in_executor(
+                dashboard_executor,
+                contextvars.copy_context().run,
+                self._run_section, func, group_id, user_id, *args
+            )
+            for func, args in sections.values()
+        ))
+
+        dashboard = {"timings_ms": {}, "errors": {}}
+        for name, (data, elapsed_ms, error) in zip(sections, results):
+            dashboard[name] = data
+            dashboard["timings_ms"][name] = elapsed_ms
+            if error:
+                dashboard["errors"][name] = error
+        return dashboard
+
+    def _run_section(self, func, group_id, user_id, *args):
+        db = SessionLocal()
+        started = time.perf_counter()
+        try:
+            data, error = func(db, group_id, user_id, *args), None
+        except HTTPException as e:
+            db.rollback()
+            data, error = None, str(e.detail)
+        except Exception as e:
+            db.rollback()
+            data, error = None, str(e)
+        finally:
+            db.close()
+        return data, round((time.perf_counter() - started) * 1000, 2), error
+
+    def _group(self, db: Session, group_id, user_id):
+        db_group = grouprepo.get_group_by_id(db, group_id)
+        if not db_group:
+            raise HTTPException(status_code=404, detail="Group not found")
+        is_current_user_admin = bool(grouprepo.is_user_group_admin(db, group_id, user_id))
+        secret_code = None
+        if is_current_user_admin:
+            secret_code = grouprepo.get_or_create_group_secret(db, group_id, user_id)
+        return GroupResponse(
+            id=db_group.id,
+            name=db_group.name,
+            description=db_group.description,
+            created_by=db_group.created_by,
+            created_at=db_group.created_at,
+            updated_at=db_group.updated_at,
+            secret_code=secret_code,
+            is_current_user_admin=is_current_user_admin
+        )
+
+    def _members(self, db: Session, group_id, user_id, limit):
+        members = db.query(GroupMember.user_id, GroupMember.role, User.username, User.email)\
+            .join(User, GroupMember.user_id == User.id)\
+            .filter(GroupMember.group_id == group_id)\
+            .order_by(User.username)\
+            .limit(limit)\
+            .all()
+        return [{
+            "user_id": str(member.user_id),
+            "username": member.username,
+            "email": member.email,
+            "role": member.role,
+        } for member in members]
+
+    def _expenses(self, db: Session, group_id, user_id, limit):
+        return expenserepo.get_group_expenses(db=db, group_id=group_id, skip=0, limit=limit)
+
+    def _balances(self, db: Session, group_id, user_id):
+        return userrepo.get_user_net_balances_in_group(group_id, user_id, db)
+
+    def _polls(self, db: Session, group_id, user_id, limit):
+        return pollrepo.get_polls_by_group(db, group_id, user_id, skip=0, limit=limit)
+
+    def _itinerary(self, db: Session, group_id, user_id, limit):
+        entries = db.query(
+                ItineraryEntry.id,
+                ItineraryEntry.title,
+                ItineraryEntry.day_number,
+                User.username.label("creator_name")
+            )\
+            .join(User, User.id == ItineraryEntry.created_by)\
+            .filter(ItineraryEntry.group_id == group_id)\
+            .order_by(ItineraryEntry.day_number.asc(), ItineraryEntry.position.asc())\
+            .limit(limit)\
+            .all()
+        return [{
+            "id": entry.id,
+            "title": entry.title,
+            "day_number": entry.day_number,
+            "creator_name": entry.creator_name
+        } for entry in entries]
+
+    def _attachments(self, db: Session, group_id, user_id, limit):
+        attachments = db.query(GroupAttachment)\
+            .filter(GroupAttachment.group_id == group_id)\
+            .order_by(GroupAttachment.uploaded_at.desc())\
+            .limit(limit)\
+            .all()
+        return [{
+            "id": attachment.id,
+            "filename": attachment.original_filename,
+            "type": attachment.attachment_type,
+            "uploaded_at": attachment.uploaded_at,
+            "thumbnail_url": storage.presigned_url(attachment.thumbnail_key) if attachment.thumbnail_key else None,
+            "preview_url": storage.presigned_url(attachment.preview_key) if attachment.preview_key else None
+        } for attachment in attachments]
+
+dashboardrepo = DashboardRepo()
@@ -1,13 +1,191 @@
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 from uuid import UUID
-from app.models.expense_models import Expense, Settlement, ExpenseSplit, UserBalance
+from app.models.expense_models import Expense, Settlement, ExpenseSplit, UserBalance, SplitType
 from app.models.group_models import Group, GroupMember
 from app.models.user_models import User
 from typing import Optional, List, Dict, Text
-from app.api.schemas.expenses import ExpenseResponse
+from app.api.schemas.expenses import ExpenseResponse, ExpenseCreate, SplitCreate
+from app.core.storage import storage
+from app.repository.storage import storagerepo
+from app.repository.activity import activityrepo
+from app.repository.sync import syncrepo
+from app.helper.money_helper import to_money, split_equally
+from datetime import datetime
+from decimal import Decimal
+import uuid
 
 class ExpenseRepo:
+    def add_expense(
+        self,
+        db: Session,
+        group_id: UUID,
+        created_by: UUID,
+        payload: ExpenseCreate,
+        expense_id: Optional[UUID] = None
+    ) -> Expense:
+        """
+        Add an expense with its splits and update balances, without
+        committing.
+        """
+        # Validation (unchanged)
+        if payload.split_type == SplitType.CUSTOM:
+            self._validate_custom_splits(payload.splits, payload.total_amount)
+
+        # Create Expense (unchanged)
+        expense = Expense(
+            id=expense_id or uuid.uuid4(),
+            group_id=group_id,
+            created_by=created_by,
+            title=payload.title,
+            description=payload.description,
+            total_amount=to_money(payload.total_amount),
+            split_type=payload.split_type,
+            created_at=datetime.utcnow()
+        )
+        db.add(expense)
+        db.flush()
+
+        # Prepare splits - KEY CHANGE: Include payer but with their actual calculated share
+        splits = []
+        if payload.split_type == SplitType.EQUAL:
+            # Get ALL group members including payer
+            group_users = db.query(GroupMember.user_id).filter_by(group_id=group_id).all()
+            user_ids = sorted((user_id for (user_id,) in group_users), key=str)
+        
+            if len(user_ids) < 2:
+                raise HTTPException(status_code=400, detail="Not enough users in the group to split with.")
+
+            splits = self._equal_splits(expense, user_ids)  # Payer gets their calculated share too
+        else:  # Custom split
+            splits = self._custom_splits(expense, payload.splits)
+
+        db.add_all(splits)
+        db.flush()
+
+        self._update_balances(db, group_id, created_by, splits)
+
+        activityrepo.record(
+            db, group_id, created_by, "expense.created", expense.id,
+            {"title": expense.title, "total_amount": expense.total_amount}
+        )
+        syncrepo.touch(db, group_id, expense, *splits)
+        return expense
+
+    def _validate_custom_splits(self, splits, total_amount) -> None:
+        if not splits or len(splits) == 0:
+            raise HTTPException(status_code=400, detail="Custom split requires non-empty splits list.")
+        total_split = sum(to_money(split.amount) for split in splits)
+        if total_split != to_money(total_amount):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Custom split total ({total_split}) does not match total amount ({total_amount})"
+            )
+
+    def _equal_splits(self, expense: Expense, user_ids) -> List[ExpenseSplit]:
+        # Shares add up to the total exactly; the odd cents rotate between
+        # members from one expense to the next
+        user_ids = sorted(user_ids, key=str)
+        shares = split_equally(expense.total_amount, len(user_ids), offset=expense.id.int % len(user_ids))
+        return [
+            ExpenseSplit(expense_id=expense.id, user_id=user_id, amount=share)
+            for user_id, share in zip(user_ids, shares)
+        ]
+
+    def _custom_splits(self, expense: Expense, splits) -> List[ExpenseSplit]:
+        # Don't filter out payer - include all specified splits
+        return [
+            ExpenseSplit(expense_id=expense.id, user_id=split.user_id, amount=to_money(split.amount))
+            for split in splits
+        ]
+
+    def _update_balances(
+        self,
+        db: Session,
+        group_id: UUID,
+        creditor_id: UUID,
+        splits: List[ExpenseSplit],
+        reverse: bool = False
+    ) -> None:
+        """
+        Add what `splits` owe the payer to the balances, or take it off with
+        `reverse`. What has already been settled is owed back by the payer.
+        """
+        for split in splits:
+            if split.user_id == creditor_id:
+                continue  # Skip balance update for payer
+
+            balance = db.query(UserBalance).filter_by(
+                debtor_id=split.user_id,
+                creditor_id=creditor_id,
+                group_id=group_id
+            ).with_for_update().first()
+
+            if not reverse:
+                if balance:
+                    balance.amount += split.amount
+                else:
+                    db.add(UserBalance(
+                        debtor_id=split.user_id,
+                        creditor_id=creditor_id,
+                        group_id=group_id,
+                        amount=split.amount
+                    ))
+                continue
+
+            if balance and balance.amount >= split.amount:
+                balance.amount -= split.amount
+                continue
+            # Settled (settlements delete the row at zero): refund the difference
+            refund = split.amount - (balance.amount if balance else 0)
+            if balance:
+                db.delete(balance)
+            if refund == 0:
+                continue
+            refund_balance = db.query(UserBalance).filter_by(
+                debtor_id=creditor_id,
+                creditor_id=split.user_id,
+                group_id=group_id
+            ).with_for_update().first()
+            if refund_balance:
+                refund_balance.amount += refund
+            else:
+                db.add(UserBalance(
+                    debtor_id=creditor_id,
+                    creditor_id=split.user_id,
+                    group_id=group_id,
+                    amount=refund
+                ))
+
+    def _reallocate_splits(
+        self,
+        db: Session,
+        expense: Expense,
+        total_amount: Decimal,
+        splits=None
+    ) -> None:
+        """
+        Set a new total on the expense: reverse the balances of its current
+        splits, replace them (equal splits between the same users, or the
+        given custom `splits`) and apply the new ones. Not committed.
+        """
+        old_splits = db.query(ExpenseSplit).filter(ExpenseSplit.expense_id == expense.id).all()
+        self._update_balances(db, expense.group_id, expense.created_by, old_splits, reverse=True)
+        for old_split in old_splits:
+            db.delete(old_split)
+        syncrepo.tombstone(db, expense.group_id, "expense_split", *[old_split.id for old_split in old_splits])
+        db.flush()
+
+        expense.total_amount = total_amount
+        if expense.split_type == SplitType.EQUAL:
+            new_splits = self._equal_splits(expense, [old_split.user_id for old_split in old_splits])
+        else:
+            new_splits = self._custom_splits(expense, splits)
+        db.add_all(new_splits)
+        db.flush()
+        self._update_balances(db, expense.group_id, expense.created_by, new_splits)
+        syncrepo.touch(db, expense.group_id, *new_splits)
+
     def delete_expense(
         self,
         db: Session,
@@ -16,6 +194,18 @@ class ExpenseRepo:
         current_user_id: UUID
     ) -> bool:
         """Returns True if deleted, False if not found"""
+        self.remove_expense(db, group_id, expense_id, current_user_id)
+        db.commit()
+        return {"message": "Expense deleted and balances updated"}
+
+    def remove_expense(
+        self,
+        db: Session,
+        group_id: UUID,
+        expense_id: UUID,
+        current_user_id: UUID
+    ) -> None:
+        """Delete the expense and reverse its balances, without committing"""
         expense = db.query(Expense).filter(Expense.id==expense_id, Expense.group_id == group_id).first()
         if not expense:
             raise HTTPException(
@@ -28,19 +218,17 @@ class ExpenseRepo:
                 detail="You don't have permissions to delete the expense."
             )
         split = db.query(ExpenseSplit).filter(ExpenseSplit.expense_id == expense_id).all()
-        for expense_split in split:  # Each expense_split is an ExpenseSplit object
-            user_id = expense_split.user_id  # Access attributes directly
-            amount = expense_split.amount
-            if user_id != current_user_id:
-                balance = db.query(UserBalance).filter(
-                    UserBalance.debtor_id == user_id,
-                    UserBalance.creditor_id == current_user_id,
-                    UserBalance.group_id == group_id
-                ).one()
-                balance.amount -= amount  
+        self._update_balances(db, group_id, current_user_id, split, reverse=True)
+        # Attachments are deleted with the expense; queue their files too
+        storagerepo.release_many(
+            db, [storage.key_from_url(attachment.file_url) for attachment in expense.attachments]
+        )
+        activityrepo.record(
+            db, group_id, current_user_id, "expense.deleted", expense.id, {"title": expense.title}
+        )
+        syncrepo.tombstone(db, group_id, "expense", expense.id)
+        syncrepo.tombstone(db, group_id, "expense_split", *[expense_split.id for expense_split in split])
         db.delete(expense)
-        db.commit()
-        return {"message": "Expense deleted and balances updated"}
     
     def get_group_expenses(
         self,
@@ -117,7 +305,11 @@ class ExpenseRepo:
         expense_id: UUID,
         update_data: Dict
     ) -> Expense:
-        """Pure database update operation"""
+        """
+        Update the expense. A new total (or new custom splits) re-allocates
+        the splits and moves the balances in the same transaction; a
+        custom-split expense needs its new splits to change its total.
+        """
         expense = db.query(Expense).filter(Expense.id == expense_id).first()
         if not expense:
             raise HTTPException(
@@ -125,9 +317,27 @@ class ExpenseRepo:
                 detail="Expense not found"
             )
 
+        update_data = dict(update_data)
+        splits = update_data.pop("splits", None)
+        total_amount = to_money(update_data.pop("total_amount", expense.total_amount))
+        reallocate = total_amount != expense.total_amount or splits is not None
+        if reallocate and expense.split_type == SplitType.CUSTOM:
+            if splits is None:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Changing the total of a custom split expense requires its new splits."
+                )
+            splits = [SplitCreate(**split) for split in splits]
+            self._validate_custom_splits(splits, total_amount)
+        elif splits is not None:
+            raise HTTPException(status_code=400, detail="Splits can only be set on custom split expenses.")
+
         try:
             for field, value in update_data.items():
                 setattr(expense, field, value)
+            if reallocate:
+                self._reallocate_splits(db, expense, total_amount, splits)
+            syncrepo.touch(db, expense.group_id, expense)
             db.commit()
             db.refresh(expense)
             return expense
@@ -255,35 +465,7 @@ class ExpenseRepo:
         db: Session
     ):
         try:
-            settlement = Settlement(
-                group_id = group_id,
-                paid_by = paid_by,
-                paid_to = paid_to,
-                amount = amount,
-                note =  note,
-            ) 
-            db.add(settlement)
-            user_balance = db.query(UserBalance).filter(
-                UserBalance.group_id == group_id,
-                UserBalance.debtor_id == paid_by,
-                UserBalance.creditor_id == paid_to
-            ).first()
-
-            if not user_balance:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="No previous Balance record found."
-                )
-            if amount > user_balance.amount:
-                raise HTTPException(
-                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                    detail=f"Amount exceeds debt. Max allowed: {user_balance.amount}"
-    )
-            user_balance.amount -= amount
-            if user_balance.amount == 0:
-                db.delete(user_balance)
-            else:
-                db.add(user_balance)
+            settlement = self.add_settlement(group_id, paid_by, paid_to, amount, note, db)
             db.commit()
             db.refresh(settlement)
         except Exception as e:
@@ -292,6 +474,60 @@ class ExpenseRepo:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error while creating a settlement: {str(e)}"
             )
+    def add_settlement(
+        self,
+        group_id: UUID,
+        paid_by: UUID,
+        paid_to: UUID,
+        amount: float,
+        note: Text,
+        db: Session,
+        settlement_id: Optional[UUID] = None
+    ) -> Settlement:
+        """Record a settlement and reduce the balance it pays off, without committing"""
+        amount = to_money(amount)
+        if amount <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Settlement amount must be at least 0.01"
+            )
+        settlement = Settlement(
+            id = settlement_id or uuid.uuid4(),
+            group_id = group_id,
+            paid_by = paid_by,
+            paid_to = paid_to,
+            amount = amount,
+            note =  note,
+        ) 
+        db.add(settlement)
+        user_balance = db.query(UserBalance).filter(
+            UserBalance.group_id == group_id,
+            UserBalance.debtor_id == paid_by,
+            UserBalance.creditor_id == paid_to
+        ).with_for_update().first()
+
+        if not user_balance:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No previous Balance record found."
+            )
+        if amount > user_balance.amount:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Amount exceeds debt. Max allowed: {user_balance.amount}"
+            )
+        user_balance.amount -= amount
+        if user_balance.amount == 0:
+            db.delete(user_balance)
+        else:
+            db.add(user_balance)
+        activityrepo.record(
+            db, group_id, paid_by, "settlement.created", settlement.id,
+            {"paid_to": paid_to, "amount": amount}
+        )
+        syncrepo.touch(db, group_id, settlement)
+        return settlement
+
     def delete_user_settlement(
         self, 
         settlement_id: UUID,
@@ -316,7 +552,7 @@ class ExpenseRepo:
                 UserBalance.group_id == group_id,
                 UserBalance.debtor_id == user_id,
                 UserBalance.creditor_id == settlement.paid_to
-            ).first()
+            ).with_for_update().first()
             if not user_balance:
                 user_balance = UserBalance(
                     debtor_id = user_id,
@@ -326,7 +562,13 @@ class ExpenseRepo:
                 )
             else:
                 user_balance.amount += settlement.amount
+            paid_to = settlement.paid_to
             db.add(user_balance)
+            activityrepo.record(
+                db, group_id, user_id, "settlement.deleted", settlement.id,
+                {"paid_to": paid_to, "amount": settlement.amount}
+            )
+            syncrepo.tombstone(db, group_id, "settlement", settlement.id)
             db.commit()
         except Exception as e:
             db.rollback()
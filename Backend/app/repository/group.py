@@ -2,7 +2,12 @@ from uuid import UUID
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List
-from app.models.group_models import Group, GroupMember, MembershipRole, GroupInvite, JoinRequest, InviteStatus
+from app.models.group_models import Group, GroupMember, MembershipRole, GroupInvite, JoinRequest, InviteStatus, GroupAttachment
+from app.models.expense_models import Expense, Attachment
+from app.models.itineraries_model import ItineraryEntry, ItineraryAttachment
+from app.core.storage import storage
+from app.repository.storage import storagerepo
+from app.repository.activity import activityrepo
 from fastapi import HTTPException, status, Response
 from fastapi.responses import JSONResponse
 from app.api.schemas.group import AddMembersRequest, GroupJoinRequestOut
@@ -159,7 +164,7 @@ class GroupRepo:
         }
     
     async def delete_group(self, group_id, current_user, db):
-        group = db.query(Group).filter(Group.id == group.id).first()
+        group = db.query(Group).filter(Group.id == group_id).first()
         if not group:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -171,6 +176,9 @@ class GroupRepo:
                 detail="You don't have permissions to delete this Group."
             )
         try:
+            # Attachments of the group, its expenses and itinerary entries go
+            # with it (cascade); queue their files in the same transaction
+            storagerepo.release_many(db, self._attachment_keys(db, group_id))
             db.delete(group)
             db.commit()
             return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -181,6 +189,20 @@ class GroupRepo:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Deletion failed: {str(e)}"
             )
+    def _attachment_keys(self, db: Session, group_id: UUID) -> List[str]:
+        group_keys = db.query(GroupAttachment.s3_key).filter(
+            GroupAttachment.group_id == group_id
+        ).all()
+        expense_urls = db.query(Attachment.file_url).join(
+            Expense, Attachment.expense_id == Expense.id
+        ).filter(Expense.group_id == group_id).all()
+        itinerary_urls = db.query(ItineraryAttachment.file_url).join(
+            ItineraryEntry, ItineraryAttachment.entry_id == ItineraryEntry.id
+        ).filter(ItineraryEntry.group_id == group_id).all()
+        return [key for (key,) in group_keys] + [
+            storage.key_from_url(url) for (url,) in expense_urls + itinerary_urls
+        ]
+
     def count_group_admins(
     self,
     db: Session,
@@ -373,6 +395,7 @@ class GroupRepo:
             join_request.processed_by = current_user_id
 
             db.add(new_member)
+            activityrepo.record(db, group_id, current_user_id, "member.joined", user_id)
             db.commit()
             db.refresh(new_member)
             
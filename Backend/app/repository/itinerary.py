@@ -0,0 +1,231 @@
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import Integer, UUID as SqlUUID, cast, column, func, update, values
+from typing import List, Optional, Tuple
+from uuid import UUID
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from app.api.schemas.itineraries import ItineraryEntryPlacement, ItineraryRequest, ItineraryEntryUpdate
+from app.models.itineraries_model import ItineraryEntry
+from app.core.cache import itinerary_plan_cache
+from app.repository.activity import activityrepo
+from app.repository.storage import storagerepo
+from app.repository.sync import syncrepo
+from app.core.storage import storage
+from app.helper.http_helper import compute_etag
+import uuid
+
+class ItineraryRepo:
+    def get_group_plan(self, db: Session, group_id: UUID) -> Tuple[dict, str]:
+        """
+        A group's itinerary grouped by day, with descriptions, creator names
+        and attachment metadata, plus its ETag. Rendered with a single query
+        and cached per group and group version.
+        """
+        version = syncrepo.get_version(db, group_id)
+        cached = itinerary_plan_cache.get(str(group_id), version)
+        if cached is None:
+            plan = jsonable_encoder(self._render_plan(db, group_id))
+            cached = (plan, compute_etag(plan))
+            itinerary_plan_cache.set(str(group_id), version, cached)
+        return cached
+
+    def next_position(self, db: Session, group_id: UUID, day_number: Optional[int]) -> int:
+        """Position that puts a new entry at the end of its day"""
+        query = db.query(func.max(ItineraryEntry.position))\
+            .filter(ItineraryEntry.group_id == group_id)
+        if day_number is None:
+            query = query.filter(ItineraryEntry.day_number.is_(None))
+        else:
+            query = query.filter(ItineraryEntry.day_number == day_number)
+        last = query.scalar()
+        return 0 if last is None else last + 1
+
+    def add_entry(
+        self,
+        db: Session,
+        group_id: UUID,
+        created_by: UUID,
+        entry_data: ItineraryRequest,
+        entry_id: Optional[UUID] = None
+    ) -> ItineraryEntry:
+        """Add an entry at the end of its day, without committing"""
+        new_entry = ItineraryEntry(
+            id=entry_id or uuid.uuid4(),
+            title=entry_data.title,
+            description=entry_data.description,
+            day_number=entry_data.day_number,
+            position=self.next_position(db, group_id, entry_data.day_number),
+            google_maps_link=entry_data.google_maps_link,  # This will be None if not provided
+            group_id=group_id,
+            created_by=created_by,
+        )
+        db.add(new_entry)
+        db.flush()
+        activityrepo.record(
+            db, group_id, created_by, "itinerary.created", new_entry.id,
+            {"title": new_entry.title, "day_number": new_entry.day_number}
+        )
+        syncrepo.touch(db, group_id, new_entry)
+        return new_entry
+
+    def update_entry(
+        self,
+        db: Session,
+        entry: ItineraryEntry,
+        entry_data: ItineraryEntryUpdate,
+        actor_id: UUID
+    ) -> ItineraryEntry:
+        """Apply the fields set in `entry_data`, without committing"""
+        # Update only the fields that were provided
+        if entry_data.title is not None:
+            entry.title = entry_data.title
+        if entry_data.description is not None:
+            entry.description = entry_data.description
+        if entry_data.day_number is not None:
+            entry.day_number = entry_data.day_number
+        if entry_data.position is not None:
+            entry.position = entry_data.position
+        if entry_data.google_maps_link is not None:
+            entry.google_maps_link = entry_data.google_maps_link
+
+        activityrepo.record(
+            db, entry.group_id, actor_id, "itinerary.updated", entry.id, {"title": entry.title}
+        )
+        syncrepo.touch(db, entry.group_id, entry)
+        return entry
+
+    def remove_entry(self, db: Session, entry: ItineraryEntry, actor_id: UUID) -> None:
+        """Delete the entry and release its attachments' files, without committing"""
+        # Attachments go with the entry (cascade); drop their storage references
+        storagerepo.release_many(
+            db, [storage.key_from_url(attachment.file_url) for attachment in entry.attachments]
+        )
+        activityrepo.record(
+            db, entry.group_id, actor_id, "itinerary.deleted", entry.id, {"title": entry.title}
+        )
+        syncrepo.tombstone(db, entry.group_id, "itinerary_entry", entry.id)
+        db.delete(entry)
+
+    def bulk_update_placements(
+        self,
+        db: Session,
+        group_id: UUID,
+        placements: List[ItineraryEntryPlacement],
+        actor_id: Optional[UUID] = None
+    ) -> List[dict]:
+        """
+        Move many entries (day_number and position) at once. Every entry's
+        version must still match what the client saw; otherwise nothing is
+        changed and a 409 lists the conflicting entries. Returns the new
+        versions.
+        """
+        if db.bind.dialect.name == "postgresql":
+            updated = self._update_placements_from_values(db, group_id, placements)
+        else:
+            updated = self._update_placements_per_row(db, group_id, placements)
+
+        if len(updated) != len(placements):
+            db.rollback()
+            updated_ids = {row.id for row in updated}
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={
+                    "message": "Some entries were changed or removed in the meantime",
+                    "conflicts": [str(p.id) for p in placements if p.id not in updated_ids]
+                }
+            )
+
+        activityrepo.record(
+            db, group_id, actor_id, "itinerary.reordered", payload={"entries": len(updated)}
+        )
+        syncrepo.touch_ids(db, group_id, ItineraryEntry, [row.id for row in updated])
+        db.commit()
+        return [{"id": row.id, "version": row.version} for row in updated]
+
+    def _update_placements_from_values(self, db, group_id, placements):
+        # UPDATE ... FROM (VALUES ...): one statement and one round trip for
+        # the whole batch. Casts pin the VALUES column types (a column of
+        # NULL day numbers would otherwise be text).
+        rows = values(
+            column("id", SqlUUID(as_uuid=True)),
+            column("version", Integer),
+            column("day_number", Integer),
+            column("position", Integer),
+            name="placements"
+        ).data([(p.id, p.version, p.day_number, p.position) for p in placements])
+
+        stmt = update(ItineraryEntry)\
+            .where(
+                ItineraryEntry.id == cast(rows.c.id, SqlUUID(as_uuid=True)),
+                ItineraryEntry.version == cast(rows.c.version, Integer),
+                ItineraryEntry.group_id == group_id
+            )\
+            .values(
+                day_number=cast(rows.c.day_number, Integer),
+                position=cast(rows.c.position, Integer),
+                version=ItineraryEntry.version + 1
+            )\
+            .returning(ItineraryEntry.id, ItineraryEntry.version)\
+            .execution_options(synchronize_session=False)
+        return db.execute(stmt).all()
+
+    def _update_placements_per_row(self, db, group_id, placements):
+        # Databases without UPDATE ... FROM (VALUES) column aliases (SQLite)
+        updated = []
+        for p in placements:
+            row = db.execute(
+                update(ItineraryEntry)
+                .where(
+                    ItineraryEntry.id == p.id,
+                    ItineraryEntry.version == p.version,
+                    ItineraryEntry.group_id == group_id
+                )
+                .values(day_number=p.day_number, position=p.position, version=ItineraryEntry.version + 1)
+                .returning(ItineraryEntry.id, ItineraryEntry.version)
+                .execution_options(synchronize_session=False)
+            ).first()
+            if row is not None:
+                updated.append(row)
+        return updated
+
+    def _render_plan(self, db: Session, group_id: UUID) -> dict:
+        entries = db.query(ItineraryEntry)\
+            .options(
+                joinedload(ItineraryEntry.creator),
+                joinedload(ItineraryEntry.attachments)
+            )\
+            .filter(ItineraryEntry.group_id == group_id)\
+            .order_by(ItineraryEntry.day_number, ItineraryEntry.position, ItineraryEntry.title, ItineraryEntry.id)\
+            .all()
+
+        days = {}
+        for entry in entries:
+            days.setdefault(entry.day_number, []).append({
+                "id": entry.id,
+                "title": entry.title,
+                "description": entry.description,
+                "google_maps_link": entry.google_maps_link,
+                "position": entry.position,
+                "version": entry.version,
+                "creator_name": entry.creator.username if entry.creator else None,
+                "attachments": [
+                    {
+                        "id": attachment.id,
+                        "filename": attachment.original_filename,
+                        "file_type": attachment.file_type,
+                        "file_url": attachment.file_url
+                    } for attachment in sorted(
+                        entry.attachments,
+                        key=lambda attachment: (attachment.original_filename or "", str(attachment.id))
+                    )
+                ]
+            })
+
+        # Unscheduled entries (no day_number) go last on every database
+        ordered_days = sorted(days, key=lambda day: (day is None, day or 0))
+        return {
+            "group_id": group_id,
+            "days": [{"day_number": day, "entries": days[day]} for day in ordered_days]
+        }
+
+itineraryrepo = ItineraryRepo()
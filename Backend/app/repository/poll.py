@@ -1,11 +1,14 @@
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
+from sqlalchemy import func, or_, and_
 from app.api.schemas.poll import PollCreate, UserVoteCreate
-from app.models.poll_models import Poll, PollOption, UserVote
+from app.models.poll_models import Poll, PollOption, UserVote, ArchivedPoll
 from app.models.group_models import GroupMember, MembershipRole, Group
 from app.models.user_models import User
-import datetime
+from app.core.cache import poll_list_cache
+from app.repository.activity import activityrepo
+from app.repository.sync import syncrepo
+from datetime import datetime, timedelta, timezone
 from uuid import UUID
 import uuid
 
@@ -23,7 +26,8 @@ class PollRepo():
                 poll_type=poll_data.poll_type,
                 group_id=poll_data.group_id,
                 created_by=current_user_id,
-                is_active=poll_data.is_active
+                is_active=poll_data.is_active,
+                closes_at=poll_data.closes_at
             )
             db.add(db_poll)
             for option_text in poll_data.options:
@@ -33,6 +37,11 @@ class PollRepo():
                     poll_id = db_poll.id,
                 )
                 db.add(db_poll_option)
+            activityrepo.record(
+                db, db_poll.group_id, current_user_id, "poll.created", db_poll.id,
+                {"question": db_poll.question}
+            )
+            syncrepo.touch(db, db_poll.group_id, db_poll)
             db.commit()
             db.refresh(db_poll)
             return db_poll
@@ -94,6 +103,10 @@ class PollRepo():
             skip: int = 0, 
             limit: int = 100,
         ):
+            """
+            List a group's polls. The rendered list is cached per group and
+            group version; only `can_delete` is computed per request.
+            """
             try:
                 # Check if current user is admin of the group
                 user_membership = db.query(GroupMember)\
@@ -101,37 +114,78 @@ class PollRepo():
                     .filter(GroupMember.user_id == current_user_id)\
                     .first()
                 
-                is_admin = user_membership and user_membership.role == MembershipRole.ADMIN
-                
-                # Get polls with options
-                polls = db.query(Poll)\
-                    .options(joinedload(Poll.options))\
-                    .filter(Poll.group_id == group_id)\
-                    .offset(skip)\
-                    .limit(limit)\
-                    .all()
-                
-                # Calculate vote counts and map field names for each option
-                for poll in polls:
-                    # Check if current user can delete this poll
-                    poll.can_delete = (poll.created_by == current_user_id) or is_admin
-                    
-                    for option in poll.options:
-                        # Calculate vote count
-                        vote_count = db.query(func.count(UserVote.id))\
-                            .filter(UserVote.option_id == option.id)\
-                            .scalar()
-                        option.vote_count = vote_count or 0
-                        
-                        # Map field name for Pydantic model
-                        option.option_text = option.text
-                
-                return polls
+                is_admin = bool(user_membership and user_membership.role == MembershipRole.ADMIN)
+
+                cache_key = (str(group_id), skip, limit)
+                version = syncrepo.get_version(db, group_id)
+                polls = poll_list_cache.get(cache_key, version)
+                if polls is None:
+                    polls = self._render_group_polls(db, group_id, skip, limit)
+                    poll_list_cache.set(cache_key, version, polls)
+
+                # Overlay the per-user flag on top of the shared rendering
+                return [
+                    {
+                        **poll,
+                        "can_delete": poll["created_by"] == current_user_id or is_admin
+                    } for poll in polls
+                ]
             except Exception as e:
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail=f"Error while fetching polls by group: {str(e)}"
                 )
+
+    def _render_group_polls(
+            self,
+            db: Session,
+            group_id: str,
+            skip: int,
+            limit: int,
+        ):
+            """Build the user-independent part of the group poll list"""
+            # Get polls with options
+            polls = db.query(Poll)\
+                .options(joinedload(Poll.options))\
+                .filter(Poll.group_id == group_id)\
+                .offset(skip)\
+                .limit(limit)\
+                .all()
+
+            # Count votes for every option of the page in one grouped query
+            option_ids = [option.id for poll in polls for option in poll.options]
+            vote_counts = {}
+            if option_ids:
+                vote_counts = dict(
+                    db.query(UserVote.option_id, func.count(UserVote.id))
+                    .filter(UserVote.option_id.in_(option_ids))
+                    .group_by(UserVote.option_id)
+                    .all()
+                )
+
+            return [
+                {
+                    "id": poll.id,
+                    "question": poll.question,
+                    "poll_type": poll.poll_type,
+                    "group_id": poll.group_id,
+                    "created_by": poll.created_by,
+                    "is_active": poll.is_active,
+                    "closes_at": poll.closes_at,
+                    "created_at": poll.created_at,
+                    "updated_at": poll.updated_at,
+                    "options": [
+                        {
+                            "id": option.id,
+                            # Map field name for Pydantic model
+                            "option_text": option.text,
+                            "poll_id": option.poll_id,
+                            "created_at": option.created_at,
+                            "vote_count": vote_counts.get(option.id, 0)
+                        } for option in poll.options
+                    ]
+                } for poll in polls
+            ]
     
     def create_or_update_vote(
         self,
@@ -157,6 +211,8 @@ class PollRepo():
         
         if existing_vote:
             existing_vote.updated_at = datetime.utcnow()
+            if poll:
+                self._record_vote(db, poll, vote, current_user_id)
             db.commit()
             db.refresh(existing_vote)
             return existing_vote
@@ -169,10 +225,20 @@ class PollRepo():
             option_id=vote.option_id
         )
         db.add(db_vote)
+        if poll:
+            self._record_vote(db, poll, vote, current_user_id)
         db.commit()
         db.refresh(db_vote)
         return db_vote
     
+    def _record_vote(self, db: Session, poll: Poll, vote: UserVoteCreate, current_user_id: UUID):
+        activityrepo.record(
+            db, poll.group_id, current_user_id, "poll.voted", poll.id,
+            {"question": poll.question, "option_id": vote.option_id}
+        )
+        # Synced polls carry their vote counts
+        syncrepo.touch(db, poll.group_id, poll)
+
     def get_poll_voters(
         self,
         db: Session,
@@ -193,6 +259,8 @@ class PollRepo():
         db_poll = db.query(Poll).filter(Poll.id == poll_id).first()
         if db_poll:
             db_poll.is_active = is_active
+            db_poll.closed_at = None if is_active else datetime.now(timezone.utc)
+            syncrepo.touch(db, db_poll.group_id, db_poll)
             db.commit()
             db.refresh(db_poll)
         return db_poll
@@ -246,6 +314,8 @@ class PollRepo():
                     )
                 
                 # Delete the poll (cascade will handle options and votes)
+                group_id = poll.group_id
+                syncrepo.tombstone(db, group_id, "poll", poll.id)
                 db.delete(poll)
                 db.commit()
                 
@@ -260,4 +330,129 @@ class PollRepo():
                     detail=f"Error while deleting poll: {str(e)}"
                 )
 
+    def close_expired_polls(self, db: Session, batch_size: int = 500) -> int:
+        """
+        Deactivate polls whose `closes_at` has passed, `batch_size` at a time.
+        Returns the number of polls closed.
+        """
+        closed = 0
+        while True:
+            now = datetime.now(timezone.utc)
+            expired = db.query(Poll.id, Poll.group_id).filter(
+                Poll.is_active == True,
+                Poll.closes_at.isnot(None),
+                Poll.closes_at <= now
+            ).limit(batch_size).all()
+            if not expired:
+                break
+
+            try:
+                db.query(Poll).filter(
+                    Poll.id.in_([poll.id for poll in expired])
+                ).update(
+                    {Poll.is_active: False, Poll.closed_at: now},
+                    synchronize_session=False
+                )
+                for poll in expired:
+                    syncrepo.touch_ids(db, poll.group_id, Poll, [poll.id])
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+
+            closed += len(expired)
+            if len(expired) < batch_size:
+                break
+        return closed
+
+    def archive_closed_polls(
+        self,
+        db: Session,
+        older_than_days: int = 30,
+        batch_size: int = 500
+    ) -> int:
+        """
+        Move polls closed more than `older_than_days` ago into `archived_polls`
+        with their final counts frozen, then drop their options and votes.
+        Polls closed before `closed_at` was recorded fall back to their last
+        update. Returns the number of polls archived.
+        """
+        archived = 0
+        cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+        while True:
+            polls = db.query(Poll)\
+                .options(joinedload(Poll.options))\
+                .filter(Poll.is_active == False)\
+                .filter(or_(
+                    Poll.closed_at <= cutoff,
+                    and_(Poll.closed_at.is_(None), Poll.updated_at <= cutoff)
+                ))\
+                .limit(batch_size)\
+                .all()
+            if not polls:
+                break
+
+            poll_ids = [poll.id for poll in polls]
+            vote_counts = dict(
+                db.query(UserVote.option_id, func.count(UserVote.id))
+                .filter(UserVote.poll_id.in_(poll_ids))
+                .group_by(UserVote.option_id)
+                .all()
+            )
+
+            try:
+                for poll in polls:
+                    results = [
+                        {
+                            "option_id": str(option.id),
+                            "text": option.text,
+                            "vote_count": vote_counts.get(option.id, 0)
+                        } for option in poll.options
+                    ]
+                    db.add(ArchivedPoll(
+                        id=poll.id,
+                        group_id=poll.group_id,
+                        created_by=poll.created_by,
+                        question=poll.question,
+                        poll_type=poll.poll_type,
+                        results=results,
+                        total_votes=sum(result["vote_count"] for result in results),
+                        created_at=poll.created_at,
+                        closed_at=poll.closed_at or poll.updated_at
+                    ))
+
+                db.query(UserVote).filter(UserVote.poll_id.in_(poll_ids))\
+                    .delete(synchronize_session=False)
+                db.query(PollOption).filter(PollOption.poll_id.in_(poll_ids))\
+                    .delete(synchronize_session=False)
+                db.query(Poll).filter(Poll.id.in_(poll_ids))\
+                    .delete(synchronize_session=False)
+                # Archived polls leave the synced set
+                for poll in polls:
+                    syncrepo.tombstone(db, poll.group_id, "poll", poll.id)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+
+            db.expunge_all()
+            archived += len(poll_ids)
+            if len(poll_ids) < batch_size:
+                break
+        return archived
+
+    def get_archived_polls(
+        self,
+        db: Session,
+        group_id: UUID,
+        skip: int = 0,
+        limit: int = 100
+    ):
+        return db.query(ArchivedPoll)\
+            .filter(ArchivedPoll.group_id == group_id)\
+            .order_by(ArchivedPoll.closed_at.desc())\
+            .offset(skip)\
+            .limit(limit)\
+            .all()
+
 pollrepo = PollRepo()
\ No newline at end of file
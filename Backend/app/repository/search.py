@@ -0,0 +1,104 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, literal, select, union_all
+from typing import List
+from uuid import UUID
+from app.models.expense_models import Expense
+from app.models.itineraries_model import ItineraryEntry
+from app.models.poll_models import Poll, PollOption
+from app.helper.search_helper import InvertedIndex, search_query, search_vector
+
+class SearchRepo:
+    def search_group(
+        self,
+        db: Session,
+        group_id: UUID,
+        q: str,
+        skip: int = 0,
+        limit: int = 20
+    ) -> List[dict]:
+        """
+        Ranked search over a group's expenses, itinerary entries and polls
+        (question and option texts). Uses the tsvector GIN indexes on
+        PostgreSQL and an in-memory inverted index elsewhere.
+        """
+        if db.bind.dialect.name == "postgresql":
+            return self._search_postgres(db, group_id, q, skip, limit)
+        return self._search_in_memory(db, group_id, q, skip, limit)
+
+    def _search_postgres(self, db, group_id, q, skip, limit):
+        query = search_query(q)
+
+        expense_vector = search_vector(Expense.title, Expense.description)
+        expenses = select(
+            literal("expense").label("type"),
+            Expense.id.label("id"),
+            Expense.title.label("title"),
+            func.ts_rank(expense_vector, query).label("rank")
+        ).where(Expense.group_id == group_id, expense_vector.op("@@")(query))
+
+        entry_vector = search_vector(ItineraryEntry.title, ItineraryEntry.description)
+        entries = select(
+            literal("itinerary_entry").label("type"),
+            ItineraryEntry.id.label("id"),
+            ItineraryEntry.title.label("title"),
+            func.ts_rank(entry_vector, query).label("rank")
+        ).where(ItineraryEntry.group_id == group_id, entry_vector.op("@@")(query))
+
+        # A poll matches on its question or on any option; it ranks by its best match
+        question_vector = search_vector(Poll.question)
+        option_vector = search_vector(PollOption.text)
+        poll_matches = union_all(
+            select(Poll.id.label("poll_id"), func.ts_rank(question_vector, query).label("rank"))
+                .where(Poll.group_id == group_id, question_vector.op("@@")(query)),
+            select(Poll.id.label("poll_id"), func.ts_rank(option_vector, query).label("rank"))
+                .join(PollOption, PollOption.poll_id == Poll.id)
+                .where(Poll.group_id == group_id, option_vector.op("@@")(query))
+        ).subquery()
+        polls = select(
+            literal("poll").label("type"),
+            Poll.id.label("id"),
+            Poll.question.label("title"),
+            func.max(poll_matches.c.rank).label("rank")
+        ).join(poll_matches, poll_matches.c.poll_id == Poll.id).group_by(Poll.id, Poll.question)
+
+        results = union_all(expenses, entries, polls).subquery()
+        rows = db.execute(
+            select(results)
+            .order_by(results.c.rank.desc(), results.c.id)
+            .offset(skip)
+            .limit(limit)
+        ).all()
+        return [
+            {"type": row.type, "id": row.id, "title": row.title, "rank": float(row.rank)}
+            for row in rows
+        ]
+
+    def _search_in_memory(self, db, group_id, q, skip, limit):
+        index = InvertedIndex()
+        titles = {}
+
+        for expense in db.query(Expense.id, Expense.title, Expense.description)\
+                .filter(Expense.group_id == group_id):
+            titles[("expense", expense.id)] = expense.title
+            index.add(("expense", expense.id), expense.title, expense.description)
+
+        for entry in db.query(ItineraryEntry.id, ItineraryEntry.title, ItineraryEntry.description)\
+                .filter(ItineraryEntry.group_id == group_id):
+            titles[("itinerary_entry", entry.id)] = entry.title
+            index.add(("itinerary_entry", entry.id), entry.title, entry.description)
+
+        option_texts = {}
+        for option in db.query(PollOption.poll_id, PollOption.text)\
+                .join(Poll, Poll.id == PollOption.poll_id)\
+                .filter(Poll.group_id == group_id):
+            option_texts.setdefault(option.poll_id, []).append(option.text)
+        for poll in db.query(Poll.id, Poll.question).filter(Poll.group_id == group_id):
+            titles[("poll", poll.id)] = poll.question
+            index.add(("poll", poll.id), poll.question, *option_texts.get(poll.id, []))
+
+        return [
+            {"type": doc_type, "id": doc_id, "title": titles[(doc_type, doc_id)], "rank": score}
+            for (doc_type, doc_id), score in index.search(q)[skip:skip + limit]
+        ]
+
+searchrepo = SearchRepo()
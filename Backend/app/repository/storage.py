@@ -0,0 +1,217 @@
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from typing import Iterable, Optional, Set, Tuple
+from app.models.storage_models import StoredObject, PendingDeletion
+from app.core.config import settings
+from app.core.storage import storage
+from app.helper.storage_helper import hash_fileobj, build_content_key
+from app.helper.image_helper import VARIANT_SIZES, variant_key
+from logger import logger
+
+class StorageRepo:
+    def acquire(
+        self,
+        db: Session,
+        sha256: str,
+        size: int,
+        original_filename: str,
+        content_type: Optional[str]
+    ) -> Tuple[StoredObject, bool]:
+        """
+        Take a reference on the object with this content hash, creating its
+        row if it is not stored yet. Returns (stored_object, is_new); when
+        `is_new` the caller still has to write the body to storage.
+        Not committed, so the reference lands with the caller's rows.
+
+        A single INSERT ... ON CONFLICT DO UPDATE, so concurrent first
+        uploads of the same content serialise on the unique sha256 instead
+        of both inserting. A row nothing else references (just created, or
+        left at zero for the deleter) counts as new: its body may already
+        be gone, so it is written again.
+        """
+        insert = postgresql_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+        statement = insert(StoredObject).values(
+            key=build_content_key(sha256, original_filename),
+            sha256=sha256,
+            size=size,
+            content_type=content_type,
+            ref_count=1
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[StoredObject.sha256],
+            set_={"ref_count": StoredObject.ref_count + 1}
+        ).returning(StoredObject)
+        stored_object = db.scalars(
+            statement,
+            execution_options={"populate_existing": True}
+        ).one()
+        return stored_object, stored_object.ref_count == 1
+
+    def release(self, db: Session, key: str) -> bool:
+        """
+        Drop one reference to `key`. Returns True when nothing references the
+        object any more, in which case its deletion has been queued in the
+        same transaction. Keys stored before deduplication have no row and are
+        always owned by a single attachment.
+        """
+        return key in self.release_many(db, [key])
+
+    def release_many(self, db: Session, keys: Iterable[str]) -> Set[str]:
+        """
+        `release` for many keys with one locking query; a key listed twice
+        drops two references. Returns the keys queued for deletion.
+        """
+        counts = Counter(key for key in keys if key)
+        if not counts:
+            return set()
+
+        stored_objects = {
+            stored_object.key: stored_object
+            for stored_object in db.query(StoredObject).filter(
+                StoredObject.key.in_(list(counts))
+            ).with_for_update().all()
+        }
+
+        orphaned = set()
+        for key, count in counts.items():
+            stored_object = stored_objects.get(key)
+            if stored_object:
+                stored_object.ref_count = max(stored_object.ref_count - count, 0)
+                if stored_object.ref_count > 0:
+                    continue
+            orphaned.add(key)
+
+        self.enqueue_deletion(db, orphaned)
+        return orphaned
+
+    def enqueue_deletion(self, db: Session, keys: Iterable[str]) -> None:
+        """Queue `keys` for the storage-deleter job. Not committed."""
+        db.add_all([PendingDeletion(key=key) for key in keys])
+        db.flush()
+
+    def purge_if_unreferenced(self, db: Session, key: str) -> bool:
+        """
+        Queue `key` for deletion if nothing references it, and commit. Used to
+        clean up objects uploaded by a request whose transaction was rolled
+        back.
+        """
+        stored_object = db.query(StoredObject).filter(
+            StoredObject.key == key
+        ).with_for_update().first()
+        if stored_object and stored_object.ref_count > 0:
+            db.rollback()
+            return False
+
+        try:
+            self.enqueue_deletion(db, [key])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return True
+
+    def process_pending_deletions(self, db: Session, batch_size: int) -> int:
+        """
+        Delete up to `batch_size` queued keys, with their image variants, from
+        storage and commit. Keys whose StoredObject was revived in the
+        meantime are dropped from the queue without touching storage; failed
+        deletes are retried with exponential backoff. Returns the number of
+        queue entries processed.
+        """
+        now = datetime.now(timezone.utc)
+        entries = db.query(PendingDeletion).filter(
+            PendingDeletion.next_attempt_at <= now
+        ).order_by(PendingDeletion.id).limit(batch_size).with_for_update(skip_locked=True).all()
+        if not entries:
+            db.rollback()
+            return 0
+
+        keys = {entry.key for entry in entries}
+        # Same row lock as `acquire`, so a re-upload of the same content
+        # either revives the row before we look or re-creates it afterwards
+        stored_objects = {
+            stored_object.key: stored_object
+            for stored_object in db.query(StoredObject).filter(
+                StoredObject.key.in_(list(keys))
+            ).with_for_update().all()
+        }
+        to_delete = {
+            key for key in keys
+            if key not in stored_objects or stored_objects[key].ref_count == 0
+        }
+
+        object_keys = {
+            key: [key] + [variant_key(key, variant) for variant in VARIANT_SIZES]
+            for key in to_delete
+        }
+        errors = storage.delete_many(
+            [object_key for group in object_keys.values() for object_key in group]
+        ) if object_keys else {}
+        failed = {
+            key: next(errors[object_key] for object_key in group if object_key in errors)
+            for key, group in object_keys.items()
+            if any(object_key in errors for object_key in group)
+        }
+
+        try:
+            for entry in entries:
+                if entry.key in failed:
+                    entry.attempts += 1
+                    entry.last_error = failed[entry.key]
+                    entry.next_attempt_at = now + timedelta(seconds=min(
+                        settings.STORAGE_DELETE_RETRY_BASE_SECONDS * 2 ** (entry.attempts - 1),
+                        settings.STORAGE_DELETE_RETRY_MAX_SECONDS
+                    ))
+                else:
+                    db.delete(entry)
+            for key in to_delete - set(failed):
+                if key in stored_objects:
+                    db.delete(stored_objects[key])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        if failed:
+            logger.log_message(
+                "WARN",
+                f"Failed to delete {len(failed)} storage objects, will retry",
+                {"data": {"keys": list(failed)[:10]}}
+            )
+        return len(entries)
+
+    def store_file(
+        self,
+        db: Session,
+        fileobj,
+        original_filename: str,
+        content_type: Optional[str]
+    ) -> Tuple[str, str, bool]:
+        """
+        Hash `fileobj`, take a reference on its content and upload it only if
+        the content is not stored yet. Returns (key, url, uploaded).
+        """
+        sha256, size = hash_fileobj(fileobj)
+        stored_object, is_new = self.acquire(db, sha256, size, original_filename, content_type)
+        if is_new:
+            storage.save(fileobj, original_filename, content_type, key=stored_object.key)
+        return stored_object.key, storage.get_url(stored_object.key), is_new
+
+    async def astore_file(
+        self,
+        db: Session,
+        fileobj,
+        original_filename: str,
+        content_type: Optional[str]
+    ) -> Tuple[str, str, bool]:
+        """`store_file` with hashing and upload run off the event loop"""
+        sha256, size = await storage.run(hash_fileobj, fileobj)
+        stored_object, is_new = self.acquire(db, sha256, size, original_filename, content_type)
+        if is_new:
+            await storage.asave(fileobj, original_filename, content_type, key=stored_object.key)
+        return stored_object.key, storage.get_url(stored_object.key), is_new
+
+storagerepo = StorageRepo()
@@ -0,0 +1,198 @@
+import itertools
+from collections import defaultdict
+from sqlalchemy import event, func, update
+from sqlalchemy.orm import Session, joinedload
+from typing import Optional
+from uuid import UUID
+from app.models.group_models import Group
+from app.models.expense_models import Expense, ExpenseSplit, Settlement
+from app.models.itineraries_model import ItineraryEntry
+from app.models.poll_models import Poll, UserVote
+from app.models.sync_models import SyncTombstone
+
+_PENDING_KEY = "sync_pending"
+
+
+class SyncRepo:
+    """
+    Group versions, for delta sync (GET /group/{group_id}/sync) and for
+    everything else that needs to know whether a group changed: ETags (see
+    app/helper/http_helper.py) and the caches in app/core/cache.py.
+
+    Write paths mark the synced rows they create or change with `touch` and
+    the ones they delete with `tombstone`, before committing. Any other row
+    with a `group_id` that is flushed marks its group on its own (see
+    `collect`). When the transaction commits, each marked group gets its
+    `Group.sync_version` incremented once and the marked rows are stamped
+    with the new value. The increment takes the group's row lock at the very
+    end of the transaction, so versions are handed out in commit order: a
+    client that has seen version N has seen every change up to N.
+    """
+
+    def touch(self, db: Session, group_id: UUID, *rows) -> None:
+        """
+        Mark ORM rows of `group_id` as created or changed. Not committed.
+        Without rows it only bumps the group's version, for writes to rows
+        that have no `group_id` of their own (e.g. expense attachments).
+        """
+        self._pending(db, group_id)["rows"].extend(rows)
+
+    def touch_ids(self, db: Session, group_id: UUID, model, ids) -> None:
+        """`touch` for rows changed with bulk statements, by primary key"""
+        self._pending(db, group_id)["ids"][model].update(ids)
+
+    def tombstone(self, db: Session, group_id: UUID, entity_type: str, *entity_ids) -> None:
+        """Mark rows of `group_id` as deleted. Not committed."""
+        self._pending(db, group_id)["tombstones"].extend(
+            (entity_type, entity_id) for entity_id in entity_ids
+        )
+
+    def _pending(self, db: Session, group_id: UUID) -> dict:
+        pending = db.info.setdefault(_PENDING_KEY, {})
+        return pending.setdefault(group_id, {"rows": [], "ids": defaultdict(set), "tombstones": []})
+
+    def collect(self, db: Session) -> None:
+        """Mark the groups of the rows about to be flushed"""
+        changed = [row for row in db.dirty if db.is_modified(row)]
+        for row in itertools.chain(db.new, changed, db.deleted):
+            group_id = row.id if isinstance(row, Group) else getattr(row, "group_id", None)
+            if group_id is not None:
+                self._pending(db, group_id)
+
+    def stamp(self, db: Session) -> None:
+        """Give the groups changed in this transaction, and their marked rows, the next version"""
+        db.flush()
+        pending = db.info.pop(_PENDING_KEY, None)
+        if not pending:
+            return
+
+        for group_id, changes in pending.items():
+            version = db.execute(
+                update(Group)
+                    .where(Group.id == group_id)
+                    # Keep `updated_at` for changes to the group itself
+                    .values(sync_version=Group.sync_version + 1, updated_at=Group.updated_at)
+                    .returning(Group.sync_version),
+                execution_options={"synchronize_session": False}
+            ).scalar()
+            if version is None:
+                continue  # The group was deleted in this transaction
+
+            ids = changes["ids"]
+            for row in changes["rows"]:
+                ids[type(row)].add(row.id)
+            for model, model_ids in ids.items():
+                if model_ids:
+                    db.execute(
+                        update(model)
+                            .where(model.id.in_(list(model_ids)))
+                            .values(sync_version=version),
+                        execution_options={"synchronize_session": False}
+                    )
+            db.add_all([
+                SyncTombstone(group_id=group_id, entity_type=entity_type, entity_id=entity_id, sync_version=version)
+                for entity_type, entity_id in changes["tombstones"]
+            ])
+
+    def discard(self, db: Session) -> None:
+        db.info.pop(_PENDING_KEY, None)
+
+    def get_version(self, db: Session, group_id: UUID) -> int:
+        """The group's committed version, for cache keys and ETags"""
+        return db.query(Group.sync_version).filter(Group.id == group_id).scalar() or 0
+
+    def get_changes(self, db: Session, group_id: UUID, since_version: Optional[int] = None) -> dict:
+        """
+        Synced rows of the group changed after `since_version`, plus
+        tombstones for the ones deleted since. Without a version (or with one
+        the server has not reached, e.g. after a database restore) returns
+        every row and `full` is set, meaning the client should replace its
+        copy rather than merge.
+        """
+        # Read first: rows committed after this are at a higher version and
+        # are returned again on the next sync
+        version = self.get_version(db, group_id)
+        full = not since_version or since_version > version
+
+        def changed(query, model):
+            return query if full else query.filter(model.sync_version > since_version)
+
+        expenses = changed(db.query(Expense).filter(Expense.group_id == group_id), Expense) \
+            .order_by(Expense.sync_version) \
+            .all()
+        expense_splits = changed(
+            db.query(ExpenseSplit)
+                .join(Expense, ExpenseSplit.expense_id == Expense.id)
+                .filter(Expense.group_id == group_id),
+            ExpenseSplit
+        ).order_by(ExpenseSplit.sync_version).all()
+        settlements = changed(db.query(Settlement).filter(Settlement.group_id == group_id), Settlement) \
+            .order_by(Settlement.sync_version) \
+            .all()
+        itinerary_entries = changed(
+            db.query(ItineraryEntry).filter(ItineraryEntry.group_id == group_id), ItineraryEntry
+        ).order_by(ItineraryEntry.sync_version).all()
+        polls = changed(
+            db.query(Poll).options(joinedload(Poll.options)).filter(Poll.group_id == group_id), Poll
+        ).order_by(Poll.sync_version).all()
+
+        vote_counts = dict(
+            db.query(UserVote.option_id, func.count(UserVote.id))
+                .filter(UserVote.poll_id.in_([poll.id for poll in polls]))
+                .group_by(UserVote.option_id)
+                .all()
+        ) if polls else {}
+
+        deleted = [] if full else db.query(SyncTombstone) \
+            .filter(SyncTombstone.group_id == group_id, SyncTombstone.sync_version > since_version) \
+            .order_by(SyncTombstone.sync_version) \
+            .all()
+
+        return {
+            "version": version,
+            "full": full,
+            "expenses": expenses,
+            "expense_splits": expense_splits,
+            "settlements": settlements,
+            "itinerary_entries": itinerary_entries,
+            "polls": [
+                {
+                    "id": poll.id,
+                    "group_id": poll.group_id,
+                    "created_by": poll.created_by,
+                    "question": poll.question,
+                    "poll_type": poll.poll_type,
+                    "is_active": poll.is_active,
+                    "closes_at": poll.closes_at,
+                    "closed_at": poll.closed_at,
+                    "created_at": poll.created_at,
+                    "updated_at": poll.updated_at,
+                    "sync_version": poll.sync_version,
+                    "options": [
+                        {"id": option.id, "text": option.text, "vote_count": vote_counts.get(option.id, 0)}
+                        for option in poll.options
+                    ]
+                }
+                for poll in polls
+            ],
+            "deleted": deleted
+        }
+
+syncrepo = SyncRepo()
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_sync_versions(session, flush_context, instances):
+    syncrepo.collect(session)
+
+
+@event.listens_for(Session, "before_commit")
+def _stamp_sync_versions(session):
+    syncrepo.stamp(session)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_sync_versions(session, transaction):
+    # Rolled back (or closed) without committing
+    if transaction.parent is None:
+        syncrepo.discard(session)
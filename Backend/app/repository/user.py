@@ -1,11 +1,18 @@
+from sqlalchemy import and_, case, func, or_, select, union_all
 from sqlalchemy.orm import Session
 from fastapi.responses import JSONResponse
 from fastapi import status, HTTPException
 from uuid import UUID
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
 from collections import defaultdict
+from decimal import Decimal
 from app.models.group_models import Group, GroupMember
-from app.models.expense_models import UserBalance
+from app.models.expense_models import Expense, Settlement, UserBalance
+from app.models.poll_models import Poll
 from app.models.user_models import User
+from app.core.cache import user_balance_cache
+from app.helper.pagination_helper import encode_cursor, decode_cursor
 
 class UserRepo:
     def get_user_balances(
@@ -13,56 +20,58 @@ class UserRepo:
         current_user_id: UUID,
         db: Session
     ):
-        group_ids = [g.group_id for g in db.query(GroupMember.group_id).filter_by(
-            user_id=current_user_id
-        ).all()]
-
-        if not group_ids:
-            return []
-
-        # 2. Get all relevant balances (both directions)
-        balances = db.query(UserBalance).filter(
-            UserBalance.group_id.in_(group_ids),
-            (UserBalance.debtor_id == current_user_id) | 
-            (UserBalance.creditor_id == current_user_id)
-        ).all()
-
-        # 3. Calculate net amounts per user per group
-        net_balances = defaultdict(lambda: defaultdict(float))
-        
-        for b in balances:
-            if b.debtor_id == current_user_id:
-                other_user = b.creditor_id
-                net_balances[b.group_id][other_user] -= b.amount  # You owe
-            else:
-                other_user = b.debtor_id
-                net_balances[b.group_id][other_user] += b.amount  # They owe
-
-        # 4. Fetch all needed names in 2 queries
-        user_ids = {uid for group in net_balances.values() for uid in group.keys()}
-        users = {u.id: u.username for u in db.query(User.id, User.username).filter(
-            User.id.in_(user_ids)
-        ).all()}
-
-        groups = {g.id: g.name for g in db.query(Group.id, Group.name).filter(
-            Group.id.in_(group_ids)
-        ).all()}
-
-        # 5. Format response
-        balance_data = []
-        for group_id, user_balances in net_balances.items():
-            for other_user_id, amount in user_balances.items():
-                if amount == 0:  # Skip settled balances
-                    continue
-                    
-                balance_data.append({
-                    "group_name": groups[group_id],
-                    "other_user_name": users[other_user_id],
-                    "net_amount": abs(amount),
-                    "direction": "owes_you" if amount > 0 else "you_owe"
-                })
+        """
+        Net balance against every other user in each of the user's groups.
+        Cached per user until one of their groups changes or they join or
+        leave one: the cache key's version is the (group, version) pairs of
+        their groups.
+        """
+        version = tuple(
+            db.query(Group.id, Group.sync_version)
+                .join(GroupMember, GroupMember.group_id == Group.id)
+                .filter(GroupMember.user_id == current_user_id)
+                .order_by(Group.id)
+                .all()
+        )
+        cached = user_balance_cache.get(str(current_user_id), version)
+        if cached is not None:
+            return cached
 
+        balance_data = [
+            {
+                "group_name": group_name,
+                "other_user_name": other_user_name,
+                "net_amount": abs(amount),
+                "direction": "owes_you" if amount > 0 else "you_owe"
+            }
+            for group_name, other_user_name, amount in self._net_balances(db, current_user_id)
+        ]
+        user_balance_cache.set(str(current_user_id), version, balance_data)
         return balance_data
+
+    def _net_balances(self, db: Session, current_user_id: UUID):
+        """
+        (group name, other user's name, net amount) rows, netted in one
+        aggregate query. Positive = they owe you; settled pairs are left out.
+        """
+        is_debtor = UserBalance.debtor_id == current_user_id
+        other_user_id = case((is_debtor, UserBalance.creditor_id), else_=UserBalance.debtor_id)
+        net_amount = func.sum(case((is_debtor, -UserBalance.amount), else_=UserBalance.amount))
+
+        return db.query(Group.name, User.username, net_amount)\
+            .select_from(UserBalance)\
+            .join(GroupMember, and_(
+                GroupMember.group_id == UserBalance.group_id,
+                GroupMember.user_id == current_user_id
+            ))\
+            .join(Group, Group.id == UserBalance.group_id)\
+            .join(User, User.id == other_user_id)\
+            .filter(or_(is_debtor, UserBalance.creditor_id == current_user_id))\
+            .group_by(UserBalance.group_id, Group.name, User.id, User.username)\
+            .having(net_amount != 0)\
+            .order_by(Group.name, User.username)\
+            .all()
+
     def get_user_net_balances_in_group(
         self,
         group_id: UUID,
@@ -88,7 +97,7 @@ class UserRepo:
             ).all()
 
             # 3. Calculate net amounts per user
-            net_balances = defaultdict(float)
+            net_balances = defaultdict(Decimal)
             
             for b in balances:
                 if b.debtor_id == current_user:
@@ -121,19 +130,95 @@ class UserRepo:
             self,
             user_id: UUID,
             db: Session,
-    ):
-        try:
-            memberships = db.query(GroupMember).filter(GroupMember.user_id == user_id).all()
-            if not memberships:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="You don't have any Groups yet."
-                )
-            return memberships
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error while retriving user groups: {str(e)}"
-            )
+            limit: int = 100,
+            cursor: Optional[str] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        One page of the user's groups, newest first, with their role, the
+        member count, last activity and the user's net balance in each
+        (positive = others owe them), all in one query. Returns
+        (groups, next_cursor); next_cursor is None on the last page.
+        """
+        my_groups = select(GroupMember.group_id).where(GroupMember.user_id == user_id)
+
+        member_counts = db.query(GroupMember.group_id, func.count().label("member_count"))\
+            .filter(GroupMember.group_id.in_(my_groups))\
+            .group_by(GroupMember.group_id)\
+            .subquery()
+
+        is_debtor = UserBalance.debtor_id == user_id
+        net_balances = db.query(
+            UserBalance.group_id,
+            func.sum(case((is_debtor, -UserBalance.amount), else_=UserBalance.amount)).label("net_balance")
+        ).filter(or_(is_debtor, UserBalance.creditor_id == user_id))\
+            .group_by(UserBalance.group_id)\
+            .subquery()
+
+        # Expense and settlement times are naive UTC, poll times are
+        # timezone-aware; they are combined in Python rather than in SQL
+        money_events = union_all(
+            select(Expense.group_id, Expense.created_at.label("at")).where(Expense.group_id.in_(my_groups)),
+            select(Settlement.group_id, Settlement.settled_at.label("at")).where(Settlement.group_id.in_(my_groups))
+        ).subquery()
+        money_activity = select(money_events.c.group_id, func.max(money_events.c.at).label("at"))\
+            .group_by(money_events.c.group_id)\
+            .subquery()
+        poll_activity = db.query(Poll.group_id, func.max(Poll.updated_at).label("at"))\
+            .filter(Poll.group_id.in_(my_groups))\
+            .group_by(Poll.group_id)\
+            .subquery()
+
+        query = db.query(
+            Group.id,
+            Group.name,
+            Group.description,
+            Group.created_at,
+            GroupMember.role,
+            func.coalesce(member_counts.c.member_count, 0),
+            func.coalesce(net_balances.c.net_balance, 0.0),
+            money_activity.c.at,
+            poll_activity.c.at
+        ).join(GroupMember, and_(GroupMember.group_id == Group.id, GroupMember.user_id == user_id))\
+            .outerjoin(member_counts, member_counts.c.group_id == Group.id)\
+            .outerjoin(net_balances, net_balances.c.group_id == Group.id)\
+            .outerjoin(money_activity, money_activity.c.group_id == Group.id)\
+            .outerjoin(poll_activity, poll_activity.c.group_id == Group.id)
+
+        if cursor:
+            created_at, group_id = decode_cursor(cursor, datetime.fromisoformat, UUID)
+            query = query.filter(or_(
+                Group.created_at < created_at,
+                and_(Group.created_at == created_at, Group.id < group_id)
+            ))
+
+        rows = query.order_by(Group.created_at.desc(), Group.id.desc()).limit(limit + 1).all()
+
+        groups = [
+            {
+                "id": group_id,
+                "name": name,
+                "description": description,
+                "created_at": created_at,
+                "role": role.value,
+                "member_count": member_count,
+                "last_activity_at": _latest(created_at, money_at, poll_at),
+                "net_balance": net_balance
+            }
+            for group_id, name, description, created_at, role, member_count, net_balance, money_at, poll_at
+            in rows[:limit]
+        ]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = encode_cursor(groups[-1]["created_at"], groups[-1]["id"])
+        return groups, next_cursor
+
+
+def _latest(*timestamps) -> Optional[datetime]:
+    """Most recent of `timestamps`, treating naive values as UTC"""
+    aware = [
+        timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=timezone.utc)
+        for timestamp in timestamps if timestamp is not None
+    ]
+    return max(aware, default=None)
 
 userrepo = UserRepo()
\ No newline at end of file
@@ -0,0 +1,147 @@
+"""
+Cross-group balance summary (/user/balances) for a user in 50 groups with
+10k balance rows: the previous four-query + Python netting implementation
+against the single aggregate query, cold and cached.
+
+    cd Backend && python -m benchmarks.balances [--database-url sqlite://] [--repeat 20]
+
+Pass a PostgreSQL URL to an empty scratch database for production-like
+numbers; the tables are created and dropped by the benchmark.
+"""
+import argparse
+import random
+import statistics
+import time
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.core.cache import user_balance_versions
+from app.core.database import Base
+from app.models import user_models, group_models, expense_models, itineraries_model, poll_models, storage_models
+from app.models.expense_models import UserBalance
+from app.models.group_models import Group, GroupMember
+from app.models.user_models import User
+from app.repository.user import userrepo
+
+
+def legacy_user_balances(current_user_id, db):
+    # UserRepo.get_user_balances before the aggregate query
+    group_ids = [g.group_id for g in db.query(GroupMember.group_id).filter_by(user_id=current_user_id).all()]
+    if not group_ids:
+        return []
+    balances = db.query(UserBalance).filter(
+        UserBalance.group_id.in_(group_ids),
+        (UserBalance.debtor_id == current_user_id) | (UserBalance.creditor_id == current_user_id)
+    ).all()
+    net_balances = defaultdict(lambda: defaultdict(Decimal))
+    for b in balances:
+        if b.debtor_id == current_user_id:
+            net_balances[b.group_id][b.creditor_id] -= b.amount
+        else:
+            net_balances[b.group_id][b.debtor_id] += b.amount
+    user_ids = {uid for group in net_balances.values() for uid in group.keys()}
+    users = {u.id: u.username for u in db.query(User.id, User.username).filter(User.id.in_(user_ids)).all()}
+    groups = {g.id: g.name for g in db.query(Group.id, Group.name).filter(Group.id.in_(group_ids)).all()}
+    balance_data = []
+    for group_id, user_balances in net_balances.items():
+        for other_user_id, amount in user_balances.items():
+            if amount == 0:
+                continue
+            balance_data.append({
+                "group_name": groups[group_id],
+                "other_user_name": users[other_user_id],
+                "net_amount": abs(amount),
+                "direction": "owes_you" if amount > 0 else "you_owe"
+            })
+    return balance_data
+
+
+def seed(db, groups: int, rows: int, others_per_group: int):
+    me = User(id=uuid.uuid4(), username="me", email="me@example.com", password="x")
+    db.add(me)
+    db.flush()
+    pairs = []
+    for g in range(groups):
+        group = Group(id=uuid.uuid4(), name=f"Trip {g:02d}", created_by=me.id)
+        members = [
+            User(id=uuid.uuid4(), username=f"g{g}-traveller{i}", email=f"g{g}-{i}@example.com", password="x")
+            for i in range(others_per_group)
+        ]
+        db.add(group)
+        db.add_all(members)
+        db.flush()
+        db.add_all([GroupMember(group_id=group.id, user_id=user.id) for user in [me] + members])
+        pairs += [(group.id, me.id, user.id) for user in members] + [(group.id, user.id, me.id) for user in members]
+    random.shuffle(pairs)
+    db.add_all([
+        UserBalance(group_id=group_id, debtor_id=debtor, creditor_id=creditor, amount=round(random.uniform(1, 300), 2))
+        for group_id, debtor, creditor in pairs[:rows]
+    ])
+    db.commit()
+    return me.id
+
+
+def measure(func, repeat: int, query_counter: list) -> tuple:
+    func()
+    samples = []
+    for _ in range(repeat):
+        query_counter[0] = 0
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, query_counter[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", default="sqlite://")
+    parser.add_argument("--groups", type=int, default=50)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    random.seed(42)
+
+    if args.database_url.startswith("sqlite"):
+        engine = create_engine(args.database_url, poolclass=StaticPool, connect_args={"check_same_thread": False})
+    else:
+        engine = create_engine(args.database_url)
+    Base.metadata.create_all(engine)
+    queries = [0]
+    event.listen(engine, "before_cursor_execute", lambda *_: queries.__setitem__(0, queries[0] + 1))
+    db = sessionmaker(bind=engine)()
+
+    try:
+        # Enough other users per group that `rows` fits in both directions
+        others_per_group = -(-args.rows // (2 * args.groups))
+        user_id = seed(db, args.groups, args.rows, others_per_group)
+
+        expected = sorted(legacy_user_balances(user_id, db), key=lambda row: (row["group_name"], row["other_user_name"]))
+        actual = userrepo.get_user_balances(user_id, db)
+        assert [(r["group_name"], r["other_user_name"], r["direction"]) for r in expected] == \
+            [(r["group_name"], r["other_user_name"], r["direction"]) for r in actual]
+        assert all(abs(e["net_amount"] - a["net_amount"]) < 1e-6 for e, a in zip(expected, actual))
+
+        def cold():
+            user_balance_versions.bump(user_id)
+            userrepo.get_user_balances(user_id, db)
+
+        cases = [
+            ("four queries + Python netting (before)", lambda: legacy_user_balances(user_id, db)),
+            ("single aggregate query (after, cache miss)", cold),
+            ("cached (after, cache hit)", lambda: userrepo.get_user_balances(user_id, db)),
+        ]
+        print(f"{args.groups} groups, {args.rows} balance rows, {len(actual)} net balances; median of {args.repeat}")
+        for name, func in cases:
+            db.expire_all()
+            elapsed, query_count = measure(func, args.repeat, queries)
+            print(f"  {name:<45} {elapsed:9.2f} ms  {query_count} queries")
+    finally:
+        db.close()
+        Base.metadata.drop_all(engine)
+
+
+if __name__ == "__main__":
+    main()
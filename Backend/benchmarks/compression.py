@@ -0,0 +1,138 @@
+"""
+Bytes on the wire and CPU cost of response compression per response type.
+
+Runs the encoders CompressionMiddleware uses over representative payloads
+(1000-row expense list, poll list with voters, cross-group /user/balances)
+at several levels, plus the expense list streamed in 64 KiB chunks with a
+flush after each, and estimates transfer time on a slow mobile link.
+
+    cd Backend && python -m benchmarks.compression [--repeat 20] [--link-mbps 1.5]
+"""
+import argparse
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from fastapi.responses import ORJSONResponse
+from app.helper import compression_helper
+from benchmarks.serialization import build_rows
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+LEVELS = [
+    ("gzip", 1),
+    ("gzip", 6),
+    ("gzip", 9),
+    ("br", 1),
+    ("br", 4),
+    ("br", 6),
+    ("br", 11),
+]
+
+
+def expense_list(rows: int = 1000) -> bytes:
+    return ORJSONResponse(content=[row.model_dump() for row in build_rows(rows)]).body
+
+
+def poll_list_with_voters(polls: int = 100, options: int = 5, voters: int = 8) -> bytes:
+    now = datetime.now(timezone.utc)
+    group_id = uuid.uuid4()
+    members = [
+        {"id": uuid.uuid4(), "username": f"traveller{i}", "email": f"traveller{i}@example.com"}
+        for i in range(40)
+    ]
+    payload = []
+    for p in range(polls):
+        poll_id = uuid.uuid4()
+        payload.append({
+            "id": poll_id,
+            "question": f"Where should we go on day {p % 14 + 1}?",
+            "poll_type": "single_choice",
+            "group_id": group_id,
+            "created_by": members[p % len(members)]["id"],
+            "is_active": p % 3 != 0,
+            "closes_at": now + timedelta(days=p % 7),
+            "created_at": now - timedelta(hours=p),
+            "updated_at": now - timedelta(hours=p),
+            "can_delete": p % 5 == 0,
+            "options": [
+                {
+                    "id": uuid.uuid4(),
+                    "option_text": f"Option {o + 1} for poll {p}",
+                    "poll_id": poll_id,
+                    "created_at": now - timedelta(hours=p),
+                    "vote_count": voters,
+                    "voters": random.sample(members, voters),
+                }
+                for o in range(options)
+            ],
+        })
+    return ORJSONResponse(content=payload).body
+
+
+def user_balances(rows: int = 500) -> bytes:
+    return ORJSONResponse(content=[
+        {
+            "group_name": f"Trip {i % 25}",
+            "other_user_name": f"traveller{i % 40}",
+            "net_amount": round(random.uniform(1, 500), 2),
+            "direction": "owes_you" if i % 2 else "you_owe",
+        }
+        for i in range(rows)
+    ]).body
+
+
+def compress(body: bytes, encoding: str, level: int, chunk_size=None) -> bytes:
+    encoder = compression_helper.create_encoder(encoding, gzip_level=level, brotli_quality=level)
+    if chunk_size is None:
+        return encoder.compress(body) + encoder.finish()
+    out = [encoder.compress(body[i:i + chunk_size]) + encoder.flush() for i in range(0, len(body), chunk_size)]
+    return b"".join(out) + encoder.finish()
+
+
+def median_ms(func, repeat: int) -> float:
+    func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--link-mbps", type=float, default=1.5, help="link speed for the transfer estimate")
+    args = parser.parse_args()
+    random.seed(42)
+
+    expenses = expense_list()
+    payloads = [
+        ("expense list (1000 rows)", expenses, None),
+        ("expense list, streamed", expenses, STREAM_CHUNK_SIZE),
+        ("polls with voters (100)", poll_list_with_voters(), None),
+        ("/user/balances (500 rows)", user_balances(), None),
+    ]
+
+    def transfer_ms(size: int) -> float:
+        return size * 8 / (args.link_mbps * 1_000_000) * 1000
+
+    print(f"median of {args.repeat} runs; transfer estimated at {args.link_mbps} Mbit/s")
+    print(f"{'payload':<28} {'encoding':<9} {'bytes':>9} {'ratio':>6} {'cpu ms':>8} {'transfer ms':>12}")
+    for name, body, chunk_size in payloads:
+        print(f"{name:<28} {'identity':<9} {len(body):>9} {1.0:>6.2f} {0.0:>8.2f} {transfer_ms(len(body)):>12.1f}")
+        for encoding, level in LEVELS:
+            if not compression_helper.is_available(encoding):
+                continue
+            size = len(compress(body, encoding, level, chunk_size))
+            cpu = median_ms(lambda: compress(body, encoding, level, chunk_size), args.repeat)
+            print(
+                f"{'':<28} {f'{encoding}-{level}':<9} {size:>9} {len(body) / size:>6.2f} "
+                f"{cpu:>8.2f} {transfer_ms(size):>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
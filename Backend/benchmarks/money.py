@@ -0,0 +1,118 @@
+"""
+Exactness of expense splitting and balance bookkeeping over many random
+operations: the previous float implementation (round(total / n, 2) shares,
+Float balances) against money_helper (whole-cent allocation, Decimal
+balances), plus allocator throughput.
+
+For every expense the new shares must add up to the total, and after every
+run the members' net positions must add up to zero; the script stops with
+an AssertionError otherwise.
+
+    cd Backend && python -m benchmarks.money [--operations 1000000] [--members 8] [--seed 42]
+"""
+import argparse
+import random
+import time
+from collections import defaultdict
+from decimal import Decimal
+from app.helper.money_helper import allocate, from_minor, split_equally, to_money
+
+
+def random_total(rng: random.Random) -> float:
+    return round(rng.uniform(0.01, 2000), 2)
+
+
+def run_float(operations, members: int):
+    # Expense creation and settlement as implemented before NUMERIC columns
+    balances = defaultdict(float)  # (debtor, creditor) -> amount
+    cents_drift = 0.0
+    for kind, payer, total, other, fraction in operations:
+        if kind == "expense":
+            share = round(total / members, 2)
+            cents_drift += (share * members - total) * 100
+            for member in range(members):
+                if member != payer:
+                    balances[(member, payer)] += share
+        else:
+            owed = balances[(payer, other)]
+            if owed > 0:
+                balances[(payer, other)] -= round(owed * fraction, 2)
+    return balances, cents_drift
+
+
+def run_exact(operations, members: int):
+    balances = defaultdict(Decimal)
+    for kind, payer, total, other, fraction in operations:
+        if kind == "expense":
+            shares = split_equally(total, members, offset=payer)
+            assert sum(shares) == to_money(total), (total, shares)
+            for member, share in enumerate(shares):
+                if member != payer:
+                    balances[(member, payer)] += share
+        else:
+            owed = balances[(payer, other)]
+            if owed > 0:
+                balances[(payer, other)] -= to_money(owed * Decimal(repr(fraction)))
+    return balances
+
+
+def net_positions(balances, members: int):
+    positions = [0] * members
+    for (debtor, creditor), amount in balances.items():
+        positions[debtor] -= amount
+        positions[creditor] += amount
+    return positions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--operations", type=int, default=1_000_000)
+    parser.add_argument("--members", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    operations = []
+    for _ in range(args.operations):
+        payer = rng.randrange(args.members)
+        other = (payer + rng.randrange(1, args.members)) % args.members
+        kind = "expense" if rng.random() < 0.8 else "settlement"
+        operations.append((kind, payer, random_total(rng), other, rng.choice([0.25, 0.5, 1.0])))
+    expenses = sum(1 for operation in operations if operation[0] == "expense")
+    print(f"{args.operations} operations ({expenses} expenses) between {args.members} members")
+
+    start = time.perf_counter()
+    float_balances, cents_drift = run_float(operations, args.members)
+    float_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    exact_balances = run_exact(operations, args.members)
+    exact_elapsed = time.perf_counter() - start
+
+    float_net = sum(net_positions(float_balances, args.members))
+    exact_net = sum(net_positions(exact_balances, args.members))
+    off_cent = sum(1 for amount in float_balances.values() if abs(amount * 100 - round(amount * 100)) > 1e-9)
+    assert exact_net == 0, exact_net
+    assert all(amount == to_money(amount) for amount in exact_balances.values())
+
+    print(f"  {'float (before)':<22} {float_elapsed:7.2f} s  splits vs totals: {cents_drift:+.2f} cents, "
+          f"net positions sum: {float_net:+.3e}, balances off whole cents: {off_cent}/{len(float_balances)}")
+    print(f"  {'decimal (after)':<22} {exact_elapsed:7.2f} s  splits vs totals: +0.00 cents, "
+          f"net positions sum: {exact_net}, balances off whole cents: 0/{len(exact_balances)}")
+
+    # Allocator alone, equal and weighted, with conservation checked
+    samples = min(args.operations, 200_000)
+    cases = [
+        ("split_equally", lambda total, n: split_equally(total, n, offset=n)),
+        ("allocate (weighted)", lambda total, n: allocate(total, [rng.randint(1, 5) for _ in range(n)])),
+    ]
+    for name, func in cases:
+        inputs = [(from_minor(rng.randint(1, 500_000)), rng.randint(2, 12)) for _ in range(samples)]
+        start = time.perf_counter()
+        results = [func(total, n) for total, n in inputs]
+        elapsed = time.perf_counter() - start
+        assert all(sum(shares) == total for (total, _), shares in zip(inputs, results))
+        print(f"  {name:<22} {samples / elapsed:11,.0f} allocations/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Serialization time for a 1000-row ExpenseResponse list.
+
+Compares the old path (response_model validation + jsonable_encoder +
+stdlib JSONResponse, and hand-built dicts with str()/isoformat()) against
+the ORJSONResponse path the app now uses.
+
+    cd Backend && python -m benchmarks.serialization [--rows 1000] [--repeat 50]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from app.api.schemas.expenses import ExpenseResponse
+
+
+def build_rows(count: int) -> List[ExpenseResponse]:
+    now = datetime.now(timezone.utc)
+    creator = uuid.uuid4()
+    return [
+        ExpenseResponse(
+            id=uuid.uuid4(),
+            title=f"Expense {i}",
+            description="Dinner, taxis and museum tickets" if i % 3 else None,
+            total_amount=round(12.5 + i * 1.37, 2),
+            created_by=creator,
+            created_at=now - timedelta(minutes=i),
+            split_type="equal",
+            has_attachments=bool(i % 2)
+        )
+        for i in range(count)
+    ]
+
+
+def response_model_json(rows, field) -> bytes:
+    # What FastAPI did for `response_model=List[ExpenseResponse]`
+    content = asyncio.run(serialize_response(field=field, response_content=rows))
+    return JSONResponse(content=content).body
+
+
+def hand_built_json(rows) -> bytes:
+    # The per-row str()/isoformat() style used by routes returning JSONResponse
+    return JSONResponse(content=[
+        {
+            "id": str(row.id),
+            "title": row.title,
+            "description": row.description,
+            "total_amount": row.total_amount,
+            "created_by": str(row.created_by),
+            "created_at": row.created_at.isoformat(),
+            "split_type": row.split_type,
+            "has_attachments": row.has_attachments,
+        }
+        for row in rows
+    ]).body
+
+
+def response_model_orjson(rows, field) -> bytes:
+    # Default response class swapped, response_model still validating/encoding
+    content = asyncio.run(serialize_response(field=field, response_content=rows))
+    return ORJSONResponse(content=content).body
+
+
+def orjson_native(rows) -> bytes:
+    # What `list_group_expenses` does now
+    return ORJSONResponse(content=[row.model_dump() for row in rows]).body
+
+
+def timeit(func, repeat: int) -> float:
+    func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rows = build_rows(args.rows)
+    field = create_model_field(name="Response", type_=List[ExpenseResponse], mode="serialization")
+
+    cases = [
+        ("response_model + JSONResponse (before)", lambda: response_model_json(rows, field)),
+        ("hand-built str()/isoformat() + JSONResponse (before)", lambda: hand_built_json(rows)),
+        ("response_model + ORJSONResponse", lambda: response_model_orjson(rows, field)),
+        ("model_dump + ORJSONResponse (after)", lambda: orjson_native(rows)),
+    ]
+    baseline = None
+    print(f"{args.rows} ExpenseResponse rows, median of {args.repeat} runs")
+    for name, func in cases:
+        elapsed = timeit(func, args.repeat)
+        baseline = baseline or elapsed
+        print(f"  {name:<55} {elapsed:8.2f} ms  {baseline / elapsed:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
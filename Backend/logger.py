@@ -1,38 +1,114 @@
+import atexit
+import contextvars
+import json
 import logging
+import queue
+import random
 import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional, Dict, Any
+from app.core.config import settings
 
-class SimpleLogger:
+# Set per request by RequestIdMiddleware; copied into every record logged
+# while handling that request
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+LEVELS = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARN": logging.WARNING,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+    "CRITICAL": logging.CRITICAL,
+}
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps the current request id on the record (runs in the caller's context)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps roughly `rate` of the records of each sampled level"""
+
+    def __init__(self, rates: Dict[str, float]) -> None:
+        super().__init__()
+        self.rates = {LEVELS[level.upper()]: rate for level, rate in rates.items() if level.upper() in LEVELS}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.levelno)
+        return rate is None or random.random() < rate
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks: records are dropped (and counted) when
+    the queue is full. Records are passed through unformatted; the listener
+    thread does all the formatting and serialisation.
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        entry.update(getattr(record, "context", None) or {})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class StructuredLogger:
     def __init__(self) -> None:
-        # Initialize with default settings
-        self.logger = self._setup_console_logger()
-        
-    def _setup_console_logger(self) -> logging.Logger:
-        """Configure and return a console logger"""
-        logger = logging.getLogger("SIMPLE_LOG_HANDLER")
-        logger.setLevel(logging.INFO)  # Default level
-        
-        # Clear existing handlers to avoid duplication
-        if logger.handlers:
-            for handler in logger.handlers:
-                logger.removeHandler(handler)
-        
-        # Create console handler
-        handler = logging.StreamHandler(sys.stdout)
-        
-        # Custom formatter
-        formatter = logging.Formatter(
-            fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-        
+        self.queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+        self.handler = DroppingQueueHandler(self.queue)
+        self.handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATES))
+        self.handler.addFilter(RequestContextFilter())
+
+        self.logger = logging.getLogger("tripsquad")
+        self.logger.setLevel(LEVELS.get(settings.LOG_LEVEL.upper(), logging.INFO))
+        self.logger.handlers = [self.handler]
         # Prevent propagation to root logger
-        logger.propagate = False
-        
-        return logger
-    
+        self.logger.propagate = False
+
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(JsonFormatter())
+        self.listener = QueueListener(self.queue, stream_handler, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.listener.stop)
+
+    @property
+    def dropped(self) -> int:
+        """Records dropped because the queue was full"""
+        return self.handler.dropped
+
     def log_message(
         self,
         level: str,
@@ -41,42 +117,20 @@ class SimpleLogger:
         app: Optional[str] = None,
         time_taken: str = "N/A"
     ) -> None:
-        """Log messages with contextual data"""
-        print("Before logging")
-        if data is None:
-            data = {}
-            
-        try:
-            # Prepare log data
-            log_data = {
-                "source": data.get("source", "N/A"),
-                "appName": app or "N/A",
-                "logid": data.get("logid", "N/A"),
-                "client_ip_address": data.get("clientip", "N/A"),
-                "client_username": data.get("username", "N/A"),
-                "time_taken": time_taken,
-                "custom_data": data.get("data", "N/A"),
-            }
-            
-            # Map log levels
-            log_functions = {
-                "DEBUG": self.logger.debug,
-                "INFO": self.logger.info,
-                "WARN": self.logger.warning,
-                "ERROR": self.logger.error,
-                "CRITICAL": self.logger.critical,
-            }
-            
-            level = level.upper()
-            log_function = log_functions.get(level, self.logger.info)
-            
-            # Format the message with context
-            formatted_message = f"{message} | {log_data}"
-            log_function(formatted_message)
-            
-        except Exception as e:
-            print(f"Logging failed: {str(e)}")
-            self.logger.error(f"Failed to log message: {message}")
+        """Log messages with contextual data; never blocks on I/O"""
+        levelno = LEVELS.get(level.upper(), logging.INFO)
+        if not self.logger.isEnabledFor(levelno):
+            return
+        data = data or {}
+        self.logger.log(levelno, message, extra={"context": {
+            "source": data.get("source"),
+            "appName": app,
+            "logid": data.get("logid"),
+            "client_ip_address": data.get("clientip"),
+            "client_username": data.get("username"),
+            "time_taken": time_taken,
+            "custom_data": data.get("data"),
+        }})
 
 # Singleton logger instance
-logger = SimpleLogger()
\ No newline at end of file
+logger = StructuredLogger()
@@ -0,0 +1,103 @@
+-- Brings a PostgreSQL database created by an older version of the backend up
+-- to the current models. Base.metadata.create_all (app/main.py) creates
+-- missing tables (stored_objects, pending_deletions, archived_polls,
+-- activity_events, activity_sequence, sync_tombstones) and their indexes at
+-- startup, but never changes a table that already exists, so the columns and
+-- indexes below have to be added by hand. Run once, before starting the new
+-- version:
+--
+--     psql "$RDS_DATABASE_URL" -f migrations/upgrade_existing_database.sql
+--
+-- Every statement can be re-run. Requires PostgreSQL 13 or later (the
+-- activity feed uses pg_current_xact_id()). On large tables, consider running
+-- the CREATE INDEX statements separately with CONCURRENTLY.
+
+BEGIN;
+
+-- Exact money amounts (NUMERIC(12,2) instead of float)
+ALTER TABLE expenses ALTER COLUMN total_amount TYPE NUMERIC(12, 2) USING round(total_amount::numeric, 2);
+ALTER TABLE expense_splits ALTER COLUMN amount TYPE NUMERIC(12, 2) USING round(amount::numeric, 2);
+ALTER TABLE settlements ALTER COLUMN amount TYPE NUMERIC(12, 2) USING round(amount::numeric, 2);
+ALTER TABLE user_balances ALTER COLUMN amount TYPE NUMERIC(12, 2) USING round(amount::numeric, 2);
+CREATE INDEX IF NOT EXISTS ix_user_balances_creditor_id ON user_balances (creditor_id);
+
+-- Group versions and delta sync (app/repository/sync.py)
+ALTER TABLE groups ADD COLUMN IF NOT EXISTS sync_version BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE expenses ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT now();
+ALTER TABLE expenses ADD COLUMN IF NOT EXISTS sync_version BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE expense_splits ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT now();
+ALTER TABLE expense_splits ADD COLUMN IF NOT EXISTS sync_version BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE settlements ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT now();
+ALTER TABLE settlements ADD COLUMN IF NOT EXISTS sync_version BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE itinerary_entries ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT now();
+ALTER TABLE itinerary_entries ADD COLUMN IF NOT EXISTS sync_version BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE polls ADD COLUMN IF NOT EXISTS sync_version BIGINT NOT NULL DEFAULT 0;
+CREATE INDEX IF NOT EXISTS ix_expenses_group_id_sync_version ON expenses (group_id, sync_version);
+CREATE INDEX IF NOT EXISTS ix_settlements_group_id_sync_version ON settlements (group_id, sync_version);
+CREATE INDEX IF NOT EXISTS ix_itinerary_entries_group_id_sync_version ON itinerary_entries (group_id, sync_version);
+CREATE INDEX IF NOT EXISTS ix_polls_group_id_sync_version ON polls (group_id, sync_version);
+
+-- Itinerary ordering and optimistic concurrency
+ALTER TABLE itinerary_entries ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+-- Existing entries are numbered in the order they were listed in (title,
+-- then id), so entries added later go after them
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'itinerary_entries' AND column_name = 'position'
+    ) THEN
+        ALTER TABLE itinerary_entries ADD COLUMN position INTEGER NOT NULL DEFAULT 0;
+        UPDATE itinerary_entries
+        SET position = numbered.position
+        FROM (
+            SELECT id, row_number() OVER (PARTITION BY group_id, day_number ORDER BY title, id) - 1 AS position
+            FROM itinerary_entries
+        ) AS numbered
+        WHERE itinerary_entries.id = numbered.id;
+    END IF;
+END $$;
+
+-- Poll auto-close and archiving
+ALTER TABLE polls ADD COLUMN IF NOT EXISTS closes_at TIMESTAMP WITH TIME ZONE;
+ALTER TABLE polls ADD COLUMN IF NOT EXISTS closed_at TIMESTAMP WITH TIME ZONE;
+CREATE INDEX IF NOT EXISTS ix_polls_closes_at ON polls (closes_at);
+CREATE INDEX IF NOT EXISTS ix_polls_closed_at ON polls (closed_at);
+
+-- Image variants (app/jobs/thumbnails.py)
+ALTER TABLE attachments ADD COLUMN IF NOT EXISTS thumbnail_key VARCHAR;
+ALTER TABLE attachments ADD COLUMN IF NOT EXISTS preview_key VARCHAR;
+ALTER TABLE attachments ADD COLUMN IF NOT EXISTS variant_status VARCHAR(16);
+ALTER TABLE group_attachments ADD COLUMN IF NOT EXISTS thumbnail_key VARCHAR;
+ALTER TABLE group_attachments ADD COLUMN IF NOT EXISTS preview_key VARCHAR;
+ALTER TABLE group_attachments ADD COLUMN IF NOT EXISTS variant_status VARCHAR(16);
+CREATE INDEX IF NOT EXISTS ix_attachments_variant_status ON attachments (variant_status);
+CREATE INDEX IF NOT EXISTS ix_group_attachments_variant_status ON group_attachments (variant_status);
+
+-- Full-text search (app/helper/search_helper.py)
+CREATE INDEX IF NOT EXISTS ix_expenses_search ON expenses
+    USING gin (to_tsvector('english'::regconfig, (coalesce(title, '') || ' ') || coalesce(description, '')));
+CREATE INDEX IF NOT EXISTS ix_itinerary_entries_search ON itinerary_entries
+    USING gin (to_tsvector('english'::regconfig, (coalesce(title, '') || ' ') || coalesce(description, '')));
+CREATE INDEX IF NOT EXISTS ix_polls_search ON polls
+    USING gin (to_tsvector('english'::regconfig, coalesce(question, '')));
+CREATE INDEX IF NOT EXISTS ix_poll_options_search ON poll_options
+    USING gin (to_tsvector('english'::regconfig, coalesce(text, '')));
+
+-- Activity feed ordered by transaction id (app/repository/activity.py), for
+-- databases where activity_events was already created, with the earlier
+-- `sequence` column or none. Events written before have no transaction id;
+-- 0 puts them first.
+DO $$
+BEGIN
+    IF to_regclass('activity_events') IS NOT NULL THEN
+        ALTER TABLE activity_events ADD COLUMN IF NOT EXISTS xid BIGINT;
+        UPDATE activity_events SET xid = 0 WHERE xid IS NULL;
+        DROP INDEX IF EXISTS ix_activity_events_group_id_sequence;
+        ALTER TABLE activity_events DROP COLUMN IF EXISTS sequence;
+        CREATE INDEX IF NOT EXISTS ix_activity_events_group_id_xid_id ON activity_events (group_id, xid, id)
+            INCLUDE (created_at, actor_id, event_type, entity_id, payload);
+    END IF;
+END $$;
+
+COMMIT;
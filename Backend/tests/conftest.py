@@ -0,0 +1,48 @@
+import os
+from contextlib import contextmanager
+
+# Settings has no defaults for these; the tests don't touch the real database or S3
+for name, value in {
+    "LOCAL_DATABASE_URL": "sqlite://",
+    "RDS_DATABASE_URL": "sqlite://",
+    "JWT_SECRET_KEY": "test-secret",
+    "JWT_ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "UPLOAD_FOLDER": "/tmp/uploads",
+    "AWS_ACCESS_KEY_ID": "test",
+    "AWS_SECRET_ACCESS_KEY": "test",
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "S3_BUCKET_NAME": "test",
+    "S3_ENDPOINT_URL": "http://localhost",
+    "STORAGE_BACKEND": "memory",
+}.items():
+    os.environ.setdefault(name, value)
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.core.database import Base
+from app.models import user_models, group_models, expense_models, itineraries_model, poll_models, storage_models, activity_models, sync_models
+
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture(scope="session")
+def database():
+    """
+    Context manager giving a session on a freshly created in-memory schema.
+    Session-scoped so that hypothesis tests can open one per example.
+    """
+    @contextmanager
+    def session():
+        Base.metadata.create_all(engine)
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+            Base.metadata.drop_all(engine)
+
+    return session
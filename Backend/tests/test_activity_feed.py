@@ -0,0 +1,42 @@
+import uuid
+from app.models.group_models import Group, GroupMember, MembershipRole
+from app.models.user_models import User
+from app.repository.activity import activityrepo
+
+
+def create_group(db):
+    user = User(id=uuid.uuid4(), username="alice", email="alice@example.com", password="x")
+    group = Group(id=uuid.uuid4(), name="trip", created_by=user.id)
+    db.add_all([user, group, GroupMember(group_id=group.id, user_id=user.id, role=MembershipRole.ADMIN)])
+    db.commit()
+    return group, user
+
+
+def read_all(db, user_id, since=None, limit=1):
+    """Page through the feed `limit` events at a time"""
+    event_types = []
+    while True:
+        events, since = activityrepo.get_feed(db, user_id, since, limit)
+        if not events:
+            return event_types, since
+        event_types += [event.event_type for event in events]
+
+
+def test_feed_pages_through_events_in_commit_order(database):
+    with database() as db:
+        group, user = create_group(db)
+        activityrepo.record(db, group.id, user.id, "first.one")
+        activityrepo.record(db, group.id, user.id, "first.two")
+        db.commit()
+        activityrepo.record(db, group.id, user.id, "rolled.back")
+        db.flush()
+        db.rollback()
+        activityrepo.record(db, group.id, user.id, "second")
+        db.commit()
+
+        event_types, cursor = read_all(db, user.id)
+        assert event_types == ["first.one", "first.two", "second"]
+
+        activityrepo.record(db, group.id, user.id, "third")
+        db.commit()
+        assert read_all(db, user.id, cursor, limit=100)[0] == ["third"]
@@ -0,0 +1,115 @@
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+from hypothesis import HealthCheck, given, settings, strategies as st
+from app.api.schemas.expenses import ExpenseCreate
+from app.helper.money_helper import CENT, from_minor, to_money
+from app.models.expense_models import ExpenseSplit, SplitType, UserBalance
+from app.models.group_models import Group, GroupMember, MembershipRole
+from app.models.user_models import User
+from app.repository.expense import expenserepo
+
+MEMBERS = 3
+
+members = st.integers(min_value=0, max_value=MEMBERS - 1)
+expenses = st.tuples(
+    st.just("expense"),
+    members,
+    st.one_of(
+        st.integers(min_value=1, max_value=10 ** 7).map(lambda cents: ("equal", cents)),
+        st.lists(st.integers(min_value=0, max_value=10 ** 6), min_size=MEMBERS, max_size=MEMBERS)
+            .filter(any)
+            .map(lambda cents: ("custom", cents))
+    )
+)
+settlements = st.tuples(st.just("settle"), members, members, st.sampled_from([Decimal("0.5"), Decimal("1")]))
+deletions = st.tuples(st.just("delete"), st.integers(min_value=0, max_value=100))
+operations = st.lists(st.one_of(expenses, settlements, deletions), min_size=1, max_size=25)
+
+
+def create_group(db):
+    users = [User(id=uuid.uuid4(), username=f"user{i}", email=f"user{i}@example.com", password="x") for i in range(MEMBERS)]
+    db.add_all(users)
+    group = Group(id=uuid.uuid4(), name="trip", created_by=users[0].id)
+    db.add(group)
+    db.add_all([
+        GroupMember(group_id=group.id, user_id=user.id, role=MembershipRole.ADMIN if i == 0 else MembershipRole.MEMBER)
+        for i, user in enumerate(users)
+    ])
+    db.commit()
+    return group.id, [user.id for user in users]
+
+
+def net_positions(db, group_id):
+    """What each user is owed (positive) or owes (negative), from UserBalance"""
+    positions = defaultdict(Decimal)
+    for balance in db.query(UserBalance).filter(UserBalance.group_id == group_id):
+        assert balance.amount == to_money(balance.amount)
+        positions[balance.creditor_id] += balance.amount
+        positions[balance.debtor_id] -= balance.amount
+    return positions
+
+
+def split_amounts(db, expense_id):
+    return {split.user_id: split.amount for split in db.query(ExpenseSplit).filter_by(expense_id=expense_id)}
+
+
+@settings(max_examples=100, deadline=None, suppress_health_check=[HealthCheck.too_slow])
+@given(operations)
+def test_balances_conserve_money(database, operations):
+    with database() as db:
+        group_id, user_ids = create_group(db)
+        # Net positions kept independently of UserBalance
+        expected = defaultdict(Decimal)
+        live_expenses = []
+
+        for operation in operations:
+            if operation[0] == "expense":
+                _, payer, (split_type, cents) = operation
+                if split_type == "equal":
+                    payload = ExpenseCreate(
+                        group_id=group_id, title="expense", total_amount=float(from_minor(cents)),
+                        split_type=SplitType.EQUAL, splits=[]
+                    )
+                else:
+                    payload = ExpenseCreate(
+                        group_id=group_id, title="expense", total_amount=float(from_minor(sum(cents))),
+                        split_type=SplitType.CUSTOM,
+                        splits=[{"user_id": user_id, "amount": float(from_minor(c))} for user_id, c in zip(user_ids, cents)]
+                    )
+                expense = expenserepo.add_expense(db, group_id, user_ids[payer], payload)
+                db.commit()
+
+                shares = split_amounts(db, expense.id)
+                assert sum(shares.values()) == expense.total_amount == to_money(payload.total_amount)
+                for user_id, share in shares.items():
+                    if user_id != user_ids[payer]:
+                        expected[user_ids[payer]] += share
+                        expected[user_id] -= share
+                live_expenses.append((expense.id, user_ids[payer], shares))
+
+            elif operation[0] == "settle":
+                _, debtor, creditor, fraction = operation
+                balance = db.query(UserBalance).filter_by(
+                    group_id=group_id, debtor_id=user_ids[debtor], creditor_id=user_ids[creditor]
+                ).first()
+                if debtor == creditor or balance is None or balance.amount < CENT:
+                    continue
+                amount = max(to_money(balance.amount * fraction), CENT)
+                expenserepo.add_settlement(group_id, user_ids[debtor], user_ids[creditor], amount, None, db)
+                db.commit()
+                expected[user_ids[debtor]] += amount
+                expected[user_ids[creditor]] -= amount
+
+            elif live_expenses:
+                expense_id, payer_id, shares = live_expenses.pop(operation[1] % len(live_expenses))
+                expenserepo.remove_expense(db, group_id, expense_id, payer_id)
+                db.commit()
+                for user_id, share in shares.items():
+                    if user_id != payer_id:
+                        expected[payer_id] -= share
+                        expected[user_id] += share
+
+            positions = net_positions(db, group_id)
+            assert sum(positions.values()) == 0
+            assert all(positions[user_id] == expected[user_id] for user_id in user_ids)
@@ -0,0 +1,101 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from app.models.expense_models import Attachment, Expense, UserBalance
+from app.models.group_models import Group, GroupMember, MembershipRole
+from app.models.poll_models import Poll
+from app.models.user_models import User
+from app.repository.poll import pollrepo
+from app.repository.sync import syncrepo
+from app.repository.user import userrepo
+
+
+def create_group(db):
+    user = User(id=uuid.uuid4(), username="alice", email="alice@example.com", password="x")
+    group = Group(id=uuid.uuid4(), name="trip", created_by=user.id)
+    db.add_all([user, group, GroupMember(group_id=group.id, user_id=user.id, role=MembershipRole.ADMIN)])
+    db.commit()
+    return group, user
+
+
+def version(db, group_id):
+    return db.query(Group.sync_version).filter(Group.id == group_id).scalar()
+
+
+def test_writes_to_group_rows_bump_the_version_once_per_commit(database):
+    with database() as db:
+        group, user = create_group(db)
+        before = version(db, group.id)
+
+        db.add(Expense(group_id=group.id, created_by=user.id, title="a", total_amount=10))
+        db.flush()
+        db.add(Expense(group_id=group.id, created_by=user.id, title="b", total_amount=20))
+        db.commit()
+        assert version(db, group.id) == before + 1
+
+        membership = db.query(GroupMember).filter_by(group_id=group.id, user_id=user.id).one()
+        membership.role = MembershipRole.MEMBER
+        db.commit()
+        assert version(db, group.id) == before + 2
+
+
+def test_reads_and_rollbacks_leave_the_version_alone(database):
+    with database() as db:
+        group, user = create_group(db)
+        before = version(db, group.id)
+
+        db.query(Expense).filter(Expense.group_id == group.id).all()
+        db.commit()
+        db.add(Expense(group_id=group.id, created_by=user.id, title="a", total_amount=10))
+        db.flush()
+        db.rollback()
+        db.commit()
+        assert version(db, group.id) == before
+
+
+def test_touch_bumps_the_version_for_rows_without_a_group_id(database):
+    with database() as db:
+        group, user = create_group(db)
+        expense = Expense(group_id=group.id, created_by=user.id, title="a", total_amount=10)
+        db.add(expense)
+        db.commit()
+        before = version(db, group.id)
+
+        db.add(Attachment(
+            id=uuid.uuid4(), expense_id=expense.id, original_filename="a.jpg", file_url="/a.jpg",
+            uploaded_by=user.id, uploaded_at=datetime.utcnow()
+        ))
+        syncrepo.touch(db, group.id)
+        db.commit()
+        assert version(db, group.id) == before + 1
+
+
+# The writes below go straight to the session, as they would from another
+# worker: nothing in this process is told, only the database changes
+
+def test_poll_list_cache_follows_the_group_version(database):
+    with database() as db:
+        group, user = create_group(db)
+        assert pollrepo.get_polls_by_group(db, group.id, user.id) == []
+
+        db.add(Poll(id=uuid.uuid4(), question="where?", poll_type="single_choice", group_id=group.id, created_by=user.id))
+        db.commit()
+        assert [poll["question"] for poll in pollrepo.get_polls_by_group(db, group.id, user.id)] == ["where?"]
+
+
+def test_user_balance_cache_follows_the_versions_of_the_users_groups(database):
+    with database() as db:
+        group, user = create_group(db)
+        other = User(id=uuid.uuid4(), username="bob", email="bob@example.com", password="x")
+        db.add_all([other, GroupMember(group_id=group.id, user_id=other.id, role=MembershipRole.MEMBER)])
+        db.commit()
+        assert userrepo.get_user_balances(user.id, db) == []
+
+        db.add(UserBalance(debtor_id=other.id, creditor_id=user.id, group_id=group.id, amount=Decimal("5.00")))
+        db.commit()
+        assert [(row["other_user_name"], row["direction"]) for row in userrepo.get_user_balances(user.id, db)] \
+            == [("bob", "owes_you")]
+
+        db.query(GroupMember).filter_by(group_id=group.id, user_id=user.id).delete()
+        db.commit()
+        assert userrepo.get_user_balances(user.id, db) == []
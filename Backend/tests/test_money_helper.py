@@ -0,0 +1,75 @@
+from decimal import Decimal
+import pytest
+from hypothesis import given, strategies as st
+from app.helper.money_helper import CENT, allocate, from_minor, split_equally, to_minor, to_money
+
+amounts = st.one_of(
+    st.integers(min_value=0, max_value=10 ** 10).map(from_minor),
+    st.floats(min_value=0, max_value=1e9, allow_nan=False, allow_infinity=False),
+    st.decimals(min_value=0, max_value=10 ** 8, allow_nan=False, allow_infinity=False, places=4)
+)
+counts = st.integers(min_value=1, max_value=50)
+offsets = st.integers(min_value=-1000, max_value=1000)
+
+
+@given(amounts, counts, offsets)
+def test_split_equally_sums_to_total(total, count, offset):
+    shares = split_equally(total, count, offset)
+    assert len(shares) == count
+    assert sum(shares) == to_money(total)
+    assert all(share == share.quantize(CENT) for share in shares)
+
+
+@given(amounts, counts, offsets)
+def test_split_equally_shares_differ_by_at_most_one_cent(total, count, offset):
+    shares = split_equally(total, count, offset)
+    assert max(shares) - min(shares) <= CENT
+
+
+@given(amounts, counts, offsets)
+def test_split_equally_odd_cents_start_at_offset(total, count, offset):
+    shares = split_equally(total, count, offset)
+    leftover = to_minor(total) % count
+    larger = {(offset + i) % count for i in range(leftover)}
+    base = from_minor(to_minor(total) // count)
+    assert shares == [base + CENT if i in larger else base for i in range(count)]
+
+
+@given(amounts, counts, offsets)
+def test_split_equally_rotation_depends_only_on_offset(total, count, offset):
+    shares = split_equally(total, count, offset)
+    assert split_equally(total, count, offset + count) == shares
+    # Rotating the offset rotates the shares and nothing else
+    unrotated = split_equally(total, count, 0)
+    assert shares == [unrotated[(i - offset) % count] for i in range(count)]
+
+
+@given(amounts, st.lists(st.integers(min_value=0, max_value=1000), min_size=1, max_size=30), offsets)
+def test_allocate_sums_to_total_and_stays_within_a_cent(total, weights, offset):
+    if sum(weights) == 0:
+        weights[0] = 1
+    shares = allocate(total, weights, offset)
+    total = to_money(total)
+    assert sum(shares) == total
+    for share, weight in zip(shares, weights):
+        exact = total * weight / sum(weights)
+        assert abs(share - exact) < CENT
+        assert share >= 0
+
+
+@given(amounts, st.lists(st.floats(min_value=0.01, max_value=10 ** 6), min_size=1, max_size=30))
+def test_allocate_with_money_weights_sums_to_total(total, weights):
+    assert sum(allocate(total, weights)) == to_money(total)
+
+
+def test_to_money_uses_the_shortest_float_repr():
+    assert to_money(25.1) == Decimal("25.10")
+    assert to_money(0.1) + to_money(0.2) == to_money(0.3)
+    assert to_money(1.005) == Decimal("1.01")
+
+
+def test_allocate_rejects_empty_and_zero_weights():
+    with pytest.raises(ValueError):
+        allocate(10, [])
+    with pytest.raises(ValueError):
+        allocate(10, [0, 0])